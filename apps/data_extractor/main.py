@@ -15,6 +15,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent))
 
 from modules.extractor import DataExtractor
+from modules.backfill import BackfillRunner
 from modules.date_utils import DateUtils
 
 
@@ -54,6 +55,15 @@ def parse_args():
 
   # 指定筛选日期范围
   python main.py --start-date 2025-12-22 --end-date 2025-12-28
+
+  # 4个任务并行执行
+  python main.py --jobs 4
+
+  # 回填多周历史数据
+  python main.py --from-schema 20250106 --to-schema 20251229
+
+  # 使用本地SQLite数据库离线运行(先执行 seed_local_db.py 初始化)
+  python main.py --local-db local_db --schema-date 20251229
         """
     )
 
@@ -104,6 +114,82 @@ def parse_args():
         help='是否执行任务3 (0=禁用, 1=启用)'
     )
 
+    parser.add_argument(
+        '--task5',
+        type=int,
+        choices=[0, 1],
+        help='是否执行任务5 周解决率汇总 (0=禁用, 1=启用)'
+    )
+
+    parser.add_argument(
+        '--from-schema',
+        help='回填起始Schema日期 (YYYYMMDD格式),需与 --to-schema 一起使用'
+    )
+
+    parser.add_argument(
+        '--to-schema',
+        help='回填结束Schema日期 (YYYYMMDD格式),需与 --from-schema 一起使用'
+    )
+
+    parser.add_argument(
+        '--backfill-jobs',
+        type=int,
+        help='回填时同时抽取的周数,例如: 4'
+    )
+
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='启用查询结果缓存'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='禁用查询结果缓存'
+    )
+
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='忽略已有的查询缓存,重新查询并更新缓存'
+    )
+
+    parser.add_argument(
+        '--explain',
+        action='store_true',
+        help='采集每条查询的 EXPLAIN (ANALYZE, BUFFERS) 执行计划写入查询统计报告'
+    )
+
+    parser.add_argument(
+        '--weeks',
+        type=int,
+        help='多窗口模式: 一次查询抽取最近N周的任务3/任务4数据,按周拆分输出,例如: 4'
+    )
+
+    parser.add_argument(
+        '--partitions',
+        type=int,
+        help='单表分区抽取: 任务1/任务2按创建时间拆分为N个分区并行读取,例如: 4'
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='续跑: 跳过运行清单中已按相同参数完成的任务'
+    )
+
+    parser.add_argument(
+        '--local-db',
+        help='使用SQLite本地数据库目录代替PostgreSQL,例如: local_db'
+    )
+
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='任务并行度,大于1时各任务在独立连接上并行执行,例如: 4'
+    )
+
     return parser.parse_args()
 
 
@@ -121,6 +207,10 @@ def override_config(config: dict, args) -> dict:
         config['date_range']['end_date'] = args.end_date
         logger.info(f"命令行覆盖: 结束日期 = {args.end_date}")
 
+    if args.weeks is not None:
+        config['date_range']['weeks'] = args.weeks
+        logger.info(f"命令行覆盖: 窗口周数 = {args.weeks}")
+
     if args.output_dir:
         config['output']['directory'] = args.output_dir
         logger.info(f"命令行覆盖: 输出目录 = {args.output_dir}")
@@ -137,6 +227,49 @@ def override_config(config: dict, args) -> dict:
         config['tasks']['task3_enabled'] = bool(args.task3)
         logger.info(f"命令行覆盖: 任务3 = {'启用' if args.task3 else '禁用'}")
 
+    if args.task5 is not None:
+        config['tasks']['task5_enabled'] = bool(args.task5)
+        logger.info(f"命令行覆盖: 任务5 = {'启用' if args.task5 else '禁用'}")
+
+    if args.backfill_jobs is not None:
+        config.setdefault('backfill', {})['concurrency'] = args.backfill_jobs
+        logger.info(f"命令行覆盖: 回填并发数 = {args.backfill_jobs}")
+
+    if args.cache:
+        config.setdefault('cache', {})['enabled'] = True
+        logger.info("命令行覆盖: 启用查询缓存")
+
+    if args.no_cache:
+        config.setdefault('cache', {})['enabled'] = False
+        logger.info("命令行覆盖: 禁用查询缓存")
+
+    if args.refresh:
+        config.setdefault('cache', {})['refresh'] = True
+        logger.info("命令行覆盖: 刷新查询缓存")
+
+    if args.explain:
+        instrumentation = config.setdefault('instrumentation', {})
+        instrumentation['enabled'] = True
+        instrumentation['explain'] = True
+        logger.info("命令行覆盖: 采集查询执行计划")
+
+    if args.partitions is not None:
+        config['tasks'].setdefault('partitions', {})['count'] = args.partitions
+        logger.info(f"命令行覆盖: 单表分区数 = {args.partitions}")
+
+    if args.resume:
+        config['tasks']['resume'] = True
+        logger.info("命令行覆盖: 续跑模式")
+
+    if args.local_db:
+        config['database']['backend'] = 'sqlite'
+        config['database'].setdefault('sqlite', {})['directory'] = args.local_db
+        logger.info(f"命令行覆盖: 使用本地数据库 = {args.local_db}")
+
+    if args.jobs is not None:
+        config['tasks']['parallelism'] = args.jobs
+        logger.info(f"命令行覆盖: 任务并行度 = {args.jobs}")
+
     return config
 
 
@@ -166,6 +299,22 @@ def main():
     logger.info(f"配置文件: {args.config}")
     logger.info("=" * 80)
 
+    if bool(args.from_schema) != bool(args.to_schema):
+        logger.error("--from-schema 和 --to-schema 需要同时指定")
+        return 1
+
+    if args.from_schema:
+        try:
+            results = BackfillRunner(config).run(args.from_schema, args.to_schema)
+        except Exception as e:
+            logger.error(f"历史回填失败: {e}", exc_info=True)
+            return 1
+
+        all_success = bool(results) and all(
+            week_results and all(week_results.values()) for week_results in results.values()
+        )
+        return 0 if all_success else 1
+
     try:
         # 创建数据抽取器
         extractor = DataExtractor(config)
@@ -0,0 +1,196 @@
+"""
+周汇总模块
+在数据库端按 周 × 所涉产品 × 状态 汇总"计算解决率过程数据"并物化(PostgreSQL为物化视图),
+看板和数据处理只需读取几百行汇总结果,不再拉取全部明细;
+同时检查"创建时间"/"所涉产品"上的索引并给出建议
+
+汇总写入单独的可写Schema(aggregate.schema),yxwtzb_<日期> 周快照保持只读
+"""
+
+from typing import Dict, List
+
+import pandas as pd
+from loguru import logger
+
+
+# 汇总的明细表(位于 yxwtzb_<日期>)和物化结果名称(位于汇总Schema,名称后加上来源Schema)
+SOURCE_TABLE = '计算解决率过程数据'
+AGGREGATE_NAME = '周解决率汇总'
+
+# 默认的汇总Schema
+DEFAULT_AGGREGATE_SCHEMA = 'report'
+
+# 状态列顺序(与 apps/data_processor 的透视表一致)
+STATUS_COLUMN = '用于交付日期偏差统计'
+STATUS_ORDER = ['非研发处理', '及时解决', '未及时解决', '处理中暂未超时', '超时未解决']
+
+# 各数据库后端的SQL写法
+DIALECTS = {
+    'postgres': {
+        'week': "date_trunc('week', {column})::date",
+        'now': 'LOCALTIMESTAMP',
+        'overdue': "{actual} - {baseline} >= interval '1 day'",
+        'index_ddl': 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index}" ON {schema}."{table}" ({columns});',
+    },
+    'sqlite': {
+        'week': "date({column}, 'weekday 0', '-6 days')",
+        'now': "datetime('now', 'localtime')",
+        'overdue': 'julianday({actual}) - julianday({baseline}) >= 1',
+        'index_ddl': 'CREATE INDEX IF NOT EXISTS {schema}."{index}" ON "{table}" ({columns});',
+    },
+}
+
+# 按周、产品、状态计数
+# 状态与 data_processor 的AE/AO列计算一致: 基准日期为计划完成时间(为空时为期望解决时间),
+# 实际完成日期为研发解决时间(未解决且已结束时为更新时间,否则为刷新时间),相差至少1天为超时;
+# 剔除规则与 data_processor 的数据清洗一致
+AGGREGATE_QUERY = """
+SELECT
+    {week} AS "统计周",
+    "所涉产品",
+    CASE
+        WHEN "处理方式" <> '研发处理' THEN '非研发处理'
+        WHEN coalesce("计划完成时间", "期望解决时间") IS NULL THEN NULL
+        WHEN "研发解决时间" IS NOT NULL THEN
+            CASE WHEN {overdue_resolved} THEN '未及时解决' ELSE '及时解决' END
+        WHEN "审批状态" = '已结束' THEN
+            CASE
+                WHEN "更新时间" IS NULL THEN NULL
+                WHEN {overdue_closed} THEN '未及时解决'
+                ELSE '及时解决'
+            END
+        ELSE
+            CASE WHEN {overdue_open} THEN '超时未解决' ELSE '处理中暂未超时' END
+    END AS "用于交付日期偏差统计",
+    count("数据id") AS "问题数",
+    {now} AS "刷新时间"
+FROM {table}
+WHERE "处理方式" IN ('研发处理', '非研发处理')
+  AND CASE
+          WHEN "审批结果" = '审批未通过' OR "审批状态" = '终止' OR "非研发处理问题类别" LIKE '%需求%'
+          THEN 'YES'
+          ELSE "是否剔除"
+      END = 'NO'
+GROUP BY 1, 2, 3
+"""
+
+# 建议的索引: (列, 原因)
+RECOMMENDED_INDEXES = [
+    (['创建时间'], '任务3/任务4按创建时间范围筛选,任务1/任务2和分区抽取按创建时间排序'),
+    (['所涉产品', '创建时间'], '周汇总按产品和周分组,任务4按所涉产品关联维表'),
+]
+
+
+class WeeklyAggregate:
+    """周解决率汇总"""
+
+    def __init__(self, db, schema: str, target_schema: str = DEFAULT_AGGREGATE_SCHEMA):
+        """
+        初始化周汇总
+
+        Args:
+            db: 数据库连接器
+            schema: 明细所在的Schema名称 (yxwtzb_<日期>)
+            target_schema: 写入汇总的Schema(需要建表权限)
+        """
+        if db.backend not in DIALECTS:
+            raise ValueError(f"{db.backend} 后端不支持周汇总")
+        self.db = db
+        self.schema = schema
+        self.target_schema = target_schema
+        self.name = f"{AGGREGATE_NAME}_{schema}"
+        self.dialect = DIALECTS[db.backend]
+
+    def build_query(self) -> str:
+        """生成汇总查询"""
+        baseline = 'coalesce("计划完成时间", "期望解决时间")'
+        overdue = self.dialect['overdue']
+        return AGGREGATE_QUERY.format(
+            week=self.dialect['week'].format(column='"创建时间"'),
+            now=self.dialect['now'],
+            overdue_resolved=overdue.format(actual='"研发解决时间"', baseline=baseline),
+            overdue_closed=overdue.format(actual='"更新时间"', baseline=baseline),
+            overdue_open=overdue.format(actual=self.dialect['now'], baseline=baseline),
+            table=f'{self.schema}."{SOURCE_TABLE}"',
+        )
+
+    def refresh(self) -> pd.DataFrame:
+        """
+        创建或刷新汇总,并读取汇总结果
+
+        Returns:
+            pd.DataFrame: 汇总行(统计周, 所涉产品, 用于交付日期偏差统计, 问题数, 刷新时间)
+        """
+        created = self.db.materialize(self.target_schema, self.name, self.build_query())
+        logger.info(f"{'已创建' if created else '已刷新'}汇总: {self.target_schema}.{self.name}")
+
+        # 汇总随刷新变化,不使用查询缓存
+        return self.db.execute_query(
+            f'SELECT * FROM {self.target_schema}."{self.name}" ORDER BY 1 DESC, 2, 3;',
+            use_cache=False
+        )
+
+    @staticmethod
+    def summarize(aggregate: pd.DataFrame, decimals: int = 2) -> pd.DataFrame:
+        """
+        按周和产品展开状态计数,计算解决率和及时解决率(公式与 data_processor 一致)
+
+        Args:
+            aggregate: 汇总行
+            decimals: 百分比保留的小数位数
+
+        Returns:
+            pd.DataFrame: 每周每个产品一行
+        """
+        pivot = pd.pivot_table(
+            aggregate.dropna(subset=[STATUS_COLUMN]),
+            values='问题数',
+            index=['统计周', '所涉产品'],
+            columns=STATUS_COLUMN,
+            aggfunc='sum',
+            fill_value=0
+        )
+        pivot = pivot.reindex(columns=STATUS_ORDER, fill_value=0)
+        pivot['总计'] = pivot[STATUS_ORDER].sum(axis=1)
+
+        denominator = pivot['总计'] - pivot['非研发处理']
+        resolved = pivot['及时解决'] + pivot['未及时解决']
+        pivot['解决率'] = (resolved / denominator * 100).round(decimals).astype(object)
+        pivot['及时解决率'] = (pivot['及时解决'] / denominator * 100).round(decimals).astype(object)
+        pivot.loc[denominator <= 0, ['解决率', '及时解决率']] = '不涉及研发处理'
+
+        pivot = pivot.reset_index().sort_values(['统计周', '所涉产品'], ascending=[False, True])
+        pivot.columns.name = None
+        return pivot.reset_index(drop=True)
+
+    def advise_indexes(self) -> List[Dict]:
+        """
+        检查明细表上已有的索引,对缺少的索引给出建表语句
+
+        已有索引的前导列与建议的列相同时视为已覆盖。
+
+        Returns:
+            List[Dict]: 每个建议索引的检查结果(列、原因、状态、建表语句)
+        """
+        existing = self.db.list_indexes(self.schema, SOURCE_TABLE)
+        advice = []
+        for columns, reason in RECOMMENDED_INDEXES:
+            covering = next((name for name, index_columns in existing.items()
+                             if index_columns[:len(columns)] == columns), None)
+            ddl = self.dialect['index_ddl'].format(
+                index=f"{SOURCE_TABLE}_{'_'.join(columns)}_idx",
+                schema=self.schema,
+                table=SOURCE_TABLE,
+                columns=', '.join(f'"{column}"' for column in columns),
+            )
+            advice.append({
+                '索引列': ', '.join(columns),
+                '用途': reason,
+                '状态': f"已存在 ({covering})" if covering else '建议创建',
+                '建表语句': '' if covering else ddl,
+            })
+            if covering:
+                logger.info(f"索引已存在: {self.schema}.{SOURCE_TABLE} ({', '.join(columns)}) -> {covering}")
+            else:
+                logger.warning(f"建议创建索引({reason}): {ddl}")
+        return advice
@@ -0,0 +1,31 @@
+"""
+数据库后端模块
+按 database.backend 创建数据库连接器: postgres=PostgreSQL(默认), sqlite=本地SQLite文件
+"""
+
+from typing import Dict
+
+from .db_connector import DatabaseConnector
+from .sqlite_backend import SQLiteConnector
+
+
+BACKENDS = {
+    'postgres': DatabaseConnector,
+    'sqlite': SQLiteConnector,
+}
+
+
+def create_connector(config: Dict) -> DatabaseConnector:
+    """
+    按配置创建数据库连接器
+
+    Args:
+        config: 配置字典
+
+    Returns:
+        DatabaseConnector: 数据库连接器
+    """
+    backend = config['database'].get('backend', 'postgres')
+    if backend not in BACKENDS:
+        raise ValueError(f"不支持的数据库后端: {backend}")
+    return BACKENDS[backend](config)
@@ -0,0 +1,168 @@
+"""
+历史回填模块
+在一个进程内按周抽取多个 yxwtzb_* Schema,共享一个连接池并限制并发数
+"""
+
+import copy
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from loguru import logger
+
+from .backends import create_connector
+from .date_utils import DateUtils
+from .extractor import DataExtractor
+from .query_cache import resolve_cache_dir
+
+
+SCHEMA_NAME_PATTERN = re.compile(r'^yxwtzb_(\d{8})$')
+
+
+class BackfillRunner:
+    """多周历史回填执行器"""
+
+    def __init__(self, config: Dict):
+        """
+        初始化回填执行器
+
+        Args:
+            config: 配置字典
+        """
+        self.config = config
+        self.backfill_config = config.get('backfill') or {}
+        self.concurrency = max(1, int(self.backfill_config.get('concurrency', 2)))
+        self.layout = self.backfill_config.get('layout', 'per_week')
+        self.output_dir = Path(config['output']['directory'])
+
+        # 每周内部的任务并行度,连接池大小 = 周并发数 × 任务并行度 (× 分区数+1)
+        self.task_parallelism = max(1, int(config['tasks'].get('parallelism') or 1))
+        partition_count = max(1, int((config['tasks'].get('partitions') or {}).get('count') or 1))
+        connections_per_task = 1 + partition_count if partition_count > 1 else 1
+        db_config = copy.deepcopy(config)
+        pool_config = db_config['database'].get('pool') or {}
+        pool_config['enabled'] = True
+        pool_config['max_connections'] = max(
+            pool_config.get('max_connections', 4),
+            self.concurrency * self.task_parallelism * connections_per_task
+        )
+        db_config['database']['pool'] = pool_config
+        self.db = create_connector(db_config)
+
+    def find_schema_dates(self, from_schema: str, to_schema: str) -> List[str]:
+        """
+        一次目录查询找出范围内可用的Schema日期
+
+        Args:
+            from_schema: 起始Schema日期 (YYYYMMDD)
+            to_schema: 结束Schema日期 (YYYYMMDD)
+
+        Returns:
+            List[str]: Schema日期列表(升序)
+        """
+        dates = []
+        for schema in self.db.list_schemas('yxwtzb_'):
+            match = SCHEMA_NAME_PATTERN.match(schema)
+            if match and from_schema <= match.group(1) <= to_schema:
+                dates.append(match.group(1))
+        return dates
+
+    def _build_week_config(self, schema_date: str) -> Dict:
+        """
+        生成单周的抽取配置
+
+        - Schema日期为该周,筛选范围为该Schema的上一周(周一到周日)
+        - per_week 布局: 输出到 <输出目录>/<Schema日期>/
+        - partitioned 布局: 输出到 <输出目录>/<任务>/schema_date=<Schema日期>/
+        - 不使用增量抽取: 增量快照按表保存,多周并发时会互相覆盖
+        - 维表缓存仍使用回填输出目录下的目录,各周共用
+
+        Args:
+            schema_date: Schema日期 (YYYYMMDD)
+
+        Returns:
+            Dict: 单周配置
+        """
+        week_config = copy.deepcopy(self.config)
+        week_config['schema']['date'] = schema_date
+
+        start_date, end_date = DateUtils.get_previous_week_range(schema_date)
+        week_config['date_range']['start_date'] = start_date
+        week_config['date_range']['end_date'] = end_date
+        week_config['incremental'] = {**(week_config.get('incremental') or {}), 'enabled': False}
+
+        dimension_config = week_config.get('dimension_cache') or {}
+        week_config['dimension_cache'] = {
+            **dimension_config,
+            'directory': str(resolve_cache_dir(self.config, dimension_config.get('directory', '.dimension_cache'))),
+        }
+
+        if self.layout == 'partitioned':
+            week_config['output']['partition_by_schema'] = True
+        else:
+            week_config['output']['directory'] = str(self.output_dir / schema_date)
+
+        return week_config
+
+    def _run_week(self, schema_date: str) -> Dict[str, bool]:
+        """执行单周抽取"""
+        logger.info(f"回填: 开始抽取 yxwtzb_{schema_date}")
+        try:
+            extractor = DataExtractor(self._build_week_config(schema_date), db=self.db)
+            return extractor.run_all_tasks()
+        except Exception as e:
+            logger.error(f"回填: yxwtzb_{schema_date} 抽取失败: {e}")
+            return {}
+
+    def run(self, from_schema: str, to_schema: str) -> Dict[str, Dict[str, bool]]:
+        """
+        回填范围内所有可用的周
+
+        Args:
+            from_schema: 起始Schema日期 (YYYYMMDD或YYYY-MM-DD)
+            to_schema: 结束Schema日期 (YYYYMMDD或YYYY-MM-DD)
+
+        Returns:
+            Dict[str, Dict[str, bool]]: 每周各任务的执行结果
+        """
+        from_schema = DateUtils.parse_schema_date(from_schema)
+        to_schema = DateUtils.parse_schema_date(to_schema)
+        start_time = datetime.now()
+
+        self.db.connect()
+        try:
+            schema_dates = self.find_schema_dates(from_schema, to_schema)
+            logger.info("=" * 80)
+            logger.info(f"历史回填: {from_schema} 至 {to_schema}, 共 {len(schema_dates)} 周")
+            logger.info(f"并发数: {self.concurrency}, 输出布局: {self.layout}")
+            logger.info("=" * 80)
+
+            if not schema_dates:
+                logger.warning("范围内没有可用的Schema")
+                return {}
+
+            with ThreadPoolExecutor(max_workers=self.concurrency,
+                                    thread_name_prefix='backfill') as executor:
+                futures = [
+                    (schema_date, executor.submit(self._run_week, schema_date))
+                    for schema_date in schema_dates
+                ]
+                results = {schema_date: future.result() for schema_date, future in futures}
+        finally:
+            self.db.disconnect()
+
+        duration = (datetime.now() - start_time).total_seconds()
+        failed = [date for date, week in results.items()
+                  if not week or not all(week.values())]
+
+        logger.info("=" * 80)
+        logger.info("历史回填完成")
+        logger.info(f"成功: {len(results) - len(failed)}/{len(results)} 周")
+        if failed:
+            logger.warning(f"失败的周: {failed}")
+        logger.info(f"耗时: {duration:.2f}秒")
+        logger.info("=" * 80)
+
+        return results
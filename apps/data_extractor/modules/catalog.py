@@ -0,0 +1,95 @@
+"""
+目录元数据缓存模块
+一次查询 pg_catalog 加载表、列和类型信息,供本次运行内存查询
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# 一次性加载指定Schema(或指定表)下所有表的列名和类型
+CATALOG_QUERY = """
+SELECT
+    n.nspname AS schema_name,
+    c.relname AS table_name,
+    a.attname AS column_name,
+    pg_catalog.format_type(a.atttypid, a.atttypmod) AS column_type
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_catalog.pg_attribute a
+       ON a.attrelid = c.oid
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+  AND (n.nspname = ANY(%s) OR n.nspname || '.' || c.relname = ANY(%s))
+ORDER BY n.nspname, c.relname, a.attnum;
+"""
+
+
+class CatalogCache:
+    """目录元数据缓存"""
+
+    def __init__(self):
+        """初始化目录元数据缓存"""
+        # (schema, table) -> [(column, type)]
+        self._tables: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        self._schemas: Set[str] = set()
+        self._requested_tables: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def load(self,
+             rows: Iterable[Tuple[str, str, Optional[str], Optional[str]]],
+             schemas: Iterable[str] = (),
+             tables: Iterable[Tuple[str, str]] = ()):
+        """
+        加载目录查询结果
+
+        Args:
+            rows: (schema, table, column, type) 行
+            schemas: 本次完整加载的Schema列表
+            tables: 本次单独加载的 (schema, table) 列表
+        """
+        loaded: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for schema, table, column, column_type in rows:
+            columns = loaded.setdefault((schema, table), [])
+            if column is not None:
+                columns.append((column, column_type))
+
+        # 回填多个Schema时可能并发加载
+        with self._lock:
+            self._tables.update(loaded)
+            self._schemas.update(schemas)
+            self._requested_tables.update(tables)
+
+    def knows(self, schema: str, table: str) -> bool:
+        """
+        缓存能否回答该表的查询(所在Schema已完整加载,或该表已单独加载)
+
+        Args:
+            schema: Schema名称
+            table: 表名
+
+        Returns:
+            bool: 是否可由缓存回答
+        """
+        return schema in self._schemas or (schema, table) in self._requested_tables
+
+    def table_exists(self, schema: str, table: str) -> bool:
+        """检查表是否存在"""
+        return (schema, table) in self._tables
+
+    def get_columns(self, schema: str, table: str) -> List[str]:
+        """获取表的列名(按列顺序)"""
+        return [column for column, _ in self._tables.get((schema, table), [])]
+
+    def get_column_types(self, schema: str, table: str) -> Dict[str, str]:
+        """获取表的列名到类型的映射"""
+        return dict(self._tables.get((schema, table), []))
+
+    def get_column_type(self, schema: str, table: str, column: str) -> Optional[str]:
+        """获取单个列的类型,列不存在时返回None"""
+        return self.get_column_types(schema, table).get(column)
+
+    def list_tables(self, schema: str) -> List[str]:
+        """列出Schema下已加载的表"""
+        return sorted(table for table_schema, table in self._tables if table_schema == schema)
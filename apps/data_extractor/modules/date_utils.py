@@ -4,7 +4,7 @@
 """
 
 from datetime import datetime, timedelta, date
-from typing import Tuple
+from typing import List, Tuple
 from loguru import logger
 
 
@@ -46,6 +46,46 @@ class DateUtils:
 
         return start_date, end_date
 
+    @staticmethod
+    def get_previous_week_range(schema_date: str) -> Tuple[str, str]:
+        """
+        获取Schema日期所在周的上一周日期范围(周一到周日)
+
+        Args:
+            schema_date: YYYYMMDD格式的Schema日期
+
+        Returns:
+            Tuple[str, str]: (起始日期, 结束日期) 格式: YYYY-MM-DD
+        """
+        schema_day = datetime.strptime(schema_date, "%Y%m%d").date()
+        this_monday = schema_day - timedelta(days=schema_day.weekday())
+        last_monday = this_monday - timedelta(weeks=1)
+        last_sunday = last_monday + timedelta(days=6)
+        return last_monday.strftime("%Y-%m-%d"), last_sunday.strftime("%Y-%m-%d")
+
+    @staticmethod
+    def get_week_windows(start_date: str, end_date: str, weeks: int) -> List[Tuple[str, str]]:
+        """
+        以给定日期范围为最近一周,向前生成连续N周的日期范围
+
+        Args:
+            start_date: 最近一周的起始日期 YYYY-MM-DD
+            end_date: 最近一周的结束日期 YYYY-MM-DD
+            weeks: 周数
+
+        Returns:
+            List[Tuple[str, str]]: [(起始日期, 结束日期), ...],最近的一周在前
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+        windows = []
+        for i in range(max(1, weeks)):
+            shift = timedelta(weeks=i)
+            windows.append(((start - shift).strftime("%Y-%m-%d"),
+                            (end - shift).strftime("%Y-%m-%d")))
+        return windows
+
     @staticmethod
     def parse_schema_date(date_str: str) -> str:
         """
@@ -3,15 +3,238 @@
 负责PostgreSQL数据库连接和查询
 """
 
+import io
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
 import psycopg2
 import pandas as pd
-from typing import Dict, List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 from loguru import logger
 
+from .catalog import CATALOG_QUERY, CatalogCache
+from .query_cache import QueryCache, resolve_cache_dir
+from .query_stats import QueryStats
+
+
+# PostgreSQL 类型OID,用于COPY导出时直接解析为对应的列类型
+DATETIME_TYPE_OIDS = {1082, 1114, 1184}  # date, timestamp, timestamptz
+INTEGER_TYPE_OIDS = {20, 21, 23}         # int8, int2, int4
+FLOAT_TYPE_OIDS = {700, 701, 1700}       # float4, float8, numeric
+BOOL_TYPE_OIDS = {16}
+
+# COPY导出时的NULL标记,用于区分NULL和空字符串
+COPY_NULL_MARKER = '\\N'
+
+# Arrow抽取: 不同值占比不超过该比例的文本列按字典编码(转换为pandas的category)
+DICTIONARY_MAX_RATIO = 0.5
+
+
+class ConnectionPool:
+    """
+    线程安全的数据库连接池
+
+    - 启动时预建 min_connections 个连接
+    - 最多同时打开 max_connections 个连接,取不到时阻塞等待
+    - 空闲超过 idle_timeout 秒的连接会被关闭(保留 min_connections 个)
+    - 取出连接时可做健康检查(SELECT 1),失效连接自动重建
+    """
+
+    def __init__(self,
+                 connect_func: Callable,
+                 min_connections: int = 1,
+                 max_connections: int = 4,
+                 idle_timeout: float = 300,
+                 health_check: bool = True,
+                 checkout_timeout: float = 30):
+        """
+        初始化连接池
+
+        Args:
+            connect_func: 创建新连接的函数
+            min_connections: 最小连接数
+            max_connections: 最大连接数
+            idle_timeout: 空闲连接超时时间(秒), 0表示不超时
+            health_check: 取出连接时是否做健康检查
+            checkout_timeout: 等待可用连接的最长时间(秒)
+        """
+        if max_connections < 1 or min_connections > max_connections:
+            raise ValueError(f"连接池大小配置无效: min={min_connections}, max={max_connections}")
+
+        self._connect_func = connect_func
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []  # [(connection, 归还时间)]
+        self._size = 0   # 已打开的连接总数(空闲 + 使用中)
+        self._closed = False
+
+        for _ in range(min_connections):
+            self._idle.append((self._connect_func(), time.monotonic()))
+            self._size += 1
+
+    @property
+    def size(self) -> int:
+        """已打开的连接总数"""
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        """空闲连接数"""
+        return len(self._idle)
+
+    def getconn(self):
+        """
+        从连接池取出一个连接
+
+        Returns:
+            数据库连接
+
+        Raises:
+            ConnectionError: 连接池已关闭或等待超时
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+
+        while True:
+            conn = None
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("连接池已关闭")
+
+                self._close_expired_locked()
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                elif self._size < self.max_connections:
+                    # 预占一个名额,在锁外建立连接
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ConnectionError(
+                            f"等待数据库连接超时({self.checkout_timeout}秒), "
+                            f"连接池已满: {self.max_connections}"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    return self._connect_func()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if not self.health_check or self._is_healthy(conn):
+                return conn
+
+            logger.warning("连接池中的连接已失效,重新建立连接")
+            self._discard(conn)
+
+    def putconn(self, conn, close: bool = False):
+        """
+        归还连接到连接池
+
+        Args:
+            conn: 数据库连接
+            close: 是否直接关闭该连接
+        """
+        if not close and not getattr(conn, 'closed', 0):
+            try:
+                # 结束未提交的事务,保证下一个使用者拿到干净的连接
+                conn.rollback()
+            except Exception:
+                close = True
+        else:
+            close = True
+
+        with self._cond:
+            if close or self._closed:
+                self._size -= 1
+                self._safe_close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """关闭连接池中的所有空闲连接,使用中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._safe_close(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def _close_expired_locked(self):
+        """关闭空闲超时的连接(需持有锁)"""
+        if not self.idle_timeout:
+            return
+
+        now = time.monotonic()
+        kept = []
+        # 列表尾部是最近归还的连接,优先保留
+        for conn, last_used in reversed(self._idle):
+            expired = now - last_used > self.idle_timeout
+            if expired and self._size > self.min_connections:
+                self._safe_close(conn)
+                self._size -= 1
+            else:
+                kept.append((conn, last_used))
+        kept.reverse()
+        self._idle = kept
+
+    def _discard(self, conn):
+        """丢弃失效连接"""
+        self._safe_close(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        """检查连接是否可用"""
+        if getattr(conn, 'closed', 0):
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.debug(f"连接健康检查失败: {e}")
+            return False
+
+    @staticmethod
+    def _safe_close(conn):
+        """关闭连接并忽略异常"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
 
 class DatabaseConnector:
     """数据库连接器"""
 
+    # 数据库后端(本地后端见 sqlite_backend.SQLiteConnector)
+    backend = 'postgres'
+
     def __init__(self, config: Dict):
         """
         初始化数据库连接器
@@ -20,57 +243,841 @@ class DatabaseConnector:
             config: 配置字典,包含数据库连接信息
         """
         self.config = config['database']
+        self.pool_config = self.config.get('pool') or {}
+        self.stream_config = self.config.get('stream') or {}
         self.connection = None
+        self.pool = None
+        self.catalog = CatalogCache()
+        self._local = threading.local()
+
+        # 查询统计
+        instrumentation_config = config.get('instrumentation') or {}
+        self.stats = QueryStats(explain=instrumentation_config.get('explain', False))
+
+        # 查询结果缓存
+        cache_config = config.get('cache') or {}
+        self.query_cache = None
+        if cache_config.get('enabled', False):
+            self.query_cache = QueryCache(
+                resolve_cache_dir(config, cache_config.get('directory', '.query_cache')),
+                max_size_mb=cache_config.get('max_size_mb', 2048),
+                refresh=cache_config.get('refresh', False)
+            )
+
+    @property
+    def pooled(self) -> bool:
+        """是否启用连接池模式"""
+        return bool(self.pool_config.get('enabled', False))
+
+    @property
+    def is_connected(self) -> bool:
+        """是否已连接"""
+        if self.pooled:
+            return self.pool is not None
+        return self.connection is not None and not self.connection.closed
+
+    @property
+    def cache_source(self) -> Optional[str]:
+        """查询缓存键中区分数据来源的标识(PostgreSQL为None,与已有缓存兼容)"""
+        return None
+
+    def describe_target(self) -> str:
+        """连接目标(用于日志)"""
+        return f"{self.config['host']}:{self.config['port']}"
+
+    def _create_connection(self):
+        """创建一个新的数据库连接"""
+        return psycopg2.connect(
+            host=self.config['host'],
+            port=self.config['port'],
+            database=self.config['database'],
+            user=self.config['user'],
+            password=self.config['password']
+        )
 
     def connect(self):
-        """建立数据库连接"""
+        """建立数据库连接(连接池模式下创建连接池)"""
+        if self.is_connected:
+            return
+
         try:
-            logger.info(f"连接数据库: {self.config['host']}:{self.config['port']}")
-            self.connection = psycopg2.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                database=self.config['database'],
-                user=self.config['user'],
-                password=self.config['password']
-            )
-            logger.info("数据库连接成功 ✓")
+            logger.info(f"连接数据库: {self.describe_target()}")
+            if self.pooled:
+                self.pool = ConnectionPool(
+                    self._create_connection,
+                    min_connections=self.pool_config.get('min_connections', 1),
+                    max_connections=self.pool_config.get('max_connections', 4),
+                    idle_timeout=self.pool_config.get('idle_timeout', 300),
+                    health_check=self.pool_config.get('health_check', True),
+                    checkout_timeout=self.pool_config.get('checkout_timeout', 30)
+                )
+                logger.info(
+                    f"数据库连接池创建成功 ✓ "
+                    f"(min={self.pool.min_connections}, max={self.pool.max_connections})"
+                )
+            else:
+                self.connection = self._create_connection()
+                logger.info("数据库连接成功 ✓")
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             raise
 
     def disconnect(self):
         """断开数据库连接"""
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+            logger.info("数据库连接池已关闭")
         if self.connection:
             self.connection.close()
+            self.connection = None
             logger.info("数据库连接已关闭")
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> pd.DataFrame:
+    @contextmanager
+    def get_connection(self):
+        """
+        获取当前可用的数据库连接
+
+        - 当前线程已通过 acquire() 占用连接时,返回该连接
+        - 连接池模式下,每次调用取出一个连接,用完归还
+        - 单连接模式下,返回 self.connection
+        """
+        pinned = getattr(self._local, 'connection', None)
+        if pinned is not None:
+            yield pinned
+            return
+
+        if self.pool is not None:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+            finally:
+                self.pool.putconn(conn)
+            return
+
+        if not self.connection:
+            raise ConnectionError("数据库未连接")
+        yield self.connection
+
+    @contextmanager
+    def acquire(self):
+        """
+        为当前线程占用一个连接,直到退出上下文
+
+        用于让一个任务内的所有查询使用同一个连接。单连接模式下不做任何处理。
+        """
+        if self.pool is None or getattr(self._local, 'connection', None) is not None:
+            yield
+            return
+
+        conn = self.pool.getconn()
+        self._local.connection = conn
+        try:
+            yield
+        finally:
+            self._local.connection = None
+            self.pool.putconn(conn)
+
+    def execute_query(self, query: str, params: Optional[tuple] = None,
+                      use_cache: bool = True) -> pd.DataFrame:
         """
         执行SQL查询并返回DataFrame
 
         Args:
             query: SQL查询语句
             params: 查询参数
+            use_cache: 是否使用查询缓存(读取会变化的对象时设为False)
 
         Returns:
             pd.DataFrame: 查询结果
         """
-        if not self.connection:
-            raise ConnectionError("数据库未连接")
+        cache_key = self._get_cache_key(query, params) if use_cache else None
+        df = self._get_cached(cache_key, query)
+        if df is not None:
+            return df
 
         try:
-            logger.info(f"执行SQL查询...")
-            logger.debug(f"SQL: {query}")
+            with self.get_connection() as conn:
+                logger.info(f"执行SQL查询...")
+                logger.debug(f"SQL: {query}")
 
-            df = pd.read_sql_query(query, self.connection, params=params)
+                plan = self._explain(conn, query, params)
 
+                started = time.perf_counter()
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                executed = time.perf_counter()
+
+                rows = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description]
+                cursor.close()
+                df = self._records_to_frame(rows, columns)
+                fetched = time.perf_counter()
+
+            self.stats.record(query, 'pandas', len(df), self._frame_bytes(df),
+                              executed - started, fetched - executed, plan)
             logger.info(f"查询完成: 返回 {len(df)} 行数据")
+
+        except Exception as e:
+            logger.error(f"查询执行失败: {e}")
+            raise
+
+        if cache_key is not None:
+            self.query_cache.put(cache_key, df)
+        return df
+
+    @staticmethod
+    def _records_to_frame(rows: List[tuple], columns: List[str]) -> pd.DataFrame:
+        """
+        将游标返回的行构造为DataFrame(与 pd.read_sql_query 的结果一致)
+
+        Args:
+            rows: 行数据
+            columns: 列名
+
+        Returns:
+            pd.DataFrame: 查询结果
+        """
+        df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        for column, dtype in df.dtypes.items():
+            if isinstance(dtype, pd.DatetimeTZDtype):
+                df[column] = pd.to_datetime(df[column], utc=True)
+        return df
+
+    @staticmethod
+    def _frame_bytes(df: pd.DataFrame) -> int:
+        """估算DataFrame的内存大小(字节)"""
+        return int(df.memory_usage(deep=True, index=False).sum())
+
+    def _get_cached(self, cache_key: Optional[str], query: str) -> Optional[pd.DataFrame]:
+        """
+        读取查询缓存并记录统计
+
+        Args:
+            cache_key: 缓存键(为None时不读取)
+            query: SQL查询语句
+
+        Returns:
+            Optional[pd.DataFrame]: 缓存的结果,未命中时返回None
+        """
+        if cache_key is None:
+            return None
+
+        started = time.perf_counter()
+        df = self.query_cache.get(cache_key)
+        if df is None:
+            return None
+
+        self.stats.record(query, 'cache', len(df), self._frame_bytes(df),
+                          0.0, time.perf_counter() - started)
+        logger.info(f"查询缓存命中: 返回 {len(df)} 行数据")
+        return df
+
+    def _iter_cached(self, batches: Iterator[pd.DataFrame], query: str) -> Iterator[pd.DataFrame]:
+        """
+        按块返回缓存的结果,读取结束后记录统计
+
+        Args:
+            batches: 缓存结果块迭代器
+            query: SQL查询语句
+
+        Yields:
+            pd.DataFrame: 查询结果块
+        """
+        total_rows = 0
+        total_bytes = 0
+        fetch_seconds = 0.0
+        started = time.perf_counter()
+        for chunk in batches:
+            fetch_seconds += time.perf_counter() - started
+            total_rows += len(chunk)
+            total_bytes += self._frame_bytes(chunk)
+            yield chunk
+            started = time.perf_counter()
+        fetch_seconds += time.perf_counter() - started
+
+        self.stats.record(query, 'cache', total_rows, total_bytes, 0.0, fetch_seconds)
+        logger.info(f"查询缓存命中: 按块返回 {total_rows} 行数据")
+
+    def _explain(self, conn, query: str, params: Optional[tuple] = None) -> Optional[Dict]:
+        """
+        采集 EXPLAIN (ANALYZE, BUFFERS) 执行计划(仅在启用时)
+
+        注意: ANALYZE 会实际执行一次查询。
+
+        Args:
+            conn: 数据库连接
+            query: SQL查询语句
+            params: 查询参数
+
+        Returns:
+            Optional[Dict]: 执行计划,未启用或失败时返回None
+        """
+        if not self.stats.explain:
+            return None
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {self._strip_query(query)}",
+                params
+            )
+            plan = cursor.fetchone()[0]
+            cursor.close()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return plan[0] if isinstance(plan, list) else plan
+        except Exception as e:
+            logger.warning(f"采集执行计划失败: {e}")
+            conn.rollback()
+            return None
+
+    def estimate_query(self, query: str, params: Optional[tuple] = None) -> Optional[Dict]:
+        """
+        使用 EXPLAIN 获取查询的估算行数和平均行宽(不执行查询)
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+
+        Returns:
+            Optional[Dict]: {'rows': 估算行数, 'width': 平均行宽(字节)},失败时返回None
+        """
+        with self.get_connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {self._strip_query(query)}", params)
+                plan = cursor.fetchone()[0]
+                cursor.close()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                plan = (plan[0] if isinstance(plan, list) else plan)['Plan']
+                return {'rows': int(plan['Plan Rows']), 'width': int(plan['Plan Width'])}
+            except Exception as e:
+                logger.warning(f"获取查询估算失败: {e}")
+                conn.rollback()
+                return None
+
+    def _get_cache_key(self, query: str, params: Optional[tuple] = None) -> Optional[str]:
+        """
+        获取查询的缓存键,未启用缓存或查询不可缓存时返回None
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+
+        Returns:
+            Optional[str]: 缓存键
+        """
+        if self.query_cache is None or not self.query_cache.is_cacheable(query):
+            return None
+        return self.query_cache.make_key(query, params, source=self.cache_source)
+
+    def execute_query_iter(self,
+                           query: str,
+                           params: Optional[tuple] = None,
+                           itersize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        使用服务端游标执行SQL查询,按块返回DataFrame
+
+        结果集保留在数据库端,客户端每次只拉取 itersize 行,
+        内存占用与块大小相关,与结果集总行数无关。
+        结果为空时返回一个只有列名的空DataFrame。
+        查询缓存命中时按块读取缓存文件(流式读取的结果不写入缓存)。
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            itersize: 每块行数,默认使用 database.stream.itersize
+
+        Yields:
+            pd.DataFrame: 查询结果块
+        """
+        itersize = itersize or self.stream_config.get('itersize', 10000)
+
+        cache_key = self._get_cache_key(query, params)
+        batches = self.query_cache.iter_batches(cache_key, itersize) if cache_key is not None else None
+        if batches is not None:
+            yield from self._iter_cached(batches, query)
+            return
+
+        with self.get_connection() as conn:
+            logger.info(f"执行SQL查询(服务端游标, 每块 {itersize} 行)...")
+            logger.debug(f"SQL: {query}")
+
+            plan = self._explain(conn, query, params)
+            cursor = conn.cursor(name=f"extract_{uuid.uuid4().hex[:12]}")
+            cursor.itersize = itersize
+            total_rows = 0
+            total_bytes = 0
+            chunk_count = 0
+            server_seconds = 0.0
+            fetch_seconds = 0.0
+
+            try:
+                cursor.execute(query, params)
+                while True:
+                    # 服务端游标的每次FETCH都在数据库端执行
+                    started = time.perf_counter()
+                    rows = cursor.fetchmany(itersize)
+                    fetched = time.perf_counter()
+                    if not rows and chunk_count > 0:
+                        server_seconds += fetched - started
+                        break
+
+                    columns = [desc[0] for desc in cursor.description]
+                    chunk = self._records_to_frame(rows, columns)
+                    server_seconds += fetched - started
+                    fetch_seconds += time.perf_counter() - fetched
+
+                    total_rows += len(chunk)
+                    total_bytes += self._frame_bytes(chunk)
+                    chunk_count += 1
+                    logger.debug(f"读取第 {chunk_count} 块: {len(chunk)} 行")
+                    yield chunk
+
+                    if len(rows) < itersize:
+                        break
+
+                self.stats.record(query, 'stream', total_rows, total_bytes,
+                                  server_seconds, fetch_seconds, plan)
+                logger.info(f"查询完成: 共 {chunk_count} 块, 返回 {total_rows} 行数据")
+
+            except Exception as e:
+                logger.error(f"查询执行失败: {e}")
+                raise
+
+            finally:
+                try:
+                    cursor.close()
+                    # 服务端游标依赖事务,读取结束后释放事务快照
+                    conn.rollback()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _strip_query(query: str) -> str:
+        """去掉SQL语句末尾的分号,便于嵌入子查询"""
+        return query.strip().rstrip(';').strip()
+
+    def describe_query(self, query: str, params: Optional[tuple] = None) -> List[Tuple[str, int]]:
+        """
+        获取查询结果的列名和类型OID(不返回数据)
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+
+        Returns:
+            List[Tuple[str, int]]: (列名, 类型OID) 列表
+        """
+        describe_sql = f"SELECT * FROM ({self._strip_query(query)}) AS _q LIMIT 0"
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(describe_sql, params)
+            columns = [(desc[0], desc[1]) for desc in cursor.description]
+            cursor.close()
+        return columns
+
+    def _copy_csv(self, conn, query: str, params: Optional[tuple], target):
+        """
+        使用 COPY (query) TO STDOUT 把查询结果以CSV格式写入 target
+
+        Args:
+            conn: 数据库连接
+            query: SQL查询语句
+            params: 查询参数
+            target: 可写的文件对象
+
+        Returns:
+            cursor.rowcount
+        """
+        cursor = conn.cursor()
+        inner_sql = self._strip_query(query)
+        if params:
+            inner_sql = cursor.mogrify(inner_sql, params).decode('utf-8')
+        copy_sql = (
+            f"COPY ({inner_sql}) TO STDOUT "
+            f"WITH (FORMAT csv, HEADER true, NULL '{COPY_NULL_MARKER}')"
+        )
+        cursor.copy_expert(copy_sql, target)
+        cursor.close()
+        return cursor.rowcount
+
+    def copy_query(self,
+                   query: str,
+                   params: Optional[tuple] = None,
+                   output_file: Optional[Union[str, Path]] = None) -> Optional[pd.DataFrame]:
+        """
+        使用 COPY (query) TO STDOUT 批量导出查询结果
+
+        数据以CSV格式从数据库直接流出,不逐个构造Python对象:
+        - 指定 output_file 时直接写入CSV文件,返回None
+        - 否则按查询的列类型解析为带类型的DataFrame
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            output_file: CSV输出文件路径(可选)
+
+        Returns:
+            Optional[pd.DataFrame]: 查询结果
+        """
+        cache_key = self._get_cache_key(query, params) if output_file is None else None
+        df = self._get_cached(cache_key, query)
+        if df is not None:
             return df
 
+        try:
+            with self.get_connection() as conn:
+                logger.info(f"执行COPY导出...")
+                logger.debug(f"SQL: {query}")
+
+                plan = self._explain(conn, query, params)
+
+                if output_file is not None:
+                    started = time.perf_counter()
+                    with open(output_file, 'wb') as f:
+                        rowcount = self._copy_csv(conn, query, params, f)
+                        bytes_count = f.tell()
+                    self.stats.record(query, 'copy', rowcount, bytes_count,
+                                      time.perf_counter() - started, 0.0, plan)
+                    logger.info(f"COPY导出完成: {output_file}")
+                    return None
+
+                started = time.perf_counter()
+                buffer = io.BytesIO()
+                self._copy_csv(conn, query, params, buffer)
+                copied = time.perf_counter()
+
+            column_types = self.describe_query(query, params)
+            bytes_count = buffer.tell()
+            buffer.seek(0)
+            df = self._parse_copy_csv(buffer, column_types)
+
+            self.stats.record(query, 'copy', len(df), bytes_count,
+                              copied - started, time.perf_counter() - copied, plan)
+            logger.info(f"COPY导出完成: 返回 {len(df)} 行数据")
+
+        except Exception as e:
+            logger.error(f"COPY导出失败: {e}")
+            raise
+
+        if cache_key is not None:
+            self.query_cache.put(cache_key, df)
+        return df
+
+    @staticmethod
+    def _parse_copy_csv(buffer, column_types: List[Tuple[str, int]]) -> pd.DataFrame:
+        """
+        按列类型解析COPY导出的CSV数据
+
+        Args:
+            buffer: CSV数据
+            column_types: (列名, 类型OID) 列表
+
+        Returns:
+            pd.DataFrame: 带类型的查询结果
+        """
+        dtype = {}
+        parse_dates = []
+        for name, type_oid in column_types:
+            if type_oid in DATETIME_TYPE_OIDS:
+                parse_dates.append(name)
+            elif type_oid in INTEGER_TYPE_OIDS:
+                dtype[name] = 'Int64'
+            elif type_oid in FLOAT_TYPE_OIDS:
+                dtype[name] = 'float64'
+            elif type_oid in BOOL_TYPE_OIDS:
+                dtype[name] = 'boolean'
+            else:
+                dtype[name] = 'object'
+
+        return pd.read_csv(
+            buffer,
+            dtype=dtype,
+            parse_dates=parse_dates,
+            keep_default_na=False,
+            na_values=[COPY_NULL_MARKER],
+            true_values=['t'],
+            false_values=['f'],
+            encoding='utf-8'
+        )
+
+    def execute_query_arrow(self,
+                            query: str,
+                            params: Optional[tuple] = None,
+                            categorical: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        按列类型直接构造Arrow列,返回带类型的DataFrame
+
+        数据通过 COPY 以CSV格式流出,按查询结果的类型OID由Arrow解析,不逐个构造Python对象:
+        - 时间/日期 -> datetime64 (timestamptz 为UTC)
+        - 整数/浮点/布尔 -> 对应的数值类型(整数列允许NULL)
+        - 低基数文本(不同值占比不超过 DICTIONARY_MAX_RATIO,或在 categorical 中指定) -> category
+        - 其余文本 -> Arrow字符串 (string[pyarrow])
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            categorical: 强制按字典编码的文本列(可选)
+
+        Returns:
+            pd.DataFrame: 查询结果
+        """
+        cache_key = self._get_cache_key(query, params)
+        df = self._get_cached(cache_key, query)
+        if df is not None:
+            return df
+
+        try:
+            with self.get_connection() as conn:
+                logger.info("执行SQL查询(Arrow类型化读取)...")
+                logger.debug(f"SQL: {query}")
+
+                plan = self._explain(conn, query, params)
+                started = time.perf_counter()
+                buffer = io.BytesIO()
+                self._copy_csv(conn, query, params, buffer)
+                copied = time.perf_counter()
+
+            column_types = self.describe_query(query, params)
+            bytes_count = buffer.tell()
+            buffer.seek(0)
+            table = self._parse_arrow_csv(buffer, column_types, categorical or [])
+            df = table.to_pandas(types_mapper={pa.string(): pd.ArrowDtype(pa.string())}.get)
+
+            self.stats.record(query, 'arrow', len(df), bytes_count,
+                              copied - started, time.perf_counter() - copied, plan)
+            logger.info(f"查询成功,返回 {len(df)} 行数据")
+
         except Exception as e:
             logger.error(f"查询执行失败: {e}")
             raise
 
+        if cache_key is not None:
+            self.query_cache.put(cache_key, df)
+        return df
+
+    @staticmethod
+    def arrow_schema(column_types: List[Tuple[str, int]]) -> pa.Schema:
+        """
+        按类型OID生成查询结果的Arrow表结构
+
+        Args:
+            column_types: (列名, 类型OID) 列表
+
+        Returns:
+            pa.Schema: 表结构(未知类型按文本处理)
+        """
+        fields = []
+        for name, type_oid in column_types:
+            if type_oid == 1184:
+                fields.append((name, pa.timestamp('us', tz='UTC')))
+            elif type_oid in DATETIME_TYPE_OIDS:
+                fields.append((name, pa.timestamp('us')))
+            elif type_oid in INTEGER_TYPE_OIDS:
+                fields.append((name, pa.int64()))
+            elif type_oid in FLOAT_TYPE_OIDS:
+                fields.append((name, pa.float64()))
+            elif type_oid in BOOL_TYPE_OIDS:
+                fields.append((name, pa.bool_()))
+            else:
+                fields.append((name, pa.string()))
+        return pa.schema(fields)
+
+    @staticmethod
+    def _parse_arrow_csv(buffer,
+                         column_types: List[Tuple[str, int]],
+                         categorical: List[str]) -> pa.Table:
+        """
+        按列类型把COPY导出的CSV解析为Arrow表
+
+        Args:
+            buffer: CSV数据
+            column_types: (列名, 类型OID) 列表
+            categorical: 强制按字典编码的文本列
+
+        Returns:
+            pa.Table: 带类型的Arrow表
+        """
+        schema = DatabaseConnector.arrow_schema(column_types)
+        arrow_types = dict(zip(schema.names, schema.types))
+
+        table = pa_csv.read_csv(
+            buffer,
+            convert_options=pa_csv.ConvertOptions(
+                column_types=arrow_types,
+                null_values=[COPY_NULL_MARKER],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+                true_values=['t'],
+                false_values=['f'],
+                timestamp_parsers=[pa_csv.ISO8601]
+            )
+        )
+
+        # 低基数文本列按字典编码
+        for index, field in enumerate(table.schema):
+            if not pa.types.is_string(field.type) or table.num_rows == 0:
+                continue
+            column = table.column(index)
+            distinct = pc.count_distinct(column).as_py()
+            if field.name in categorical or distinct <= table.num_rows * DICTIONARY_MAX_RATIO:
+                table = table.set_column(index, field.name, column.dictionary_encode())
+
+        return table
+
+    def materialize(self, schema: str, name: str, query: str) -> bool:
+        """
+        创建或刷新物化视图
+
+        物化视图已存在时执行 REFRESH(定义不变),需要修改定义时先手动删除。
+
+        Args:
+            schema: Schema名称
+            name: 物化视图名称
+            query: 物化视图的查询
+
+        Returns:
+            bool: 是否新建
+        """
+        target = f'{schema}."{name}"'
+        with self.get_connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT 1 FROM pg_catalog.pg_matviews WHERE schemaname = %s AND matviewname = %s;",
+                    (schema, name)
+                )
+                exists = cursor.fetchone() is not None
+                if exists:
+                    cursor.execute(f"REFRESH MATERIALIZED VIEW {target};")
+                else:
+                    cursor.execute(f"CREATE MATERIALIZED VIEW {target} AS {self._strip_query(query)};")
+                cursor.close()
+                conn.commit()
+            except Exception as e:
+                logger.error(f"创建/刷新物化视图失败 {target}: {e}")
+                conn.rollback()
+                raise
+        return not exists
+
+    def check_create_privilege(self, schema: str) -> Optional[str]:
+        """
+        检查当前角色能否在Schema中建表(物化视图)
+
+        Args:
+            schema: Schema名称
+
+        Returns:
+            Optional[str]: 问题描述,可以建表时为None
+        """
+        query = """
+        SELECT has_schema_privilege(oid, 'CREATE')
+        FROM pg_catalog.pg_namespace
+        WHERE nspname = %s;
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (schema,))
+            row = cursor.fetchone()
+            cursor.close()
+        if row is None:
+            return f"Schema不存在: {schema} (需要先创建: CREATE SCHEMA {schema};)"
+        if not row[0]:
+            return f"没有在 {schema} 中建表的权限 (需要: GRANT CREATE ON SCHEMA {schema} TO <角色>;)"
+        return None
+
+    def list_indexes(self, schema: str, table_name: str) -> Dict[str, List[str]]:
+        """
+        列出表上的索引及其列(按索引中的顺序,表达式列为None)
+
+        Args:
+            schema: Schema名称
+            table_name: 表名
+
+        Returns:
+            Dict[str, List[str]]: 索引名 -> 列名列表
+        """
+        query = """
+        SELECT i.relname AS index_name, a.attname AS column_name
+        FROM pg_catalog.pg_index x
+        JOIN pg_catalog.pg_class t ON t.oid = x.indrelid
+        JOIN pg_catalog.pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_catalog.pg_class i ON i.oid = x.indexrelid
+        CROSS JOIN LATERAL unnest(x.indkey) WITH ORDINALITY AS k(attnum, position)
+        LEFT JOIN pg_catalog.pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+        WHERE n.nspname = %s
+          AND t.relname = %s
+        ORDER BY i.relname, k.position;
+        """
+
+        indexes: Dict[str, List[str]] = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (schema, table_name))
+            for index_name, column in cursor.fetchall():
+                indexes.setdefault(index_name, []).append(column)
+            cursor.close()
+        return indexes
+
+    def load_catalog(self,
+                     schemas: List[str],
+                     tables: Optional[List[Tuple[str, str]]] = None) -> CatalogCache:
+        """
+        一次查询加载Schema下所有表的列名和类型到缓存
+
+        加载后 table_exists / get_table_columns / get_column_type
+        对这些Schema和表直接从内存返回,不再查询数据库。
+
+        Args:
+            schemas: 完整加载的Schema列表
+            tables: 额外单独加载的 (schema, table) 列表
+
+        Returns:
+            CatalogCache: 目录元数据缓存
+        """
+        tables = tables or []
+        qualified_tables = [f"{schema}.{table}" for schema, table in tables]
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(CATALOG_QUERY, (list(schemas), qualified_tables))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        self.catalog.load(rows, schemas=schemas, tables=tables)
+        table_count = len({(row[0], row[1]) for row in rows})
+        logger.info(f"目录元数据加载完成: {table_count} 张表, {len(rows)} 列")
+        return self.catalog
+
+    def list_schemas(self, prefix: str = 'yxwtzb_') -> List[str]:
+        """
+        一次查询列出指定前缀的所有Schema
+
+        Args:
+            prefix: Schema名称前缀
+
+        Returns:
+            List[str]: Schema名称列表(升序)
+        """
+        query = """
+        SELECT nspname
+        FROM pg_catalog.pg_namespace
+        WHERE nspname LIKE %s
+        ORDER BY nspname;
+        """
+        pattern = prefix.replace('\\', '\\\\').replace('_', '\\_').replace('%', '\\%') + '%'
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (pattern,))
+            schemas = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+        return schemas
+
     def table_exists(self, schema: str, table_name: str) -> bool:
         """
         检查表是否存在
@@ -82,6 +1089,9 @@ class DatabaseConnector:
         Returns:
             bool: 表是否存在
         """
+        if self.catalog.knows(schema, table_name):
+            return self.catalog.table_exists(schema, table_name)
+
         query = """
         SELECT EXISTS (
             SELECT FROM information_schema.tables
@@ -91,10 +1101,11 @@ class DatabaseConnector:
         """
 
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, (schema, table_name))
-            exists = cursor.fetchone()[0]
-            cursor.close()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (schema, table_name))
+                exists = cursor.fetchone()[0]
+                cursor.close()
             return exists
         except Exception as e:
             logger.error(f"检查表是否存在失败: {e}")
@@ -111,6 +1122,9 @@ class DatabaseConnector:
         Returns:
             List[str]: 列名列表
         """
+        if self.catalog.knows(schema, table_name):
+            return self.catalog.get_columns(schema, table_name)
+
         query = """
         SELECT column_name
         FROM information_schema.columns
@@ -120,11 +1134,46 @@ class DatabaseConnector:
         """
 
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, (schema, table_name))
-            columns = [row[0] for row in cursor.fetchall()]
-            cursor.close()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (schema, table_name))
+                columns = [row[0] for row in cursor.fetchall()]
+                cursor.close()
             return columns
         except Exception as e:
             logger.error(f"获取表列名失败: {e}")
             return []
+
+    def get_column_type(self, schema: str, table_name: str, column: str) -> Optional[str]:
+        """
+        获取列的数据类型
+
+        Args:
+            schema: Schema名称
+            table_name: 表名
+            column: 列名
+
+        Returns:
+            Optional[str]: 数据类型,列不存在时返回None
+        """
+        if self.catalog.knows(schema, table_name):
+            return self.catalog.get_column_type(schema, table_name, column)
+
+        query = """
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_schema = %s
+        AND table_name = %s
+        AND column_name = %s;
+        """
+
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (schema, table_name, column))
+                row = cursor.fetchone()
+                cursor.close()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"获取列类型失败: {e}")
+            return None
@@ -0,0 +1,120 @@
+"""
+维表缓存模块
+"各产品对应的测试部长"一年只变化几次,本地保存一份副本,
+每次运行只查询一个轻量的变化指纹,指纹不变时直接使用本地副本
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+from loguru import logger
+
+
+# 变化指纹查询: checksum=行数+内容md5(能发现任何修改), xmin=行数+最大事务号(更轻量)
+FINGERPRINT_QUERIES = {
+    'checksum': """
+        SELECT count(*) AS row_count,
+               md5(coalesce(string_agg(t::text, '|' ORDER BY t::text), '')) AS fingerprint
+        FROM {table} t;
+    """,
+    'xmin': """
+        SELECT count(*) AS row_count,
+               coalesce(max(xmin::text::bigint), 0)::text AS fingerprint
+        FROM {table};
+    """,
+}
+
+
+class DimensionCache:
+    """维表本地缓存"""
+
+    def __init__(self, cache_dir: Path, method: str = 'checksum'):
+        """
+        初始化维表缓存
+
+        Args:
+            cache_dir: 缓存目录
+            method: 变化指纹计算方式 (checksum/xmin)
+        """
+        if method not in FINGERPRINT_QUERIES:
+            raise ValueError(f"不支持的维表指纹方式: {method}")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.method = method
+
+    def _paths(self, name: str):
+        return self.cache_dir / f"{name}.parquet", self.cache_dir / f"{name}.fingerprint.json"
+
+    def get_fingerprint(self, db, table: str) -> str:
+        """
+        查询维表当前的变化指纹
+
+        Args:
+            db: 数据库连接器
+            table: 完整表名(包含Schema)
+
+        Returns:
+            str: 指纹(行数:指纹值)
+        """
+        df = db.execute_query(FINGERPRINT_QUERIES[self.method].format(table=table))
+        return f"{int(df.loc[0, 'row_count'])}:{df.loc[0, 'fingerprint']}"
+
+    def load(self, db, table: str, name: str, columns: List[str]) -> pd.DataFrame:
+        """
+        读取维表,指纹未变化时使用本地副本,否则重新查询并更新副本
+
+        Args:
+            db: 数据库连接器
+            table: 完整表名(包含Schema)
+            name: 本地副本名称
+            columns: 需要的列
+
+        Returns:
+            pd.DataFrame: 维表数据
+        """
+        data_path, fingerprint_path = self._paths(name)
+        fingerprint = self.get_fingerprint(db, table)
+
+        cached = self._read_local(data_path, fingerprint_path, fingerprint, columns)
+        if cached is not None:
+            logger.info(f"维表未变化,使用本地副本: {name} ({len(cached)} 行)")
+            return cached
+
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        df = db.execute_query(f"SELECT {column_list} FROM {table};")
+
+        try:
+            df.to_parquet(data_path, index=False)
+            with open(fingerprint_path, 'w', encoding='utf-8') as f:
+                json.dump({'method': self.method, 'fingerprint': fingerprint,
+                           'columns': columns}, f, ensure_ascii=False)
+            logger.info(f"维表已更新本地副本: {name} ({len(df)} 行)")
+        except Exception as e:
+            logger.warning(f"保存维表副本失败: {e}")
+            fingerprint_path.unlink(missing_ok=True)
+
+        return df
+
+    def _read_local(self,
+                    data_path: Path,
+                    fingerprint_path: Path,
+                    fingerprint: str,
+                    columns: List[str]) -> Optional[pd.DataFrame]:
+        """读取指纹匹配的本地副本,不匹配或读取失败时返回None"""
+        if not data_path.exists() or not fingerprint_path.exists():
+            return None
+
+        try:
+            with open(fingerprint_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if (stored.get('method') != self.method
+                    or stored.get('fingerprint') != fingerprint
+                    or stored.get('columns') != columns):
+                return None
+            return pd.read_parquet(data_path)
+        except Exception as e:
+            logger.warning(f"读取维表副本失败,重新查询: {e}")
+            return None
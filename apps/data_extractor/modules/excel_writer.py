@@ -0,0 +1,261 @@
+"""
+分块Excel写入模块
+按块追加DataFrame或逐行追加记录到工作表,逐行写入磁盘(xlsxwriter constant_memory 模式),
+内存占用与块大小相关,与总行数无关
+"""
+
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from xlsxwriter.utility import xl_col_to_name
+
+import pandas as pd
+import xlsxwriter
+from loguru import logger
+from xlsx_engine import EXCEL_MAX_ROWS, EXCEL_MAX_COLUMNS
+
+
+# 与 DataFrame.to_excel 一致的表头和日期格式
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+# 行背景色(浅蓝色)
+HIGHLIGHT_COLOR = '#E6F2FF'
+
+# write_frame 每次转换为Python对象的行数
+FRAME_CHUNK_ROWS = 50000
+
+# 条件格式标记: 日期范围所在的工作表和名称(可在Excel中直接修改日期)
+WINDOW_SHEET_NAME = '标记范围'
+WINDOW_START_NAME = '标记开始日期'
+WINDOW_END_NAME = '标记结束日期'
+DATE_FORMAT = 'yyyy-mm-dd'
+
+# 日期列在范围内的条件(文本日期取前10个字符解析,空值和无法解析的值不标记)
+WINDOW_CRITERIA = (
+    '=AND({cell}<>"",'
+    'IFERROR(IF(ISNUMBER({cell}),INT({cell}),DATEVALUE(LEFT({cell},10))),0)>=' + WINDOW_START_NAME + ','
+    'IFERROR(IF(ISNUMBER({cell}),INT({cell}),DATEVALUE(LEFT({cell},10))),0)<=' + WINDOW_END_NAME + ')'
+)
+
+
+class ChunkedExcelWriter:
+    """
+    分块写入的Excel写入器
+
+    每个工作表按行顺序写入,写完一个工作表后可用 add_sheet 开始下一个(不能回到之前的工作表)
+    """
+
+    def __init__(self, path: Path, sheet_name: str, highlight_color: str = HIGHLIGHT_COLOR,
+                 window: Optional[Tuple[str, str, str]] = None):
+        """
+        初始化写入器
+
+        Args:
+            path: 输出文件路径
+            sheet_name: 工作表名称
+            highlight_color: 标记行的背景色
+            window: 条件格式标记 (日期列, 开始日期, 结束日期),设置后不再逐行填充背景色,
+                    改为整个数据区域一条条件格式规则(标记行仍计数)
+        """
+        self.path = Path(path)
+        self.sheet_name = sheet_name
+        self.highlight_color = highlight_color
+        self.window = window
+        self.workbook = xlsxwriter.Workbook(str(self.path), {
+            'constant_memory': True,
+            'strings_to_numbers': False,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+            # 对象列中的日期(例如 date 类型)与日期列格式一致
+            'default_date_format': DATETIME_FORMAT,
+        })
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+
+        self._header_format = self.workbook.add_format(HEADER_FORMAT)
+        # 按 (是否日期, 是否标记) 区分的单元格格式
+        self._formats = {
+            (False, False): None,
+            (True, False): self.workbook.add_format({'num_format': DATETIME_FORMAT}),
+            (False, True): self.workbook.add_format({'bg_color': highlight_color}),
+            (True, True): self.workbook.add_format({'num_format': DATETIME_FORMAT,
+                                                    'bg_color': highlight_color}),
+        }
+
+        self.columns: Optional[List[str]] = None
+        self.rows_written = 0
+        self.highlighted = 0
+        # 当前工作表已写入的数据行数
+        self._sheet_rows = 0
+        self._window_defined = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_sheet(self, sheet_name: str):
+        """
+        结束当前工作表,之后的数据写入新的工作表
+
+        Args:
+            sheet_name: 工作表名称
+        """
+        self._finish_sheet()
+        self.sheet_name = sheet_name
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+        self.columns = None
+        self._sheet_rows = 0
+
+    def _finish_sheet(self):
+        if self.columns is None:
+            self._write_header([])
+        if self.window is not None:
+            self._add_window_rule()
+
+    def _write_header(self, columns: List[str]):
+        if len(columns) > EXCEL_MAX_COLUMNS:
+            raise ValueError(f"工作表'{self.sheet_name}'列数过多: {len(columns)} 列, "
+                             f"Excel最多 {EXCEL_MAX_COLUMNS} 列")
+        self.columns = columns
+        for col_idx, column in enumerate(columns):
+            self.worksheet.write_string(0, col_idx, str(column), self._header_format)
+
+    def _check_rows(self, count: int):
+        """追加 count 行后超出Excel行数上限时报错(xlsxwriter会静默丢弃超出的行)"""
+        total = self._sheet_rows + count + 1
+        if total > EXCEL_MAX_ROWS:
+            raise ValueError(f"工作表'{self.sheet_name}'行数过多: {total} 行(含表头), "
+                             f"Excel最多 {EXCEL_MAX_ROWS} 行,请缩小日期范围或改用列式输出")
+
+    @staticmethod
+    def _is_null(value) -> bool:
+        return value is None or value is pd.NaT or (isinstance(value, float) and value != value)
+
+    @staticmethod
+    def _column_values(series: pd.Series) -> list:
+        """列数据转换为Python对象,空值转换为None"""
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_localize(None)
+        return series.astype(object).where(series.notna(), None).tolist()
+
+    def write_chunk(self, df: pd.DataFrame, highlight: Optional[pd.Series] = None):
+        """
+        追加一块数据
+
+        Args:
+            df: 数据块(列与第一块一致)
+            highlight: 需要添加背景色的行(布尔掩码,可选)
+        """
+        if self.columns is None:
+            self._write_header([str(column) for column in df.columns])
+        if df.empty:
+            return
+        self._check_rows(len(df))
+
+        is_datetime = [pd.api.types.is_datetime64_any_dtype(dtype) for dtype in df.dtypes]
+        values = [self._column_values(df[column]) for column in df.columns]
+        marks = (highlight.fillna(False).astype(bool).tolist()
+                 if highlight is not None else [False] * len(df))
+        fill = self.window is None
+
+        row = self._sheet_rows + 1
+        for marked, record in zip(marks, zip(*values)):
+            for col_idx, value in enumerate(record):
+                cell_format = self._formats[(is_datetime[col_idx], marked and fill)]
+                if value is None:
+                    if cell_format is not None:
+                        self.worksheet.write_blank(row, col_idx, None, cell_format)
+                else:
+                    self.worksheet.write(row, col_idx, value, cell_format)
+            row += 1
+
+        self._sheet_rows += len(df)
+        self.rows_written += len(df)
+        self.highlighted += sum(marks)
+
+    def write_rows(self, rows: Iterable[Sequence], columns: Optional[List[str]] = None) -> int:
+        """
+        逐行追加记录(例如数据库游标的结果),不需要先构造DataFrame
+
+        Args:
+            rows: 记录迭代器,每条记录的值与列一一对应
+            columns: 列名(当前工作表还没有表头时必须提供)
+
+        Returns:
+            int: 写入的行数
+        """
+        if self.columns is None:
+            if columns is None:
+                raise ValueError("写入记录前需要提供列名")
+            self._write_header([str(column) for column in columns])
+
+        count = 0
+        try:
+            for record in rows:
+                self._check_rows(1)
+                row = self._sheet_rows + 1
+                for col_idx, value in enumerate(record):
+                    if not self._is_null(value):
+                        self.worksheet.write(row, col_idx, value)
+                self._sheet_rows += 1
+                count += 1
+        finally:
+            self.rows_written += count
+        return count
+
+    def write_frame(self, df: pd.DataFrame, highlight: Optional[pd.Series] = None,
+                    chunk_rows: int = FRAME_CHUNK_ROWS):
+        """
+        写入整个DataFrame(按块转换,避免一次性复制全部数据)
+
+        Args:
+            df: 数据
+            highlight: 需要添加背景色的行(与df等长的布尔掩码,可选)
+            chunk_rows: 每块行数
+        """
+        if df.empty:
+            self.write_chunk(df)
+            return
+        for start in range(0, len(df), chunk_rows):
+            stop = start + chunk_rows
+            self.write_chunk(df.iloc[start:stop],
+                             highlight.iloc[start:stop] if highlight is not None else None)
+
+    def _add_window_rule(self):
+        """为整个数据区域添加一条条件格式规则,日期范围写入单独工作表的两个单元格"""
+        column, start, end = self.window
+        if column not in self.columns:
+            logger.warning(f"未找到'{column}'列,跳过条件格式标记")
+            return
+
+        if not self._window_defined:
+            window_sheet = self.workbook.add_worksheet(WINDOW_SHEET_NAME)
+            date_format = self.workbook.add_format({'num_format': DATE_FORMAT})
+            window_sheet.write_string(0, 0, WINDOW_START_NAME, self._header_format)
+            window_sheet.write_string(0, 1, WINDOW_END_NAME, self._header_format)
+            window_sheet.write_datetime(1, 0, pd.Timestamp(start).to_pydatetime(), date_format)
+            window_sheet.write_datetime(1, 1, pd.Timestamp(end).to_pydatetime(), date_format)
+            window_sheet.set_column(0, 1, 14)
+            self.workbook.define_name(WINDOW_START_NAME, f"='{WINDOW_SHEET_NAME}'!$A$2")
+            self.workbook.define_name(WINDOW_END_NAME, f"='{WINDOW_SHEET_NAME}'!$B$2")
+            self._window_defined = True
+
+        if self._sheet_rows == 0:
+            return
+        cell = f"${xl_col_to_name(self.columns.index(column))}2"
+        self.worksheet.conditional_format(1, 0, self._sheet_rows, len(self.columns) - 1, {
+            'type': 'formula',
+            'criteria': WINDOW_CRITERIA.format(cell=cell),
+            'format': self.workbook.add_format({'bg_color': self.highlight_color}),
+        })
+
+    def close(self):
+        """写入剩余数据并关闭文件"""
+        if self.workbook is None:
+            return
+        self._finish_sheet()
+        self.workbook.close()
+        self.workbook = None
+        logger.debug(f"写入完成: {self.path} ({self.rows_written} 行)")
@@ -3,33 +3,126 @@
 负责从数据库抽取数据并生成Excel文件
 """
 
+import time
+import threading
 import pandas as pd
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
 
+from .backends import create_connector
 from .db_connector import DatabaseConnector
 from .date_utils import DateUtils
+from .incremental import IncrementalStore
+from .dimension_cache import DimensionCache
+from .query_cache import resolve_cache_dir
+from .excel_writer import ChunkedExcelWriter
+from xlsx_engine import ParallelXlsxWriter, BLOCK_ROWS
+from .side_outputs import SideOutputWriter, normalize_formats
+from .pipeline import ExportPipeline
+from .partitioning import RangePartitioner
+from .run_manifest import RunManifest
+from .planner import ExtractPlanner, MODE_STREAM
+from .aggregates import WeeklyAggregate, DEFAULT_AGGREGATE_SCHEMA, SOURCE_TABLE as AGGREGATE_SOURCE_TABLE
+
+
+# 任务3固定输出的"原因分析及解决方案"文本
+NEW_ISSUE_REASON_TEXT = '问题原因：xxx 解决方案：xxx (自行修改)'
+
+# 任务3/任务4筛选条件
+EXCLUDED_APPROVAL_STATUS = '终止'
+EXCLUDED_APPROVAL_RESULT = '审批未通过'
+EXCLUDED_HANDLING_TYPES = ('非研发处理', '硬件故障处理')
+EXCLUDED_NON_RD_CATEGORY = '需求'
+
+# 产品与测试负责人对应关系维表
+DIMENSION_SCHEMA = 'public'
+DIMENSION_TABLE_NAME = '各产品对应的测试部长'
+DIMENSION_TABLE = f'{DIMENSION_SCHEMA}."{DIMENSION_TABLE_NAME}"'
+DIMENSION_COLUMNS = ['具体的产品', '部门负责人']
+
+# 任务1/任务2抽取的整表
+TASK_TABLES = {
+    'task1': '导出原始数据',
+    'task2': '计算解决率过程数据',
+}
+
+# 列投影预设: processor-minimal 为 apps/data_processor 实际读取的列
+# (数据质量检查的关键列、计算AE/AO列和透视表使用的列,以及排序和背景色标记使用的创建时间)
+COLUMN_PRESETS = {
+    'processor-minimal': [
+        '数据id', '创建时间', '处理方式', '期望解决时间', '计划完成时间',
+        '研发解决时间', '审批状态', '审批结果', '更新时间', '所涉产品',
+        '非研发处理问题类别', '是否剔除', '研发交付日期偏差', '用于交付日期偏差统计',
+    ],
+}
+
+# 运行清单文件名(位于输出目录)
+MANIFEST_FILENAME = 'run_manifest.json'
+
+# 多窗口模式下标记所属周的列(拆分输出后删除)
+WINDOW_COLUMN = '统计窗口'
+
+# 任务4从"计算解决率过程数据"读取的列
+RDPM_SOURCE_COLUMNS = ['创建时间', '审批编号', '所涉产品', '软件版本号', '所属客户项目', '问题描述']
+
+# 各任务依赖的表和列(用于预检), 表名不含Schema的均位于 yxwtzb_<日期>
+TASK_DEPENDENCIES = {
+    'task1': {
+        '导出原始数据': ['创建时间'],
+    },
+    'task2': {
+        '计算解决率过程数据': ['创建时间'],
+    },
+    'task3': {
+        '计算解决率过程数据': [
+            '序号', '所属客户项目', '项目类型', '所涉产品', '软件版本号', '紧急程度',
+            '问题描述', '处理方式', '期望解决时间', '计划完成时间', '当前负责人',
+            '研发负责人', '用于交付日期偏差统计', '创建时间', '审批状态', '审批结果'
+        ],
+    },
+    'task4': {
+        '计算解决率过程数据': [
+            '创建时间', '审批编号', '所涉产品', '软件版本号', '所属客户项目',
+            '问题描述', '审批状态', '审批结果', '非研发处理问题类别'
+        ],
+        (DIMENSION_SCHEMA, DIMENSION_TABLE_NAME): DIMENSION_COLUMNS,
+    },
+    'task5': {
+        '计算解决率过程数据': [
+            '数据id', '所涉产品', '创建时间', '处理方式', '计划完成时间', '期望解决时间',
+            '研发解决时间', '审批状态', '更新时间', '审批结果', '非研发处理问题类别', '是否剔除'
+        ],
+    },
+}
+
+# 默认不执行的任务(任务5会在数据库中创建汇总,需显式启用)
+OPT_IN_TASKS = ('task5',)
+
+# 需要在汇总Schema(aggregate.schema)中建表的任务
+WRITING_TASKS = ('task5',)
 
 
 class DataExtractor:
     """数据抽取器"""
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, db: Optional[DatabaseConnector] = None):
         """
         初始化数据抽取器
 
         Args:
             config: 配置字典
+            db: 外部共享的数据库连接器(可选),传入时由调用方负责连接和断开
         """
         self.config = config
         self.db_config = config['database']
         self.output_dir = Path(config['output']['directory'])
         self.schema_date = self._get_schema_date()
         self.start_date, self.end_date = self._get_date_range()
+        self.windows = self._get_windows()
 
         # 创建输出目录
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -37,8 +130,56 @@ class DataExtractor:
         # 生成文件名前缀
         self.date_prefix = self._get_date_prefix()
 
+        # 任务并行度,以及单表抽取的分区数(每个分区占用一个连接)
+        self.parallelism = max(1, int(config['tasks'].get('parallelism') or 1))
+        self.partition_count = max(1, int((config['tasks'].get('partitions') or {}).get('count') or 1))
+
         # 初始化数据库连接
-        self.db = DatabaseConnector(config)
+        self._owns_db = db is None
+        if self._owns_db and (self.parallelism > 1 or self.partition_count > 1):
+            self._ensure_pool_for_parallelism()
+        self.db = db if db is not None else create_connector(config)
+
+        # 共享扫描缓存(本次运行内有效)
+        self._shared_lock = threading.Lock()
+        self._shared_table_locks = {}
+        self._shared_tables = {}
+        self._dimension_table = None
+
+        # 任务1/任务2的列投影(首次使用时根据目录校验)
+        self._projections = {}
+
+        # 抽取规划: 按估算大小和内存预算选择内存抽取或流式抽取
+        planner_config = config.get('planner') or {}
+        self.planner = None
+        if planner_config.get('enabled', False) and self.db.backend != 'postgres':
+            logger.info(f"{self.db.backend} 后端没有表统计信息,不使用抽取规划")
+        elif planner_config.get('enabled', False):
+            self.planner = ExtractPlanner(
+                self.db,
+                memory_budget_mb=planner_config.get('memory_budget_mb', 1024),
+                cell_overhead_bytes=planner_config.get('cell_overhead_bytes', 150)
+            )
+        self._plans = {}
+        self._plan_lock = threading.Lock()
+
+        # 运行清单: 记录已完成任务,--resume 时跳过参数未变化的任务
+        self.manifest = RunManifest(self.output_dir / MANIFEST_FILENAME)
+        self._task_outputs = {}
+
+    def _ensure_pool_for_parallelism(self):
+        """并行模式下启用连接池,并保证连接数足够(每个任务一个连接,分区抽取时每个分区再占用一个)"""
+        pool_config = self.db_config.setdefault('pool', {}) or {}
+        self.db_config['pool'] = pool_config
+        required = self.parallelism * (1 + self.partition_count if self.partition_count > 1 else 1)
+
+        if not pool_config.get('enabled', False):
+            logger.info(f"并行度为 {self.parallelism},分区数为 {self.partition_count},自动启用连接池")
+            pool_config['enabled'] = True
+
+        if pool_config.get('max_connections', 4) < required:
+            pool_config['max_connections'] = required
+            logger.info(f"连接池最大连接数调整为: {required}")
 
     def _get_date_prefix(self) -> str:
         """
@@ -67,6 +208,13 @@ class DataExtractor:
         """
         base_filename = self.config['output']['files'][filename_key]
         filename = self.date_prefix + base_filename
+
+        # 按Schema分区的输出布局: <输出目录>/<任务>/schema_date=<日期>/<文件名>
+        if self.config['output'].get('partition_by_schema', False):
+            partition_dir = self.output_dir / filename_key / f"schema_date={self.schema_date}"
+            partition_dir.mkdir(parents=True, exist_ok=True)
+            return partition_dir / filename
+
         return self.output_dir / filename
 
     def _get_schema_date(self) -> str:
@@ -106,6 +254,182 @@ class DataExtractor:
         # 自动计算上周日期范围
         return DateUtils.get_last_week_range()
 
+    def _get_windows(self) -> List[Tuple[str, str]]:
+        """
+        获取多窗口模式的各周日期范围
+
+        Returns:
+            List[Tuple[str, str]]: 各周的 (起始日期, 结束日期),最近的一周在前;
+                                   未启用多窗口模式时返回空列表
+        """
+        weeks = int(self.config['date_range'].get('weeks') or 1)
+        if weeks <= 1:
+            return []
+
+        windows = DateUtils.get_week_windows(self.start_date, self.end_date, weeks)
+        logger.info(f"多窗口模式: 最近 {weeks} 周, {windows[-1][0]} 至 {windows[0][1]}")
+        return windows
+
+    def _get_query_range(self) -> Tuple[str, str]:
+        """任务3/任务4的查询日期范围(多窗口模式下覆盖所有窗口)"""
+        if self.windows:
+            return self.windows[-1][0], self.windows[0][1]
+        return self.start_date, self.end_date
+
+    @staticmethod
+    def _window_label(window: Tuple[str, str]) -> str:
+        """窗口名称(用作工作表名或文件名后缀)"""
+        return f"{window[0]}~{window[1]}"
+
+    def _window_select_sql(self, column: str = '"创建时间"') -> Tuple[str, tuple]:
+        """
+        生成在数据库端按周分桶的查询列
+
+        Args:
+            column: 创建时间列的SQL表达式
+
+        Returns:
+            Tuple[str, tuple]: (追加到SELECT列表的SQL, 参数);未启用多窗口模式时为空
+        """
+        if not self.windows:
+            return '', ()
+
+        cases = []
+        params = []
+        for window in self.windows:
+            cases.append(f"WHEN {column} >= %s AND {column} <= %s THEN %s")
+            params.extend([f"{window[0]} 00:00:01", f"{window[1]} 23:59:59",
+                           self._window_label(window)])
+
+        return f',\n                    CASE {" ".join(cases)} END AS "{WINDOW_COLUMN}"', tuple(params)
+
+    def _assign_windows(self, created: pd.Series) -> pd.Series:
+        """
+        在内存中按周分桶(与 _window_select_sql 一致)
+
+        Args:
+            created: 创建时间列
+
+        Returns:
+            pd.Series: 每行所属窗口名称,不属于任何窗口时为NaN
+        """
+        created = pd.to_datetime(created, errors='coerce')
+        labels = pd.Series(pd.NA, index=created.index, dtype=object)
+        for window in self.windows:
+            in_window = ((created >= pd.Timestamp(f"{window[0]} 00:00:01"))
+                         & (created <= pd.Timestamp(f"{window[1]} 23:59:59")))
+            labels[in_window] = self._window_label(window)
+        return labels
+
+    @staticmethod
+    def _renumber(df: pd.DataFrame) -> pd.DataFrame:
+        """重新编号序号列(从1开始)"""
+        if len(df) > 0 and '序号' in df.columns:
+            df['序号'] = range(1, len(df) + 1)
+        return df
+
+    def _write_task_output(self,
+                           df: pd.DataFrame,
+                           output_file: Path,
+                           sheet_name: str,
+                           renumber: bool = False,
+                           task_key: Optional[str] = None) -> List[Path]:
+        """
+        写入任务3/任务4的结果
+
+        多窗口模式下按"统计窗口"拆分: window_output 为 sheets 时每周一个工作表,
+        为 files 时每周一个文件,各窗口内的序号分别重新编号。
+        列式输出不拆分,多窗口模式下保留"统计窗口"列。
+
+        Args:
+            df: 查询结果
+            output_file: 输出文件路径
+            sheet_name: 工作表名称(单窗口模式)
+            renumber: 是否重新编号序号列
+            task_key: 任务键名(决定输出格式,可选)
+
+        Returns:
+            List[Path]: 写入的文件列表
+        """
+        formats = self._task_formats(task_key)
+        if not self.windows:
+            if renumber and len(df) > 0 and '序号' in df.columns:
+                self._renumber(df)
+                logger.info(f"序号已重新编号: 1 到 {len(df)}")
+            written = []
+            if 'xlsx' in formats:
+                self._write_sheets(output_file, [(sheet_name, df, None)])
+                written.append(output_file)
+            return written + SideOutputWriter(output_file, formats).write_frame(df)
+
+        side_files = SideOutputWriter(output_file, formats).write_frame(df)
+        if 'xlsx' not in formats:
+            return side_files
+
+        parts = []
+        for window in self.windows:
+            label = self._window_label(window)
+            part = df[df[WINDOW_COLUMN] == label].drop(columns=[WINDOW_COLUMN])
+            part = part.reset_index(drop=True)
+            if renumber:
+                self._renumber(part)
+            parts.append((label, part))
+            logger.info(f"窗口 {label}: {len(part)} 行")
+
+        if self.config['date_range'].get('window_output', 'sheets') == 'files':
+            written = []
+            for label, part in parts:
+                window_file = output_file.with_name(f"{output_file.stem}_{label}{output_file.suffix}")
+                self._write_sheets(window_file, [(sheet_name, part, None)])
+                written.append(window_file)
+            return written + side_files
+
+        self._write_sheets(output_file, [(label, part, None) for label, part in parts])
+        return [output_file] + side_files
+
+    def _task_formats(self, task_key: Optional[str]) -> List[str]:
+        """
+        任务的输出格式(output.formats,未配置时只输出xlsx)
+
+        Args:
+            task_key: 任务键名
+
+        Returns:
+            List[str]: 输出格式
+        """
+        return normalize_formats((self.config['output'].get('formats') or {}).get(task_key))
+
+    def _write_sheets(self,
+                      output_file: Path,
+                      sheets: List[Tuple[str, pd.DataFrame, Optional[pd.Series]]],
+                      window: Optional[Tuple[str, str, str]] = None) -> int:
+        """
+        写入Excel(不在内存中构造整个工作簿)
+
+        启用 output.parallel_xlsx 时由工作进程并行生成工作表XML,
+        否则流式逐行写入磁盘;条件格式标记只有流式写入支持
+
+        Args:
+            output_file: 输出文件路径
+            sheets: (工作表名称, 数据, 需要添加背景色的行) 列表
+            window: 条件格式标记 (日期列, 开始日期, 结束日期),可选
+
+        Returns:
+            int: 标记行数
+        """
+        parallel_config = self.config['output'].get('parallel_xlsx') or {}
+        if parallel_config.get('enabled', False) and window is None:
+            writer = ParallelXlsxWriter(parallel_config.get('workers'),
+                                        parallel_config.get('block_rows', BLOCK_ROWS))
+            return writer.write(output_file, sheets)['highlighted']
+
+        with ChunkedExcelWriter(output_file, sheets[0][0], window=window) as writer:
+            for index, (sheet_name, df, highlight) in enumerate(sheets):
+                if index > 0:
+                    writer.add_sheet(sheet_name)
+                writer.write_frame(df, highlight)
+        return writer.highlighted
+
     def get_full_table_name(self, table_name: str) -> str:
         """
         获取完整的表名(包含Schema)
@@ -118,6 +442,429 @@ class DataExtractor:
         """
         return f"yxwtzb_{self.schema_date}.\"{table_name}\""
 
+    def get_projection(self, task_key: str) -> Optional[List[str]]:
+        """
+        获取任务1/任务2的列投影,并根据目录中的列校验
+
+        配置 tasks.columns.<任务>:
+        - include: 只抽取这些列
+        - exclude: 抽取除这些列以外的所有列
+        - preset: 使用预设的列(processor-minimal),表中没有的列跳过
+        输出的列保持表中的列顺序。
+
+        Args:
+            task_key: 任务键名
+
+        Returns:
+            Optional[List[str]]: 抽取的列,未配置时返回None(SELECT *)
+
+        Raises:
+            ValueError: 配置无效或列不存在
+        """
+        if task_key in self._projections:
+            return self._projections[task_key]
+
+        projection_config = (self.config['tasks'].get('columns') or {}).get(task_key)
+        if not projection_config:
+            self._projections[task_key] = None
+            return None
+
+        table = TASK_TABLES[task_key]
+        existing = self.db.get_table_columns(f"yxwtzb_{self.schema_date}", table)
+        if not existing:
+            raise ValueError(f"无法获取表的列信息: {table}")
+
+        if 'preset' in projection_config:
+            preset = projection_config['preset']
+            if preset not in COLUMN_PRESETS:
+                raise ValueError(f"未知的列投影预设: {preset}")
+            wanted = set(COLUMN_PRESETS[preset])
+            skipped = [column for column in COLUMN_PRESETS[preset] if column not in existing]
+            if skipped:
+                logger.info(f"{task_key} 列投影预设 {preset}: 表中没有的列已跳过 {skipped}")
+            columns = [column for column in existing if column in wanted]
+        elif 'include' in projection_config:
+            missing = [column for column in projection_config['include'] if column not in existing]
+            if missing:
+                raise ValueError(f"{table} 不存在列投影中的列: {missing}")
+            wanted = set(projection_config['include'])
+            columns = [column for column in existing if column in wanted]
+        elif 'exclude' in projection_config:
+            missing = [column for column in projection_config['exclude'] if column not in existing]
+            if missing:
+                raise ValueError(f"{table} 不存在列投影中排除的列: {missing}")
+            excluded = set(projection_config['exclude'])
+            columns = [column for column in existing if column not in excluded]
+        else:
+            raise ValueError(f"{task_key} 列投影需要配置 include、exclude 或 preset")
+
+        if not columns:
+            raise ValueError(f"{task_key} 列投影后没有可抽取的列")
+
+        logger.info(f"{task_key} 列投影: 抽取 {len(columns)}/{len(existing)} 列")
+        self._projections[task_key] = columns
+        return columns
+
+    @staticmethod
+    def _select_list(columns: Optional[List[str]]) -> str:
+        """生成SELECT列表,未指定列时为 *"""
+        if not columns:
+            return '*'
+        return ', '.join(f'"{column}"' for column in columns)
+
+    def _fetch_full_table(self, table: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        抽取整张表的数据(按创建时间降序)
+
+        根据 tasks.engine (或 tasks.engines 中的任务设置) 选择抽取方式:
+        - pandas: 通过 pd.read_sql_query 逐行构造DataFrame
+        - copy: 通过 COPY (query) TO STDOUT 批量导出并按列类型解析
+        - arrow: 通过 COPY 导出并按列类型直接构造Arrow列(时间为datetime64,低基数文本为category)
+
+        Args:
+            table: 表名(不含Schema)
+            columns: 抽取的列(可选,默认所有列)
+
+        Returns:
+            pd.DataFrame: 表数据
+        """
+        if self._use_incremental(table):
+            # 增量快照保存完整的行,合并后再投影
+            df = self._fetch_incremental(table)
+            return df[columns] if columns else df
+
+        if self.partition_count > 1:
+            return self._fetch_partitioned(table, columns)
+
+        query = f"""
+        SELECT {self._select_list(columns)}
+        FROM {self.get_full_table_name(table)}
+        ORDER BY "创建时间" DESC;
+        """
+        return self._run_extract_query(query, task_key=self._table_task(table))
+
+    def _fetch_partitioned(self, table: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        按创建时间范围分区并行抽取整张表
+
+        每个分区在独立的连接上执行,结果按 NULL分区、从新到旧的顺序拼接,
+        与 ORDER BY "创建时间" DESC (NULL在前) 的结果一致。
+
+        Args:
+            table: 表名(不含Schema)
+            columns: 抽取的列(可选,默认所有列)
+
+        Returns:
+            pd.DataFrame: 表数据(按创建时间降序)
+        """
+        partition_config = self.config['tasks'].get('partitions') or {}
+        partitioner = RangePartitioner(self.db, self.partition_count,
+                                       partition_config.get('method', 'histogram'))
+        bounds = partitioner.get_bounds(f"yxwtzb_{self.schema_date}", table, '创建时间')
+        partitions = RangePartitioner.build_partitions(bounds)
+        logger.info(f"分区抽取: {table} 拆分为 {len(partitions)} 个分区(含NULL分区)")
+
+        full_table = self.get_full_table_name(table)
+        select_list = self._select_list(columns)
+        task_key = self._table_task(table)
+        label = self.db.stats.current_label
+
+        def fetch(partition) -> pd.DataFrame:
+            where_sql, params = partition.where_sql('"创建时间"')
+            query = f"""
+            SELECT {select_list}
+            FROM {full_table}
+            WHERE {where_sql}
+            ORDER BY "创建时间" DESC;
+            """
+            with self.db.acquire(), self.db.stats.label(label):
+                return self._run_extract_query(query, params or None, task_key=task_key)
+
+        if not self.db.pooled:
+            logger.warning("数据库连接器未启用连接池,分区按顺序抽取")
+            pieces = [fetch(partition) for partition in partitions]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.partition_count, len(partitions)),
+                                    thread_name_prefix='partition') as executor:
+                pieces = list(executor.map(fetch, partitions))
+
+        for partition, piece in zip(partitions, pieces):
+            logger.debug(f"{partition}: {len(piece)} 行")
+
+        non_empty = [piece for piece in pieces if len(piece) > 0]
+        return pd.concat(non_empty or pieces[:1], ignore_index=True)
+
+    @staticmethod
+    def _table_task(table: str) -> Optional[str]:
+        """整表抽取的表对应的任务(任务1/任务2)"""
+        return next((key for key, name in TASK_TABLES.items() if name == table), None)
+
+    def _engine_for(self, task_key: Optional[str]) -> str:
+        """
+        获取任务的抽取方式
+
+        tasks.engines 中设置的任务优先;未设置时,整表抽取(任务1/任务2)使用 tasks.engine,
+        其余查询使用 pandas。
+
+        Args:
+            task_key: 任务键
+
+        Returns:
+            str: pandas/copy/arrow
+        """
+        engines = self.config['tasks'].get('engines') or {}
+        engine = engines.get(task_key)
+        if engine is None:
+            engine = self.config['tasks'].get('engine', 'pandas') if task_key in TASK_TABLES else 'pandas'
+        if engine not in ('pandas', 'copy', 'arrow'):
+            raise ValueError(f"不支持的抽取方式: {engine}")
+        return engine
+
+    def _run_extract_query(self, query: str, params: Optional[tuple] = None,
+                           task_key: Optional[str] = None) -> pd.DataFrame:
+        """
+        按任务的抽取方式执行查询
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            task_key: 任务键(决定抽取方式,见 _engine_for)
+
+        Returns:
+            pd.DataFrame: 查询结果
+        """
+        engine = self._engine_for(task_key)
+        if engine == 'copy':
+            return self.db.copy_query(query, params=params)
+        if engine == 'arrow':
+            arrow_config = self.config['tasks'].get('arrow') or {}
+            return self.db.execute_query_arrow(query, params=params,
+                                               categorical=arrow_config.get('categorical'))
+        return self.db.execute_query(query, params=params)
+
+    def _use_pipeline(self, table: str) -> bool:
+        """
+        是否对该表使用读取/写入流水线
+
+        流水线通过服务端游标按块读取,增量抽取和 copy/arrow 引擎需要完整结果,不使用流水线。
+        未启用流水线时,由抽取规划根据估算大小决定。
+        """
+        pipeline_config = self.config['tasks'].get('pipeline') or {}
+        if self._engine_for(self._table_task(table)) != 'pandas' or self._use_incremental(table):
+            return False
+        if pipeline_config.get('enabled', False):
+            return True
+        return self._plan_table(table) == MODE_STREAM
+
+    def _plan_table(self, table: str) -> Optional[str]:
+        """
+        获取整表抽取的规划结果(每次运行每张表只规划一次)
+
+        Args:
+            table: 表名(不含Schema)
+
+        Returns:
+            Optional[str]: memory/stream,未启用抽取规划时返回None
+        """
+        if self.planner is None:
+            return None
+
+        with self._plan_lock:
+            if table not in self._plans:
+                task_key = self._table_task(table)
+                columns = self.get_projection(task_key) if task_key else None
+                try:
+                    plan = self.planner.plan_table(f"yxwtzb_{self.schema_date}", table, columns)
+                except Exception as e:
+                    logger.warning(f"抽取规划失败,使用内存抽取: {e}")
+                    plan = {'target': table, 'mode': 'memory', 'reason': str(e)}
+                self.db.stats.record_plan(plan)
+
+                if plan['mode'] == MODE_STREAM and (
+                        self._engine_for(task_key) != 'pandas' or self._use_incremental(table)):
+                    logger.warning(f"{table} 估算超出内存预算,但增量抽取/copy/arrow引擎只能在内存中抽取")
+                self._plans[table] = plan['mode']
+            return self._plans[table]
+
+    def _plan_query(self, name: str, query: str, params: Optional[tuple], column_count: int):
+        """
+        估算带筛选条件的查询结果大小并记录(任务3/任务4的结果按周筛选,始终在内存中处理)
+
+        Args:
+            name: 查询名称
+            query: SQL查询语句
+            params: 查询参数
+            column_count: 结果列数
+        """
+        if self.planner is None:
+            return
+        plan = self.planner.plan_query(name, query, params, column_count)
+        self.db.stats.record_plan(plan)
+        if plan['mode'] == MODE_STREAM:
+            logger.warning(f"{name} 估算结果超出内存预算 ({plan.get('estimated_mb')} MB),请缩小日期范围")
+
+    def _export_pipelined(self,
+                          table: str,
+                          output_file: Path,
+                          sheet_name: str,
+                          highlight: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+                          columns: Optional[List[str]] = None,
+                          task_key: Optional[str] = None) -> Dict:
+        """
+        通过流水线把整张表写入Excel: 当前线程按块读取,写入线程同时写入上一块
+
+        配置了列式输出时,每块同时追加到 Parquet/Arrow/CSV 文件
+
+        Args:
+            table: 表名(不含Schema)
+            output_file: 输出文件路径
+            sheet_name: 工作表名称
+            highlight: 根据数据块计算需要添加背景色的行(可选)
+            columns: 抽取的列(可选,默认所有列)
+            task_key: 任务键名(决定输出格式,可选)
+
+        Returns:
+            Dict: 流水线统计(另含列数、标记行数和输出文件)
+        """
+        pipeline_config = self.config['tasks'].get('pipeline') or {}
+        query = f"""
+        SELECT {self._select_list(columns)}
+        FROM {self.get_full_table_name(table)}
+        ORDER BY "创建时间" DESC;
+        """
+        chunks = self.db.execute_query_iter(query, itersize=pipeline_config.get('chunk_rows'))
+
+        formats = self._task_formats(task_key)
+        with ExitStack() as stack:
+            writer = None
+            if 'xlsx' in formats:
+                window = self._highlight_window() if highlight else None
+                writer = stack.enter_context(ChunkedExcelWriter(output_file, sheet_name, window=window))
+            # 列式文件的表结构按查询结果的列类型确定,不依赖第一块的取值
+            schema = None
+            if any(output_format != 'xlsx' for output_format in formats):
+                schema = self.db.arrow_schema(self.db.describe_query(query))
+            side_writer = stack.enter_context(SideOutputWriter(output_file, formats, schema))
+
+            def write(chunk: pd.DataFrame):
+                if writer is not None:
+                    writer.write_chunk(chunk, highlight(chunk) if highlight else None)
+                side_writer.write_chunk(chunk)
+
+            metrics = ExportPipeline(pipeline_config.get('queue_size', 4)).run(chunks, write)
+
+        if writer is not None:
+            metrics['columns'] = len(writer.columns or [])
+            metrics['highlighted'] = writer.highlighted
+            metrics['files'] = [output_file] + side_writer.written
+        else:
+            metrics['columns'] = len(side_writer.schema or [])
+            metrics['highlighted'] = 0
+            metrics['files'] = list(side_writer.written)
+        self.db.stats.record_pipeline(metrics)
+        return metrics
+
+    def _last_week_mask(self, df: pd.DataFrame) -> Optional[pd.Series]:
+        """
+        计算创建日期在配置日期范围内的行(按日期比较,与背景色标记一致)
+
+        Args:
+            df: 数据框
+
+        Returns:
+            Optional[pd.Series]: 布尔掩码,没有"创建时间"列时返回None
+        """
+        if '创建时间' not in df.columns:
+            return None
+        created = df['创建时间']
+        if not pd.api.types.is_datetime64_any_dtype(created.dtype):
+            # 文本时间: 'YYYY-MM-DD HH:MM:SS' 和 'YYYY-MM-DD' 均按ISO8601解析
+            created = pd.to_datetime(created, errors='coerce', format='ISO8601')
+        if isinstance(created.dtype, pd.DatetimeTZDtype):
+            created = created.dt.tz_localize(None)
+        created_date = created.dt.normalize()
+        return ((created_date >= pd.Timestamp(self.start_date))
+                & (created_date <= pd.Timestamp(self.end_date)))
+
+    def _use_incremental(self, table: str) -> bool:
+        """是否对该表使用增量抽取"""
+        incremental_config = self.config.get('incremental') or {}
+        if not incremental_config.get('enabled', False):
+            return False
+        return table in incremental_config.get('tables', ['导出原始数据', '计算解决率过程数据'])
+
+    def _fetch_incremental(self, table: str) -> pd.DataFrame:
+        """
+        增量抽取整张表
+
+        1. 拉取更新时间不早于水位线的行
+        2. 拉取当前所有数据id,找出已删除的行和水位线未覆盖的新行
+        3. 合并到本地快照,保存新的快照和水位线
+
+        没有可用快照,或快照来自更新的Schema时,执行全量抽取。
+
+        Args:
+            table: 表名(不含Schema)
+
+        Returns:
+            pd.DataFrame: 合并后的完整数据(按创建时间降序)
+        """
+        incremental_config = self.config['incremental']
+        store = IncrementalStore(resolve_cache_dir(self.config,
+                                                   incremental_config.get('state_dir', '.incremental')))
+        full_table = self.get_full_table_name(table)
+        snapshot, watermark = store.load(table)
+
+        if snapshot is not None and watermark['schema_date'] > self.schema_date:
+            logger.warning(
+                f"增量快照来自更新的Schema({watermark['schema_date']}),"
+                f"本次全量抽取且不更新快照"
+            )
+            return self._run_extract_query(f'SELECT * FROM {full_table} ORDER BY "创建时间" DESC;',
+                                           task_key=self._table_task(table))
+
+        if snapshot is None or not watermark.get('max_updated'):
+            logger.info(f"增量抽取: {table} 没有可用快照,执行全量抽取")
+            df = self._run_extract_query(f'SELECT * FROM {full_table} ORDER BY "创建时间" DESC;',
+                                         task_key=self._table_task(table))
+            store.save(table, df, IncrementalStore.build_watermark(df, self.schema_date))
+            return df
+
+        logger.info(f"增量抽取: {table} 水位线 {watermark['max_updated']} "
+                    f"(快照 {watermark['row_count']} 行, Schema {watermark['schema_date']})")
+
+        # 1. 更新时间不早于水位线的行(等于水位线的行可能在上次抽取后又被更新)
+        changed = self._run_extract_query(
+            f'SELECT * FROM {full_table} WHERE "更新时间" >= %s;',
+            (watermark['max_updated'],),
+            task_key=self._table_task(table)
+        )
+
+        # 2. 当前所有数据id
+        current_ids = set(
+            self.db.execute_query(f'SELECT "数据id" FROM {full_table};')['数据id']
+            .dropna().astype(str)
+        )
+        seen_ids = set(watermark['seen_ids'])
+        deleted_ids = seen_ids - current_ids
+
+        # 水位线未覆盖的新行(例如更新时间为空)
+        unseen_ids = current_ids - seen_ids - set(changed['数据id'].dropna().astype(str))
+        if unseen_ids:
+            extra = self._run_extract_query(
+                f'SELECT * FROM {full_table} WHERE "数据id"::text = ANY(%s);',
+                (sorted(unseen_ids),),
+                task_key=self._table_task(table)
+            )
+            changed = pd.concat([changed, extra], ignore_index=True)
+
+        df = IncrementalStore.merge(snapshot, changed, deleted_ids)
+        logger.info(f"增量合并完成: 变化 {len(changed)} 行, 删除 {len(deleted_ids)} 行, "
+                    f"合计 {len(df)} 行")
+
+        store.save(table, df, IncrementalStore.build_watermark(df, self.schema_date))
+        return df
+
     def task1_extract_original_data(self) -> bool:
         """
         任务1: 抽取原始数据
@@ -142,26 +889,32 @@ class DataExtractor:
                 logger.error(f"表不存在: {table_name}")
                 return False
 
-            # 构建SQL查询
-            query = f"""
-            SELECT *
-            FROM {table_name}
-            ORDER BY "创建时间" DESC;
-            """
-
-            # 执行查询
-            df = self.db.execute_query(query)
-
-            # 写入Excel
-            df.to_excel(output_file, sheet_name='原始数据', index=False)
+            if self._use_pipeline("导出原始数据"):
+                # 读取和写入重叠执行
+                metrics = self._export_pipelined("导出原始数据", output_file, '原始数据',
+                                                 columns=self.get_projection('task1'), task_key='task1')
+                row_count, column_count, written = metrics['rows'], metrics['columns'], metrics['files']
+            else:
+                # 执行查询
+                df = self._fetch_full_table("导出原始数据", self.get_projection('task1'))
+
+                # 写入Excel和列式输出
+                formats = self._task_formats('task1')
+                written = []
+                if 'xlsx' in formats:
+                    self._write_sheets(output_file, [('原始数据', df, None)])
+                    written.append(output_file)
+                written += SideOutputWriter(output_file, formats).write_frame(df)
+                row_count, column_count = len(df), len(df.columns)
 
             logger.info(f"""
             任务1完成 ✓
-            - 输出文件: {output_file}
-            - 数据行数: {len(df)}
-            - 列数: {len(df.columns)}
+            - 输出文件: {', '.join(str(path) for path in written)}
+            - 数据行数: {row_count}
+            - 列数: {column_count}
             """)
 
+            self._record_output('task1', written, row_count)
             return True
 
         except Exception as e:
@@ -192,127 +945,305 @@ class DataExtractor:
                 logger.error(f"表不存在: {table_name}")
                 return False
 
-            # 构建SQL查询
-            query = f"""
-            SELECT *
-            FROM {table_name}
-            ORDER BY "创建时间" DESC;
-            """
-
-            # 执行查询
-            df = self.db.execute_query(query)
-
-            # 写入Excel
-            df.to_excel(output_file, sheet_name='计算解决率过程数据', index=False)
-
-            # 添加背景色标记 - 为上周创建的数据添加浅蓝色背景
-            self._add_background_color_for_last_week(output_file, df)
+            if not self._use_shared_scan() and self._use_pipeline("计算解决率过程数据"):
+                # 读取和写入重叠执行,写入时直接为上周创建的数据添加浅蓝色背景
+                metrics = self._export_pipelined("计算解决率过程数据", output_file,
+                                                 '计算解决率过程数据', highlight=self._last_week_mask,
+                                                 columns=self.get_projection('task2'), task_key='task2')
+                row_count, column_count, written = metrics['rows'], metrics['columns'], metrics['files']
+                if output_file in written:
+                    logger.info(f"背景色标记完成 ✓ - 标记行数: {metrics['highlighted']}")
+            else:
+                # 执行查询(共享扫描时与任务3/任务4共用一次查询,在内存中投影)
+                columns = self.get_projection('task2')
+                if self._use_shared_scan():
+                    df = self._get_shared_table("计算解决率过程数据")
+                    if columns:
+                        df = df[columns]
+                else:
+                    df = self._fetch_full_table("计算解决率过程数据", columns)
+
+                # 写入Excel,写入时直接为上周创建的数据添加浅蓝色背景
+                formats = self._task_formats('task2')
+                written = []
+                if 'xlsx' in formats:
+                    highlighted = self._write_highlighted(df, output_file, '计算解决率过程数据')
+                    written.append(output_file)
+                    logger.info(f"背景色标记完成 ✓ - 标记行数: {highlighted}")
+                written += SideOutputWriter(output_file, formats).write_frame(df)
+                row_count, column_count = len(df), len(df.columns)
 
             logger.info(f"""
             任务2完成 ✓
-            - 输出文件: {output_file}
-            - 数据行数: {len(df)}
-            - 列数: {len(df.columns)}
+            - 输出文件: {', '.join(str(path) for path in written)}
+            - 数据行数: {row_count}
+            - 列数: {column_count}
             """)
 
+            self._record_output('task2', written, row_count)
             return True
 
         except Exception as e:
             logger.error(f"任务2执行失败: {e}")
             return False
 
-    def _add_background_color_for_last_week(self, output_file: Path, df: pd.DataFrame):
+    def _write_highlighted(self, df: pd.DataFrame, output_file: Path, sheet_name: str) -> int:
         """
-        为配置日期范围内创建的数据行添加浅蓝色背景色
+        写入Excel,创建日期在配置日期范围内(与任务3/任务4相同)的行添加浅蓝色背景
 
-        使用配置文件中的 date_range (与任务3/任务4相同的时间范围)
+        标记行由DataFrame一次性计算,写入单元格时直接带上背景色,不再重新读取和保存工作簿
 
         Args:
+            df: 数据框
             output_file: Excel文件路径
-            df: 数据框(用于获取列索引)
+            sheet_name: 工作表名称
+
+        Returns:
+            int: 标记行数
         """
-        try:
-            logger.info("开始添加背景色标记...")
+        mask = self._last_week_mask(df)
+        if mask is None:
+            logger.warning("未找到'创建时间'列,跳过背景色标记")
+        else:
+            logger.info(f"背景色标记范围: {self.start_date} 至 {self.end_date} (来自配置文件)")
 
-            # 加载工作簿
-            wb = load_workbook(output_file)
-            ws = wb['计算解决率过程数据']
+        return self._write_sheets(output_file, [(sheet_name, df, mask)], window=self._highlight_window())
 
-            # 使用配置的日期范围(与任务3/任务4相同)
-            highlight_start = self.start_date
-            highlight_end = self.end_date
+    def _highlight_window(self) -> Optional[Tuple[str, str, str]]:
+        """
+        任务2的背景色标记方式
 
-            # 转换为日期对象以便比较
-            from datetime import datetime
-            highlight_start_dt = datetime.strptime(highlight_start, "%Y-%m-%d").date()
-            highlight_end_dt = datetime.strptime(highlight_end, "%Y-%m-%d").date()
+        fill(默认)逐行填充背景色; conditional 为整个数据区域添加一条条件格式规则,
+        日期范围写在"标记范围"工作表中,修改这两个单元格即可改变标记的行
 
-            logger.info(f"背景色标记范围: {highlight_start} 至 {highlight_end} (来自配置文件)")
+        Returns:
+            Optional[Tuple[str, str, str]]: conditional 时为 (日期列, 开始日期, 结束日期),fill 时为None
+        """
+        mode = self.config['tasks'].get('highlight_mode', 'fill')
+        if mode not in ('fill', 'conditional'):
+            raise ValueError(f"不支持的背景色标记方式: {mode}")
+        if mode == 'fill':
+            return None
+        return '创建时间', self.start_date, self.end_date
+
+    def _use_shared_scan(self) -> bool:
+        """
+        是否使用共享扫描模式
 
-            # 定义浅蓝色填充
-            light_blue_fill = PatternFill(
-                start_color="E6F2FF",
-                end_color="E6F2FF",
-                fill_type="solid"
-            )
+        任务2/3/4都读取"计算解决率过程数据",启用共享扫描且其中至少两个任务
+        启用时,只查询一次整表,任务3/任务4在内存中筛选。
 
-            # 查找创建时间列的索引
-            columns = df.columns.tolist()
-            created_time_col_idx = None
-            for idx, col_name in enumerate(columns):
-                if col_name == '创建时间':
-                    created_time_col_idx = idx + 1  # Excel列从1开始
-                    break
-
-            if created_time_col_idx is None:
-                logger.warning("未找到'创建时间'列,跳过背景色标记")
-                return
-
-            # 统计标记数量
-            marked_count = 0
-
-            # 遍历数据行(从第2行开始,第1行是表头)
-            for row in range(2, ws.max_row + 1):
-                cell = ws.cell(row=row, column=created_time_col_idx)
-                created_date = cell.value
-
-                # 检查创建时间是否在配置的日期范围内
-                if created_date:
-                    # 处理不同的日期格式
-                    if isinstance(created_date, datetime):
-                        created_date_only = created_date.date()
-                    elif isinstance(created_date, str):
-                        try:
-                            # 尝试解析字符串日期
-                            created_date_only = datetime.strptime(created_date, "%Y-%m-%d %H:%M:%S").date()
-                        except:
-                            try:
-                                created_date_only = datetime.strptime(created_date, "%Y-%m-%d").date()
-                            except:
-                                logger.warning(f"无法解析日期: {created_date}")
-                                continue
-                    else:
-                        continue
-
-                    # 判断是否在配置的日期范围内
-                    if highlight_start_dt <= created_date_only <= highlight_end_dt:
-                        # 为整行添加背景色
-                        for col in range(1, ws.max_column + 1):
-                            ws.cell(row=row, column=col).fill = light_blue_fill
-                        marked_count += 1
-
-            # 保存工作簿
-            wb.save(output_file)
-
-            logger.info(f"背景色标记完成 ✓")
-            logger.info(f"- 标记行数: {marked_count}")
-            logger.info(f"- 背景色: 浅蓝色 (#E6F2FF)")
+        Returns:
+            bool: 是否使用共享扫描
+        """
+        if not self.config['tasks'].get('shared_scan', False):
+            return False
 
-        except Exception as e:
-            logger.error(f"添加背景色时出错: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            # 不中断流程,即使添加背景色失败也继续
+        # 整表超出内存预算时不缓存整表
+        if self._plan_table("计算解决率过程数据") == MODE_STREAM:
+            return False
+
+        enabled = [
+            task_key for task_key in ('task2', 'task3', 'task4')
+            if self.config['tasks'].get(f'{task_key}_enabled', True)
+        ]
+        return len(enabled) >= 2
+
+    def _get_shared_table(self, table: str) -> pd.DataFrame:
+        """
+        获取共享扫描的整表数据(本次运行只查询一次)
+
+        Args:
+            table: 表名(不含Schema)
+
+        Returns:
+            pd.DataFrame: 表数据(调用方不得修改)
+        """
+        with self._shared_lock:
+            lock = self._shared_table_locks.setdefault(table, threading.Lock())
+
+        # 并行执行时,其他任务等待第一次查询完成后直接复用结果
+        with lock:
+            if table not in self._shared_tables:
+                logger.info(f"共享扫描: 查询整表 {self.get_full_table_name(table)}")
+                self._shared_tables[table] = self._fetch_full_table(table)
+            else:
+                logger.info(f"共享扫描: 复用已查询的 {table} 数据")
+            return self._shared_tables[table]
+
+    def _get_dimension_table(self) -> pd.DataFrame:
+        """
+        获取"各产品对应的测试部长"维表(本次运行只查询一次)
+
+        Returns:
+            pd.DataFrame: 维表数据,列为 具体的产品, 部门负责人
+        """
+        with self._shared_lock:
+            if self._dimension_table is None:
+                cache_config = self.config.get('dimension_cache') or {}
+                if cache_config.get('enabled', False) and self.db.backend == 'postgres':
+                    # 本地副本 + 变化指纹,维表未变化时不重新查询(本地数据库后端直接查询)
+                    cache = DimensionCache(
+                        resolve_cache_dir(self.config, cache_config.get('directory', '.dimension_cache')),
+                        method=cache_config.get('fingerprint', 'checksum')
+                    )
+                    self._dimension_table = cache.load(
+                        self.db, DIMENSION_TABLE, DIMENSION_TABLE_NAME, DIMENSION_COLUMNS
+                    )
+                else:
+                    query = f"""
+                    SELECT "具体的产品", "部门负责人"
+                    FROM {DIMENSION_TABLE};
+                    """
+                    self._dimension_table = self.db.execute_query(query)
+            return self._dimension_table
+
+    def _created_time_mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        计算创建时间在筛选范围内的行(与SQL中的时间条件一致)
+
+        Args:
+            df: 包含"创建时间"列的数据框
+
+        Returns:
+            pd.Series: 布尔掩码
+        """
+        if self.windows:
+            return self._assign_windows(df['创建时间']).notna()
+
+        created = pd.to_datetime(df['创建时间'], errors='coerce')
+        window_start = pd.Timestamp(f"{self.start_date} 00:00:01")
+        window_end = pd.Timestamp(f"{self.end_date} 23:59:59")
+        return (created >= window_start) & (created <= window_end)
+
+    @staticmethod
+    def _not_equal(series: pd.Series, value) -> pd.Series:
+        """SQL语义的 <> 比较: NULL 不满足条件"""
+        return series.notna() & (series != value)
+
+    @staticmethod
+    def _not_in(series: pd.Series, values: tuple) -> pd.Series:
+        """SQL语义的 NOT IN 比较: NULL 不满足条件"""
+        return series.notna() & ~series.isin(values)
+
+    def _derive_new_issues(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        从整表数据中筛选任务3的本周新增问题(与任务3的SQL等价)
+
+        Args:
+            df: "计算解决率过程数据"整表数据(按创建时间降序)
+
+        Returns:
+            pd.DataFrame: 任务3查询结果
+        """
+        mask = (
+            self._created_time_mask(df)
+            & self._not_equal(df['审批状态'], EXCLUDED_APPROVAL_STATUS)
+            & self._not_in(df['处理方式'], EXCLUDED_HANDLING_TYPES)
+            & self._not_equal(df['审批结果'], EXCLUDED_APPROVAL_RESULT)
+        )
+        filtered = df[mask]
+
+        result = pd.DataFrame({
+            '序号': filtered['序号'],
+            '所属客户项目': filtered['所属客户项目'],
+            '项目类型': filtered['项目类型'],
+            '所涉产品': filtered['所涉产品'],
+            '软件版本号': filtered['软件版本号'],
+            '紧急程度': filtered['紧急程度'],
+            '问题描述': filtered['问题描述'],
+            '原因分析及解决方案': NEW_ISSUE_REASON_TEXT,
+            '问题处理类别': filtered['处理方式'],
+            '期望解决时间': filtered['期望解决时间'],
+            '计划解决时间（系统导出）': filtered['计划完成时间'],
+            '计划解决时间（最新计划）': '',
+            '当前负责人': filtered['当前负责人'],
+            '研发负责人': filtered['研发负责人'],
+            '状态（以系统导出计算）': filtered['用于交付日期偏差统计'],
+        })
+        if self.windows:
+            result[WINDOW_COLUMN] = self._assign_windows(filtered['创建时间'])
+        return result.reset_index(drop=True)
+
+    def _derive_rdpm_data(self, df: pd.DataFrame, dimension_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        从整表数据中筛选任务4的RDPM数据,并在内存中关联维表(与任务4的SQL等价)
+
+        Args:
+            df: "计算解决率过程数据"整表数据(按创建时间降序)
+            dimension_df: "各产品对应的测试部长"维表数据
+
+        Returns:
+            pd.DataFrame: 任务4查询结果
+        """
+        mask = (
+            self._created_time_mask(df)
+            & self._not_equal(df['审批状态'], EXCLUDED_APPROVAL_STATUS)
+            & self._not_equal(df['审批结果'], EXCLUDED_APPROVAL_RESULT)
+            & self._not_equal(df['非研发处理问题类别'], EXCLUDED_NON_RD_CATEGORY)
+        )
+        filtered = df.loc[mask, RDPM_SOURCE_COLUMNS]
+        if self.windows:
+            filtered = filtered.assign(**{WINDOW_COLUMN: self._assign_windows(filtered['创建时间'])})
+        return self._join_test_owner(filtered, dimension_df)
+
+    @staticmethod
+    def _join_test_owner(df: pd.DataFrame, dimension_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        在内存中按所涉产品关联维表,得到测试负责人(哈希连接,与SQL内连接等价)
+
+        Args:
+            df: 任务4筛选后的数据(按创建时间降序)
+            dimension_df: "各产品对应的测试部长"维表数据
+
+        Returns:
+            pd.DataFrame: 增加"测试负责人"列后的数据
+        """
+        df = df[df['所涉产品'].notna()]
+
+        # 内连接(NULL不参与关联),保持左表的创建时间降序
+        dimension = dimension_df[dimension_df['具体的产品'].notna()]
+        dimension = dimension.rename(columns={'部门负责人': '测试负责人'})
+        merged = df.merge(dimension, left_on='所涉产品', right_on='具体的产品', how='inner')
+
+        return merged.drop(columns=['具体的产品']).reset_index(drop=True)
+
+    def _query_rdpm_source(self) -> pd.DataFrame:
+        """
+        查询任务4的源数据(只筛选主表,不关联维表)
+
+        Returns:
+            pd.DataFrame: 筛选后的数据(按创建时间降序)
+        """
+        column_list = ', '.join(f'"{column}"' for column in RDPM_SOURCE_COLUMNS)
+        window_sql, window_params = self._window_select_sql()
+        query_start, query_end = self._get_query_range()
+        query = f"""
+        SELECT {column_list}{window_sql}
+        FROM {self.get_full_table_name("计算解决率过程数据")}
+        WHERE "创建时间" >= %s
+          AND "创建时间" <= %s
+          AND "审批状态" <> %s
+          AND "审批结果" <> %s
+          AND "非研发处理问题类别" <> %s
+        ORDER BY "创建时间" DESC;
+        """
+
+        params = (
+            *window_params,
+            f"{query_start} 00:00:01",
+            f"{query_end} 23:59:59",
+            EXCLUDED_APPROVAL_STATUS,
+            EXCLUDED_APPROVAL_RESULT,
+            EXCLUDED_NON_RD_CATEGORY
+        )
+        return self._drop_outside_windows(self._run_extract_query(query, params, task_key='task4'))
+
+    def _drop_outside_windows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """去掉不属于任何窗口的行(相邻两周之间零点整的数据,与单周查询的边界一致)"""
+        if not self.windows or WINDOW_COLUMN not in df.columns:
+            return df
+        return df[df[WINDOW_COLUMN].notna()].reset_index(drop=True)
 
     def task3_extract_new_issues(self) -> bool:
         """
@@ -338,68 +1269,73 @@ class DataExtractor:
                 logger.error(f"表不存在: {table_name}")
                 return False
 
-            # 构建SQL查询
-            query = f"""
-            SELECT
-                "序号",
-                "所属客户项目",
-                "项目类型",
-                "所涉产品",
-                "软件版本号",
-                "紧急程度",
-                "问题描述",
-                %s AS "原因分析及解决方案",
-                "处理方式" AS "问题处理类别",
-                "期望解决时间",
-                "计划完成时间" AS "计划解决时间（系统导出）",
-                %s AS "计划解决时间（最新计划）",
-                "当前负责人",
-                "研发负责人",
-                "用于交付日期偏差统计" AS "状态（以系统导出计算）"
-            FROM {table_name}
-            WHERE "创建时间" >= %s
-              AND "创建时间" <= %s
-              AND "审批状态" <> %s
-              AND "处理方式" NOT IN (%s, %s)
-              AND "审批结果" <> %s
-            ORDER BY "创建时间" DESC;
-            """
-
-            params = (
-                '问题原因：xxx 解决方案：xxx (自行修改)',  # 固定文本
-                '',  # 空字符串
-                f"{self.start_date} 00:00:01",
-                f"{self.end_date} 23:59:59",
-                '终止',
-                '非研发处理',
-                '硬件故障处理',
-                '审批未通过'
-            )
-
-            # 执行查询
-            df = self.db.execute_query(query, params=params)
-
+            if self._use_shared_scan():
+                # 共享扫描: 在内存中从整表数据筛选
+                df = self._derive_new_issues(self._get_shared_table("计算解决率过程数据"))
+            else:
+                # 构建SQL查询(多窗口模式下在数据库端按周分桶)
+                window_sql, window_params = self._window_select_sql()
+                query_start, query_end = self._get_query_range()
+                query = f"""
+                SELECT
+                    "序号",
+                    "所属客户项目",
+                    "项目类型",
+                    "所涉产品",
+                    "软件版本号",
+                    "紧急程度",
+                    "问题描述",
+                    %s AS "原因分析及解决方案",
+                    "处理方式" AS "问题处理类别",
+                    "期望解决时间",
+                    "计划完成时间" AS "计划解决时间（系统导出）",
+                    %s AS "计划解决时间（最新计划）",
+                    "当前负责人",
+                    "研发负责人",
+                    "用于交付日期偏差统计" AS "状态（以系统导出计算）"{window_sql}
+                FROM {table_name}
+                WHERE "创建时间" >= %s
+                  AND "创建时间" <= %s
+                  AND "审批状态" <> %s
+                  AND "处理方式" NOT IN (%s, %s)
+                  AND "审批结果" <> %s
+                ORDER BY "创建时间" DESC;
+                """
+
+                params = (
+                    NEW_ISSUE_REASON_TEXT,  # 固定文本
+                    '',  # 空字符串
+                    *window_params,
+                    f"{query_start} 00:00:01",
+                    f"{query_end} 23:59:59",
+                    EXCLUDED_APPROVAL_STATUS,
+                    *EXCLUDED_HANDLING_TYPES,
+                    EXCLUDED_APPROVAL_RESULT
+                )
+
+                # 执行查询
+                self._plan_query('task3', query, params, column_count=15)
+                df = self._drop_outside_windows(self._run_extract_query(query, params, task_key='task3'))
+
+            query_start, query_end = self._get_query_range()
             if len(df) == 0:
-                logger.warning(f"查询结果为空,日期范围: {self.start_date} 至 {self.end_date}")
+                logger.warning(f"查询结果为空,日期范围: {query_start} 至 {query_end}")
             else:
                 logger.info(f"查询到 {len(df)} 条新增问题")
 
-            # 重新编号序号列
-            if len(df) > 0 and '序号' in df.columns:
-                df['序号'] = range(1, len(df) + 1)
-                logger.info(f"序号已重新编号: 1 到 {len(df)}")
-
-            # 写入Excel
-            df.to_excel(output_file, sheet_name='本周新增问题', index=False)
+            # 重新编号序号列并写入Excel(多窗口模式下每个窗口分别编号)
+            written = self._write_task_output(df, output_file, '本周新增问题', renumber=True,
+                                             task_key='task3')
 
             logger.info(f"""
             任务3完成 ✓
-            - 输出文件: {output_file}
+            - 输出文件: {', '.join(str(path) for path in written)}
             - 数据行数: {len(df)}
             - 列数: {len(df.columns)}
-            - 筛选范围: {self.start_date} 至 {self.end_date}
+            - 筛选范围: {query_start} 至 {query_end}
             """)
 
+            self._record_output('task3', written, len(df))
             return True
 
         except Exception as e:
@@ -421,45 +1357,62 @@ class DataExtractor:
             logger.info("=" * 80)
 
             # 获取输出文件名
-            base_filename = self.config['output']['files']['task4']
             output_file = self._get_output_filename('task4')
 
-            # SQL查询 - RDPM导入数据
-            query = """
-            SELECT
-                A.创建时间,
-                A.审批编号,
-                A.所涉产品,
-                A.软件版本号,
-                A.所属客户项目,
-                A.问题描述,
-                B.部门负责人 as "测试负责人"
-            FROM yxwtzb_"""+self.schema_date+""".计算解决率过程数据 A,
-                 public."各产品对应的测试部长" B
-            WHERE 1=1
-              AND A.所涉产品=B."具体的产品"
-              AND A.创建时间 >= %s
-              AND A.创建时间 <= %s
-              AND A.审批状态 <> %s
-              AND A.审批结果 <> %s
-              AND A.非研发处理问题类别 <> %s
-            ORDER BY A.创建时间 DESC;
-            """
-
-            # 准备参数
-            params = (
-                f"{self.start_date} 00:00:01",
-                f"{self.end_date} 23:59:59",
-                '终止',
-                '审批未通过',
-                '需求'
-            )
-
-            # 执行查询
-            df = self.db.execute_query(query, params=params)
-
+            if self._use_shared_scan():
+                # 共享扫描: 在内存中筛选并关联维表
+                df = self._derive_rdpm_data(
+                    self._get_shared_table("计算解决率过程数据"),
+                    self._get_dimension_table()
+                )
+            elif self.config['tasks'].get('task4_client_join', False):
+                # 只扫描主表,在内存中关联本地缓存的维表
+                df = self._join_test_owner(
+                    self._query_rdpm_source(),
+                    self._get_dimension_table()
+                )
+            else:
+                # SQL查询 - RDPM导入数据(多窗口模式下在数据库端按周分桶)
+                window_sql, window_params = self._window_select_sql('A.创建时间')
+                query_start, query_end = self._get_query_range()
+                query = """
+                SELECT
+                    A.创建时间,
+                    A.审批编号,
+                    A.所涉产品,
+                    A.软件版本号,
+                    A.所属客户项目,
+                    A.问题描述,
+                    B.部门负责人 as "测试负责人" """ + window_sql + """
+                FROM yxwtzb_"""+self.schema_date+""".计算解决率过程数据 A,
+                     """+DIMENSION_TABLE+""" B
+                WHERE 1=1
+                  AND A.所涉产品=B."具体的产品"
+                  AND A.创建时间 >= %s
+                  AND A.创建时间 <= %s
+                  AND A.审批状态 <> %s
+                  AND A.审批结果 <> %s
+                  AND A.非研发处理问题类别 <> %s
+                ORDER BY A.创建时间 DESC;
+                """
+
+                # 准备参数
+                params = (
+                    *window_params,
+                    f"{query_start} 00:00:01",
+                    f"{query_end} 23:59:59",
+                    EXCLUDED_APPROVAL_STATUS,
+                    EXCLUDED_APPROVAL_RESULT,
+                    EXCLUDED_NON_RD_CATEGORY
+                )
+
+                # 执行查询
+                self._plan_query('task4', query, params, column_count=7)
+                df = self._drop_outside_windows(self._run_extract_query(query, params, task_key='task4'))
+
+            query_start, query_end = self._get_query_range()
             if len(df) == 0:
-                logger.warning(f"查询结果为空,日期范围: {self.start_date} 至 {self.end_date}")
+                logger.warning(f"查询结果为空,日期范围: {query_start} 至 {query_end}")
             else:
                 logger.info(f"查询到 {len(df)} 条RDPM数据")
 
@@ -487,20 +1440,24 @@ class DataExtractor:
                 '测试负责人(必填)'
             ]
 
+            if self.windows:
+                ordered_columns.append(WINDOW_COLUMN)
+
             df = df[ordered_columns]
 
             # 写入Excel
-            df.to_excel(output_file, sheet_name='RDPM导入数据', index=False)
+            written = self._write_task_output(df, output_file, 'RDPM导入数据', task_key='task4')
 
             logger.info(f"""
             任务4完成 ✓
-            - 输出文件: {output_file}
+            - 输出文件: {', '.join(str(path) for path in written)}
             - 数据行数: {len(df)}
             - 列数: {len(df.columns)}
-            - 筛选范围: {self.start_date} 至 {self.end_date}
+            - 筛选范围: {query_start} 至 {query_end}
             - 表头格式: RDPM系统标准
             """)
 
+            self._record_output('task4', written, len(df))
             return True
 
         except Exception as e:
@@ -509,6 +1466,290 @@ class DataExtractor:
             logger.error(traceback.format_exc())
             return False
 
+    def task5_refresh_weekly_aggregate(self) -> bool:
+        """
+        任务5: 刷新数据库端的周解决率汇总
+
+        在汇总Schema(aggregate.schema)中创建或刷新 周 × 产品 × 状态 的汇总(PostgreSQL为物化视图),
+        输出每周每个产品的解决率和及时解决率,并检查明细表上的索引
+
+        Returns:
+            bool: 执行是否成功
+        """
+        try:
+            logger.info("=" * 80)
+            logger.info("开始执行任务5: 周解决率汇总")
+            logger.info("=" * 80)
+
+            schema = f"yxwtzb_{self.schema_date}"
+            if not self.db.table_exists(schema, AGGREGATE_SOURCE_TABLE):
+                logger.error(f"表不存在: {self.get_full_table_name(AGGREGATE_SOURCE_TABLE)}")
+                return False
+
+            target_schema = self._aggregate_schema()
+            problem = self.db.check_create_privilege(target_schema)
+            if problem:
+                logger.error(f"无法写入汇总: {problem}")
+                return False
+
+            output_file = self._get_output_filename('task5')
+            aggregate = WeeklyAggregate(self.db, schema, target_schema)
+            summary = aggregate.summarize(aggregate.refresh())
+            advice = pd.DataFrame(aggregate.advise_indexes())
+
+            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                summary.to_excel(writer, sheet_name='周汇总', index=False)
+                advice.to_excel(writer, sheet_name='索引建议', index=False)
+
+            logger.info(f"""
+            任务5完成 ✓
+            - 输出文件: {output_file}
+            - 汇总行数: {len(summary)}
+            - 覆盖周数: {summary['统计周'].nunique() if len(summary) else 0}
+            """)
+
+            self._record_output('task5', [output_file], len(summary))
+            return True
+
+        except Exception as e:
+            logger.error(f"任务5执行失败: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return False
+
+    def _task_enabled(self, task_key: str) -> bool:
+        """任务是否启用(OPT_IN_TASKS 中的任务默认不执行)"""
+        return self.config['tasks'].get(f'{task_key}_enabled', task_key not in OPT_IN_TASKS)
+
+    def _get_enabled_tasks(self) -> List[Tuple[str, Callable[[], bool]]]:
+        """
+        获取已启用的任务列表(按任务编号排序)
+
+        Returns:
+            List[Tuple[str, Callable]]: (任务键名, 任务函数)
+        """
+        all_tasks = [
+            ('task1', self.task1_extract_original_data),
+            ('task2', self.task2_extract_calculated_data),
+            ('task3', self.task3_extract_new_issues),
+            ('task4', self.task4_extract_rdpm_data),
+            ('task5', self.task5_refresh_weekly_aggregate),
+        ]
+        return [
+            (task_key, task_func) for task_key, task_func in all_tasks
+            if self._task_enabled(task_key)
+        ]
+
+    def _aggregate_schema(self) -> str:
+        """任务5写入汇总的Schema"""
+        return (self.config.get('aggregate') or {}).get('schema') or DEFAULT_AGGREGATE_SCHEMA
+
+    def preflight_check(self, task_keys: List[str]) -> Dict[str, List[str]]:
+        """
+        预检: 一次目录查询校验所有任务依赖的表和列,
+        以及任务5在汇总Schema中的建表权限
+
+        加载的目录元数据会缓存在连接器中,任务执行时的表检查直接使用缓存。
+
+        Args:
+            task_keys: 需要校验的任务键名列表
+
+        Returns:
+            Dict[str, List[str]]: 校验失败的任务及其问题描述
+        """
+        schema = f"yxwtzb_{self.schema_date}"
+        extra_tables = {
+            table for task_key in task_keys
+            for table in TASK_DEPENDENCIES.get(task_key, {})
+            if isinstance(table, tuple)
+        }
+
+        logger.info("预检: 加载目录元数据...")
+        self.db.load_catalog([schema], tables=sorted(extra_tables))
+
+        problems = {}
+        for task_key in task_keys:
+            for table, columns in TASK_DEPENDENCIES.get(task_key, {}).items():
+                table_schema, table_name = table if isinstance(table, tuple) else (schema, table)
+                if not self.db.table_exists(table_schema, table_name):
+                    problems.setdefault(task_key, []).append(f"表不存在: {table_schema}.{table_name}")
+                    continue
+
+                existing = set(self.db.get_table_columns(table_schema, table_name))
+                missing = [column for column in columns if column not in existing]
+                if missing:
+                    problems.setdefault(task_key, []).append(
+                        f"{table_schema}.{table_name} 缺少列: {missing}"
+                    )
+
+            # 汇总Schema的建表权限
+            if task_key in WRITING_TASKS:
+                problem = self.db.check_create_privilege(self._aggregate_schema())
+                if problem:
+                    problems.setdefault(task_key, []).append(problem)
+
+            # 列投影配置
+            if task_key in TASK_TABLES and task_key not in problems:
+                try:
+                    self.get_projection(task_key)
+                except ValueError as e:
+                    problems.setdefault(task_key, []).append(str(e))
+
+        for task_key, task_problems in problems.items():
+            for problem in task_problems:
+                logger.error(f"预检失败 {task_key}: {problem}")
+        if not problems:
+            logger.info(f"预检通过 ✓ ({len(task_keys)} 个任务)")
+
+        return problems
+
+    def _record_output(self, task_key: str, files: List[Path], rows: int):
+        """
+        记录任务的输出文件和行数(任务成功后写入运行清单)
+
+        Args:
+            task_key: 任务键名
+            files: 输出文件
+            rows: 输出行数
+        """
+        self._task_outputs[task_key] = {'files': list(files), 'rows': rows}
+
+    def _manifest_key(self, task_key: str) -> str:
+        """运行清单中的任务键(同一输出目录可能包含多个Schema的结果)"""
+        return f"{task_key}@{self.schema_date}"
+
+    def _task_params(self, task_key: str) -> Dict:
+        """
+        影响任务输出内容的参数,与清单记录一致时 --resume 跳过该任务
+
+        Args:
+            task_key: 任务键名
+
+        Returns:
+            Dict: 任务参数
+        """
+        return {
+            'schema_date': self.schema_date,
+            'date_range': [self.start_date, self.end_date],
+            'windows': [list(window) for window in self.windows],
+            'window_output': self.config['date_range'].get('window_output', 'sheets'),
+            'columns': (self.config['tasks'].get('columns') or {}).get(task_key),
+            'highlight_mode': self.config['tasks'].get('highlight_mode', 'fill') if task_key == 'task2' else None,
+            'formats': self._task_formats(task_key),
+            'output_file': str(self._get_output_filename(task_key)),
+        }
+
+    def _filter_resumable(self, tasks: List[Tuple[str, Callable[[], bool]]]) -> Tuple[list, list]:
+        """
+        找出清单中已按相同参数完成的任务
+
+        Args:
+            tasks: (任务键名, 任务函数) 列表
+
+        Returns:
+            Tuple[list, list]: (需要执行的任务, 跳过的任务键名)
+        """
+        remaining = []
+        skipped = []
+        for task_key, task_func in tasks:
+            if self.manifest.is_complete(self._manifest_key(task_key), self._task_params(task_key)):
+                logger.info(f"{task_key} 已完成且参数未变化,跳过 (--resume)")
+                skipped.append(task_key)
+            else:
+                remaining.append((task_key, task_func))
+        return remaining, skipped
+
+    def _update_manifest(self, task_key: str, success: bool):
+        """任务结束后更新运行清单: 成功时记录,失败时删除旧记录"""
+        try:
+            output = self._task_outputs.pop(task_key, None)
+            if success and output is not None:
+                self.manifest.record(self._manifest_key(task_key), self._task_params(task_key),
+                                     output['files'], output['rows'])
+            elif not success:
+                self.manifest.remove(self._manifest_key(task_key))
+        except Exception as e:
+            logger.warning(f"更新运行清单失败: {e}")
+
+    def _run_task(self, task_key: str, task_func: Callable[[], bool]) -> bool:
+        """
+        在独占的数据库连接上执行单个任务
+
+        Args:
+            task_key: 任务键名
+            task_func: 任务函数
+
+        Returns:
+            bool: 是否成功
+        """
+        # 共享连接器(例如历史回填)时,统计标签带上Schema日期以区分不同周
+        label = task_key if self._owns_db else f"{task_key}@{self.schema_date}"
+        started = time.perf_counter()
+        success = False
+        try:
+            with self.db.acquire(), self.db.stats.label(label):
+                success = task_func()
+        except Exception as e:
+            logger.error(f"{task_key} 获取数据库连接失败: {e}")
+        finally:
+            self.db.stats.record_task(label, time.perf_counter() - started, success)
+        self._update_manifest(task_key, success)
+        return success
+
+    def _run_tasks_parallel(self, tasks: List[Tuple[str, Callable[[], bool]]]) -> Dict[str, bool]:
+        """
+        使用线程池并行执行任务,每个任务占用一个连接
+
+        Args:
+            tasks: (任务键名, 任务函数) 列表
+
+        Returns:
+            Dict[str, bool]: 各任务的执行结果(顺序与任务列表一致)
+        """
+        workers = min(self.parallelism, len(tasks))
+        logger.info(f"并行执行 {len(tasks)} 个任务, 并行度: {workers}")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extract') as executor:
+            futures = [
+                (task_key, executor.submit(self._run_task, task_key, task_func))
+                for task_key, task_func in tasks
+            ]
+            return {task_key: future.result() for task_key, future in futures}
+
+    def _write_query_report(self, start_time: datetime, duration: float, results: Dict[str, bool]):
+        """
+        输出本次运行的查询统计报告(JSON,与输出文件放在同一目录)
+
+        Args:
+            start_time: 运行开始时间
+            duration: 总耗时(秒)
+            results: 各任务的执行结果
+        """
+        instrumentation_config = self.config['instrumentation']
+        report_dir = self.output_dir
+        # 按Schema分区的输出布局下各周共用输出目录: <输出目录>/query_report/schema_date=<日期>/
+        if self.config['output'].get('partition_by_schema', False):
+            report_dir = self.output_dir / 'query_report' / f"schema_date={self.schema_date}"
+            report_dir.mkdir(parents=True, exist_ok=True)
+        report_file = report_dir / (
+            self.date_prefix + instrumentation_config.get('report_file', 'query_report.json')
+        )
+        try:
+            # 共享的连接器(回填)记录了所有Schema的查询,只输出本Schema的任务
+            self.db.stats.write_report(
+                report_file,
+                label_suffix=None if self._owns_db else f"@{self.schema_date}",
+                schema_date=self.schema_date,
+                date_range=[self.start_date, self.end_date],
+                started_at=start_time.isoformat(timespec='seconds'),
+                duration_seconds=round(duration, 4),
+                parallelism=self.parallelism,
+                explain=self.db.stats.explain,
+                results=results
+            )
+        except Exception as e:
+            logger.warning(f"输出查询统计报告失败: {e}")
+
     def run_all_tasks(self) -> Dict[str, bool]:
         """
         运行所有抽取任务
@@ -521,38 +1762,56 @@ class DataExtractor:
         logger.info("数据抽取任务开始")
         logger.info(f"Schema日期: {self.schema_date}")
         logger.info(f"筛选范围: {self.start_date} 至 {self.end_date}")
+        logger.info(f"任务并行度: {self.parallelism}")
         logger.info("=" * 80)
 
         results = {}
 
         try:
-            # 连接数据库
-            self.db.connect()
-
-            # 执行任务1
-            if self.config['tasks'].get('task1_enabled', True):
-                results['task1'] = self.task1_extract_original_data()
-
-            # 执行任务2
-            if self.config['tasks'].get('task2_enabled', True):
-                results['task2'] = self.task2_extract_calculated_data()
-
-            # 执行任务3
-            if self.config['tasks'].get('task3_enabled', True):
-                results['task3'] = self.task3_extract_new_issues()
+            # 连接数据库(共享的连接器由调用方管理)
+            if self._owns_db:
+                self.db.connect()
+
+            tasks = self._get_enabled_tasks()
+
+            # 续跑: 跳过清单中已按相同参数完成的任务
+            pending, skipped = tasks, []
+            if self.config['tasks'].get('resume', False):
+                pending, skipped = self._filter_resumable(tasks)
+
+            # 预检失败的任务不执行
+            failed_checks = {}
+            if self.config['tasks'].get('preflight', False) and pending:
+                failed_checks = self.preflight_check([task_key for task_key, _ in pending])
+            runnable = [(task_key, task_func) for task_key, task_func in pending
+                        if task_key not in failed_checks]
+
+            run_results = {task_key: True for task_key in skipped}
+            if self.parallelism > 1 and len(runnable) > 1 and self.db.pooled:
+                run_results.update(self._run_tasks_parallel(runnable))
+            else:
+                if self.parallelism > 1 and not self.db.pooled:
+                    logger.warning("数据库连接器未启用连接池,任务按顺序执行")
+                for task_key, task_func in runnable:
+                    run_results[task_key] = self._run_task(task_key, task_func)
 
-            # 执行任务4
-            if self.config['tasks'].get('task4_enabled', True):
-                results['task4'] = self.task4_extract_rdpm_data()
+            results = {task_key: run_results.get(task_key, False) for task_key, _ in tasks}
 
             # 断开数据库连接
-            self.db.disconnect()
+            if self._owns_db:
+                self.db.disconnect()
 
         except Exception as e:
             logger.error(f"数据抽取过程发生错误: {e}")
-            self.db.disconnect()
+            if self._owns_db:
+                self.db.disconnect()
             raise
 
+        finally:
+            # 释放共享扫描缓存
+            self._shared_tables.clear()
+            self._dimension_table = None
+
         # 统计结果
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -564,6 +1823,12 @@ class DataExtractor:
         logger.info("数据抽取任务完成")
         logger.info(f"成功: {success_count}/{total_count}")
         logger.info(f"耗时: {duration:.2f}秒")
+        if self.db.query_cache is not None:
+            logger.info(f"查询缓存: 命中 {self.db.query_cache.hits} 次, "
+                        f"未命中 {self.db.query_cache.misses} 次")
+
+        if (self.config.get('instrumentation') or {}).get('enabled', False):
+            self._write_query_report(start_time, duration, results)
         logger.info("=" * 80)
 
         return results
@@ -0,0 +1,143 @@
+"""
+增量抽取模块
+保存每张表的本地快照和水位线(最大更新时间 + 已见数据id),
+下次运行只拉取变化的行并合并到快照
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+
+class IncrementalStore:
+    """增量抽取的快照和水位线存储"""
+
+    def __init__(self, state_dir: Path):
+        """
+        初始化增量存储
+
+        Args:
+            state_dir: 快照和水位线的保存目录
+        """
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    def _snapshot_path(self, table: str) -> Path:
+        return self.state_dir / f"{table}.parquet"
+
+    def _watermark_path(self, table: str) -> Path:
+        return self.state_dir / f"{table}.watermark.json"
+
+    def load(self, table: str) -> Tuple[Optional[pd.DataFrame], Optional[Dict]]:
+        """
+        读取表的快照和水位线
+
+        Args:
+            table: 表名
+
+        Returns:
+            Tuple[Optional[pd.DataFrame], Optional[Dict]]: (快照, 水位线), 不存在时为None
+        """
+        snapshot_path = self._snapshot_path(table)
+        watermark_path = self._watermark_path(table)
+        if not snapshot_path.exists() or not watermark_path.exists():
+            return None, None
+
+        try:
+            with open(watermark_path, 'r', encoding='utf-8') as f:
+                watermark = json.load(f)
+            snapshot = pd.read_parquet(snapshot_path)
+            if len(snapshot) != watermark.get('row_count'):
+                logger.warning(f"增量快照与水位线不一致({len(snapshot)} 行, 水位线 {watermark.get('row_count')} 行),"
+                               f"将全量抽取")
+                return None, None
+            return snapshot, watermark
+        except Exception as e:
+            logger.warning(f"读取增量快照失败,将全量抽取: {e}")
+            return None, None
+
+    def save(self, table: str, snapshot: pd.DataFrame, watermark: Dict):
+        """
+        保存表的快照和水位线
+
+        两个文件都先写入临时文件再替换,不会读到写了一半的文件;
+        快照保存失败时删除水位线,保证下次运行全量抽取。
+
+        Args:
+            table: 表名
+            snapshot: 合并后的完整数据
+            watermark: 水位线
+        """
+        snapshot_path = self._snapshot_path(table)
+        watermark_path = self._watermark_path(table)
+        snapshot_tmp = snapshot_path.with_suffix('.tmp')
+        watermark_tmp = watermark_path.with_suffix('.tmp')
+        try:
+            snapshot.to_parquet(snapshot_tmp, index=False)
+            with open(watermark_tmp, 'w', encoding='utf-8') as f:
+                json.dump(watermark, f, ensure_ascii=False)
+            # 先移除旧水位线,快照替换后再放入新水位线
+            watermark_path.unlink(missing_ok=True)
+            snapshot_tmp.replace(snapshot_path)
+            watermark_tmp.replace(watermark_path)
+            logger.info(f"增量快照已保存: {table} ({watermark['row_count']} 行)")
+        except Exception as e:
+            logger.warning(f"保存增量快照失败,下次运行将全量抽取: {e}")
+            watermark_path.unlink(missing_ok=True)
+            snapshot_tmp.unlink(missing_ok=True)
+            watermark_tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def build_watermark(df: pd.DataFrame, schema_date: str) -> Dict:
+        """
+        根据完整数据生成水位线
+
+        Args:
+            df: 合并后的完整数据
+            schema_date: 数据来源的Schema日期
+
+        Returns:
+            Dict: 水位线
+        """
+        updated = pd.to_datetime(df['更新时间'], errors='coerce').max()
+        return {
+            'schema_date': schema_date,
+            'max_updated': None if pd.isna(updated) else updated.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            'seen_ids': sorted(df['数据id'].dropna().astype(str).unique().tolist()),
+            'row_count': len(df),
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    @staticmethod
+    def merge(snapshot: pd.DataFrame,
+              changed: pd.DataFrame,
+              deleted_ids: Iterable[str]) -> pd.DataFrame:
+        """
+        将变化的行合并到快照
+
+        快照中被更新或删除的行先移除,再追加变化的行,
+        最后按创建时间降序排列(与 ORDER BY "创建时间" DESC 一致, NULL在前)。
+
+        Args:
+            snapshot: 上次运行的快照
+            changed: 新增或更新的行
+            deleted_ids: 已删除的数据id
+
+        Returns:
+            pd.DataFrame: 合并后的完整数据
+        """
+        replaced_ids = set(changed['数据id'].dropna().astype(str)) | set(deleted_ids)
+        kept = snapshot[~snapshot['数据id'].astype(str).isin(replaced_ids)]
+
+        parts = [part for part in (changed, kept) if len(part) > 0]
+        if not parts:
+            return snapshot.iloc[0:0]
+        merged = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+        created = pd.to_datetime(merged['创建时间'], errors='coerce')
+        order = created.sort_values(ascending=False, na_position='first', kind='stable').index
+        return merged.loc[order].reset_index(drop=True)
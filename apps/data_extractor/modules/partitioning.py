@@ -0,0 +1,175 @@
+"""
+范围分区模块
+按"创建时间"把一张大表的抽取拆分为K个范围分区,分区边界由 pg_stats 直方图
+或 min/max 自动计算,各分区在独立连接上并行读取后按创建时间降序拼接
+"""
+
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+
+# 列统计直方图(ANALYZE 生成),按值等频划分
+HISTOGRAM_QUERY = """
+SELECT histogram_bounds::text::text[] AS bounds
+FROM pg_stats
+WHERE schemaname = %s
+  AND tablename = %s
+  AND attname = %s;
+"""
+
+# 列的取值范围,用于没有统计信息时等宽划分
+MINMAX_QUERY = """
+SELECT min({column}) AS min_value, max({column}) AS max_value
+FROM {table};
+"""
+
+
+class RangePartition:
+    """单个范围分区: lower <= 列值 < upper (无边界时为None),或列值为NULL"""
+
+    def __init__(self, lower: Optional[str] = None, upper: Optional[str] = None, is_null: bool = False):
+        self.lower = lower
+        self.upper = upper
+        self.is_null = is_null
+
+    def where_sql(self, column: str) -> Tuple[str, tuple]:
+        """
+        生成分区的查询条件
+
+        Args:
+            column: 分区列的SQL表达式
+
+        Returns:
+            Tuple[str, tuple]: (WHERE条件, 参数)
+        """
+        if self.is_null:
+            return f"{column} IS NULL", ()
+
+        conditions = []
+        params = []
+        if self.lower is not None:
+            conditions.append(f"{column} >= %s")
+            params.append(self.lower)
+        if self.upper is not None:
+            conditions.append(f"{column} < %s")
+            params.append(self.upper)
+        return ' AND '.join(conditions) or f"{column} IS NOT NULL", tuple(params)
+
+    def __repr__(self) -> str:
+        if self.is_null:
+            return "RangePartition(NULL)"
+        return f"RangePartition([{self.lower}, {self.upper}))"
+
+
+class RangePartitioner:
+    """按列值范围拆分查询"""
+
+    def __init__(self, db, count: int, method: str = 'histogram'):
+        """
+        初始化分区器
+
+        Args:
+            db: 数据库连接器
+            count: 分区数
+            method: 边界计算方式 (histogram=pg_stats直方图等频, minmax=最小/最大值等宽)
+        """
+        if method not in ('histogram', 'minmax'):
+            raise ValueError(f"不支持的分区边界计算方式: {method}")
+
+        self.db = db
+        self.count = max(1, int(count))
+        self.method = method
+
+    @staticmethod
+    def pick_bounds(values: List[str], count: int) -> List[str]:
+        """
+        从有序的直方图边界中选出 count-1 个分区边界
+
+        Args:
+            values: 直方图边界(升序)
+            count: 分区数
+
+        Returns:
+            List[str]: 分区边界(升序,去重)
+        """
+        if len(values) < 3 or count <= 1:
+            return []
+
+        bounds = []
+        last = len(values) - 1
+        for i in range(1, count):
+            value = values[round(i * last / count)]
+            if not bounds or value != bounds[-1]:
+                bounds.append(value)
+        return bounds
+
+    @staticmethod
+    def split_range(min_value, max_value, count: int) -> List[str]:
+        """
+        把 [min_value, max_value] 等宽拆分为 count 段
+
+        Args:
+            min_value: 最小值
+            max_value: 最大值
+            count: 分区数
+
+        Returns:
+            List[str]: 分区边界(升序)
+        """
+        if pd.isna(min_value) or pd.isna(max_value) or count <= 1:
+            return []
+
+        min_value = pd.Timestamp(min_value)
+        max_value = pd.Timestamp(max_value)
+        if max_value <= min_value:
+            return []
+
+        step = (max_value - min_value) / count
+        return [str(min_value + step * i) for i in range(1, count)]
+
+    def get_bounds(self, schema: str, table: str, column: str) -> List[str]:
+        """
+        计算分区边界,直方图不可用时退回到 min/max
+
+        Args:
+            schema: Schema名称
+            table: 表名
+            column: 列名
+
+        Returns:
+            List[str]: 分区边界(升序)
+        """
+        if self.method == 'histogram' and self.db.backend != 'postgres':
+            logger.info(f"{self.db.backend} 后端没有直方图统计,使用 min/max 计算分区边界")
+        elif self.method == 'histogram':
+            df = self.db.execute_query(HISTOGRAM_QUERY, params=(schema, table, column))
+            values = df['bounds'].iloc[0] if len(df) > 0 else None
+            bounds = self.pick_bounds(list(values or []), self.count)
+            if bounds:
+                logger.info(f"分区边界(pg_stats直方图): {bounds}")
+                return bounds
+            logger.info(f"{schema}.{table} 没有可用的直方图统计,使用 min/max 计算分区边界")
+
+        df = self.db.execute_query(MINMAX_QUERY.format(
+            column=f'"{column}"', table=f'{schema}."{table}"'
+        ))
+        bounds = self.split_range(df.loc[0, 'min_value'], df.loc[0, 'max_value'], self.count)
+        logger.info(f"分区边界(min/max): {bounds}")
+        return bounds
+
+    @staticmethod
+    def build_partitions(bounds: List[str]) -> List[RangePartition]:
+        """
+        根据边界生成分区,顺序与 ORDER BY 列 DESC 一致: NULL分区在前,然后从新到旧
+
+        Args:
+            bounds: 分区边界(升序)
+
+        Returns:
+            List[RangePartition]: 分区列表
+        """
+        edges = [None] + list(bounds) + [None]
+        ranges = [RangePartition(edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+        return [RangePartition(is_null=True)] + ranges[::-1]
@@ -0,0 +1,144 @@
+"""
+抽取流水线模块
+当前线程从数据库按块读取结果放入有界队列,写入线程同时把上一块写入输出文件,
+读取(网络/数据库)和序列化(CPU)重叠执行
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+import pandas as pd
+from loguru import logger
+
+
+# 队列结束标记
+_END = object()
+
+
+class ExportPipeline:
+    """读取/写入流水线(生产者-消费者)"""
+
+    def __init__(self, queue_size: int = 4):
+        """
+        初始化流水线
+
+        Args:
+            queue_size: 队列中最多缓存的块数,写入跟不上时读取端阻塞(背压)
+        """
+        self.queue_size = max(1, int(queue_size))
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._error = None
+        self.metrics: Dict = {}
+
+    def _consume(self, consume: Callable[[pd.DataFrame], None]):
+        """写入线程: 从队列取出数据块并写入"""
+        try:
+            while True:
+                started = time.perf_counter()
+                chunk = self._queue.get()
+                self.metrics['consumer_idle_seconds'] += time.perf_counter() - started
+                if chunk is _END:
+                    return
+
+                started = time.perf_counter()
+                consume(chunk)
+                self.metrics['consumer_seconds'] += time.perf_counter() - started
+        except Exception as e:
+            self._error = e
+            # 清空队列,避免读取端阻塞
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _put(self, item) -> bool:
+        """放入队列,队列已满时阻塞;写入线程出错时返回False"""
+        started = time.perf_counter()
+        while self._error is None:
+            try:
+                self._queue.put(item, timeout=0.1)
+                self.metrics['producer_blocked_seconds'] += time.perf_counter() - started
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self, chunks: Iterable[pd.DataFrame], consume: Callable[[pd.DataFrame], None]) -> Dict:
+        """
+        执行流水线
+
+        Args:
+            chunks: 数据块迭代器(在当前线程中读取,使用当前线程的数据库连接)
+            consume: 写入函数(在写入线程中执行)
+
+        Returns:
+            Dict: 流水线统计(块数、行数、读取/写入耗时、背压阻塞时间、队列深度)
+        """
+        self.metrics = {
+            'chunks': 0,
+            'rows': 0,
+            'queue_size': self.queue_size,
+            'producer_seconds': 0.0,
+            'producer_blocked_seconds': 0.0,
+            'consumer_seconds': 0.0,
+            'consumer_idle_seconds': 0.0,
+            'max_queue_depth': 0,
+            'avg_queue_depth': 0.0,
+        }
+        depth_total = 0
+        started = time.perf_counter()
+
+        writer = threading.Thread(target=self._consume, args=(consume,),
+                                  name=f"{threading.current_thread().name}-writer", daemon=True)
+        writer.start()
+
+        iterator = iter(chunks)
+        try:
+            while True:
+                fetch_started = time.perf_counter()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                self.metrics['producer_seconds'] += time.perf_counter() - fetch_started
+
+                # 放入前的队列深度: 达到上限说明写入是瓶颈
+                depth = self._queue.qsize()
+                depth_total += depth
+                self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], depth)
+
+                if not self._put(chunk):
+                    break
+                self.metrics['chunks'] += 1
+                self.metrics['rows'] += len(chunk)
+        finally:
+            # 提前结束时关闭迭代器(释放服务端游标)
+            if hasattr(iterator, 'close'):
+                iterator.close()
+            self._put(_END)
+            writer.join()
+
+        if self._error is not None:
+            raise self._error
+
+        wall_seconds = time.perf_counter() - started
+        if self.metrics['chunks']:
+            self.metrics['avg_queue_depth'] = depth_total / self.metrics['chunks']
+        self.metrics['wall_seconds'] = wall_seconds
+        # 读取和写入重叠的时间
+        self.metrics['overlap_seconds'] = max(
+            0.0, self.metrics['producer_seconds'] + self.metrics['consumer_seconds'] - wall_seconds
+        )
+        self.metrics = {key: round(value, 4) if isinstance(value, float) else value
+                        for key, value in self.metrics.items()}
+
+        logger.info(
+            f"流水线完成: {self.metrics['chunks']} 块, {self.metrics['rows']} 行, "
+            f"读取 {self.metrics['producer_seconds']:.2f}s, 写入 {self.metrics['consumer_seconds']:.2f}s, "
+            f"重叠 {self.metrics['overlap_seconds']:.2f}s, 背压阻塞 "
+            f"{self.metrics['producer_blocked_seconds']:.2f}s, 最大队列深度 {self.metrics['max_queue_depth']}"
+        )
+        return self.metrics
@@ -0,0 +1,157 @@
+"""
+抽取规划模块
+根据 pg_class.reltuples 和 pg_stats 平均列宽估算结果集大小,
+按内存预算选择内存抽取(整表DataFrame)或流式抽取(按块读取并写入)
+"""
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+
+# 表的估算行数、数据文件大小和各列平均宽度(ANALYZE 生成的统计信息)
+TABLE_STATS_QUERY = """
+SELECT
+    c.reltuples::bigint AS reltuples,
+    pg_relation_size(c.oid) AS relation_bytes,
+    s.attname AS column_name,
+    s.avg_width AS avg_width
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stats s ON s.schemaname = n.nspname AND s.tablename = c.relname
+WHERE n.nspname = %s
+  AND c.relname = %s;
+"""
+
+MODE_MEMORY = 'memory'
+MODE_STREAM = 'stream'
+
+
+class ExtractPlanner:
+    """内存/流式抽取规划器"""
+
+    def __init__(self, db, memory_budget_mb: float = 1024, cell_overhead_bytes: int = 150):
+        """
+        初始化规划器
+
+        Args:
+            db: 数据库连接器
+            memory_budget_mb: 内存预算(MB),估算内存超出时使用流式抽取
+            cell_overhead_bytes: 每个单元格的额外内存(Python对象和Excel单元格对象)
+        """
+        self.db = db
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.cell_overhead_bytes = cell_overhead_bytes
+
+    def estimate_memory(self, rows: int, width: int, column_count: int) -> int:
+        """
+        估算结果集在内存中的大小
+
+        Args:
+            rows: 行数
+            width: 平均行宽(字节)
+            column_count: 列数
+
+        Returns:
+            int: 估算字节数
+        """
+        return int(rows * (width + column_count * self.cell_overhead_bytes))
+
+    def _decide(self, target: str, rows: Optional[int], width: Optional[int], column_count: int) -> Dict:
+        if rows is None:
+            plan = {'target': target, 'mode': MODE_MEMORY, 'rows': None,
+                    'reason': '没有可用的统计信息'}
+        else:
+            width = width or 0
+            estimated = self.estimate_memory(rows, width, column_count)
+            mode = MODE_STREAM if estimated > self.memory_budget_bytes else MODE_MEMORY
+            plan = {
+                'target': target,
+                'mode': mode,
+                'rows': rows,
+                'row_width': width,
+                'columns': column_count,
+                'estimated_mb': round(estimated / 1024 / 1024, 1),
+                'budget_mb': round(self.memory_budget_bytes / 1024 / 1024, 1),
+            }
+
+        logger.info(
+            f"抽取规划 {target}: {'流式' if plan['mode'] == MODE_STREAM else '内存'}抽取 "
+            f"(估算 {plan.get('rows')} 行, {plan.get('estimated_mb', '-')} MB, "
+            f"预算 {round(self.memory_budget_bytes / 1024 / 1024, 1)} MB)"
+        )
+        return plan
+
+    def plan_table(self, schema: str, table: str, columns: Optional[List[str]] = None) -> Dict:
+        """
+        规划整表抽取
+
+        行数取 pg_class.reltuples,行宽取 pg_stats 中各列平均宽度之和(只计算抽取的列);
+        表未 ANALYZE 时按数据文件大小估算。
+
+        Args:
+            schema: Schema名称
+            table: 表名
+            columns: 抽取的列(可选,默认所有列)
+
+        Returns:
+            Dict: 规划结果(mode、估算行数、行宽、估算内存)
+        """
+        target = f"{schema}.{table}"
+        df = self.db.execute_query(TABLE_STATS_QUERY, params=(schema, table))
+        if len(df) == 0:
+            return self._decide(target, None, None, 0)
+
+        reltuples = int(df['reltuples'].iloc[0])
+        relation_bytes = int(df['relation_bytes'].iloc[0])
+        widths = {
+            row.column_name: int(row.avg_width)
+            for row in df.itertuples()
+            if pd.notna(row.column_name) and pd.notna(row.avg_width)
+        }
+        if columns:
+            widths = {column: width for column, width in widths.items() if column in columns}
+        column_count = len(columns) if columns else max(len(widths), 1)
+
+        width = sum(widths.values())
+        if reltuples >= 0:
+            rows = reltuples
+            if not width and reltuples > 0:
+                width = relation_bytes // reltuples
+        elif width:
+            # 从未 ANALYZE 时 reltuples 为 -1,按数据文件大小和列宽估算行数
+            rows = relation_bytes // width
+        else:
+            return self._decide_by_size(target, relation_bytes, column_count)
+
+        return self._decide(target, rows, width, column_count)
+
+    def _decide_by_size(self, target: str, relation_bytes: int, column_count: int) -> Dict:
+        """只有数据文件大小时,按文件大小估算内存"""
+        estimated = relation_bytes * 2
+        mode = MODE_STREAM if estimated > self.memory_budget_bytes else MODE_MEMORY
+        logger.info(f"抽取规划 {target}: 没有统计信息,按数据文件大小 "
+                    f"{relation_bytes / 1024 / 1024:.1f} MB 估算,使用{'流式' if mode == MODE_STREAM else '内存'}抽取")
+        return {'target': target, 'mode': mode, 'rows': None, 'columns': column_count,
+                'estimated_mb': round(estimated / 1024 / 1024, 1),
+                'budget_mb': round(self.memory_budget_bytes / 1024 / 1024, 1)}
+
+    def plan_query(self, name: str, query: str, params: Optional[tuple] = None,
+                   column_count: int = 1) -> Dict:
+        """
+        规划带筛选条件的查询(使用 EXPLAIN 的估算行数和行宽)
+
+        Args:
+            name: 查询名称(用于日志)
+            query: SQL查询语句
+            params: 查询参数
+            column_count: 结果列数
+
+        Returns:
+            Dict: 规划结果
+        """
+        estimate = self.db.estimate_query(query, params)
+        if estimate is None:
+            return self._decide(name, None, None, column_count)
+        return self._decide(name, estimate['rows'], estimate['width'], column_count)
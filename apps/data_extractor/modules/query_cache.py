@@ -0,0 +1,233 @@
+"""
+查询结果缓存模块
+yxwtzb_YYYYMMDD 是每周生成后不再变化的快照,针对它们的查询结果
+以列式格式(parquet)缓存到本地磁盘,重复运行时不再访问数据库
+"""
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger
+
+
+# 不可变的周快照Schema
+SNAPSHOT_SCHEMA_PATTERN = re.compile(r'yxwtzb_\d{8}')
+
+# 可变的Schema(引用了这些Schema的查询不缓存)
+MUTABLE_SCHEMA_PATTERN = re.compile(r'\b(public|pg_catalog|information_schema)\s*\.', re.IGNORECASE)
+
+
+def resolve_cache_dir(config: Dict, directory: str) -> Path:
+    """
+    本地缓存目录: 相对路径按输出目录(output.directory)解析,与当前工作目录无关
+
+    Args:
+        config: 配置字典
+        directory: 配置的缓存目录
+
+    Returns:
+        Path: 缓存目录
+    """
+    path = Path(directory)
+    if path.is_absolute():
+        return path
+    return Path((config.get('output') or {}).get('directory', '.')) / path
+
+
+class QueryCache:
+    """查询结果磁盘缓存(按大小做LRU淘汰)"""
+
+    def __init__(self, cache_dir: Path, max_size_mb: float = 2048, refresh: bool = False):
+        """
+        初始化查询缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限(MB),超出时淘汰最久未使用的结果
+            refresh: 是否忽略已有缓存并重新查询(查询结果仍写入缓存)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_sql(query: str) -> str:
+        """规范化SQL: 合并空白并去掉末尾分号"""
+        return ' '.join(query.split()).rstrip(';').strip()
+
+    @staticmethod
+    def get_schemas(query: str) -> List[str]:
+        """获取SQL引用的周快照Schema"""
+        return sorted(set(SNAPSHOT_SCHEMA_PATTERN.findall(query)))
+
+    def is_cacheable(self, query: str) -> bool:
+        """
+        判断查询结果是否可以缓存
+
+        只缓存只读取周快照Schema的SELECT查询。
+
+        Args:
+            query: SQL查询语句
+
+        Returns:
+            bool: 是否可以缓存
+        """
+        normalized = self.normalize_sql(query)
+        if not normalized.upper().startswith('SELECT'):
+            return False
+        if MUTABLE_SCHEMA_PATTERN.search(normalized):
+            return False
+        return bool(self.get_schemas(normalized))
+
+    def make_key(self, query: str, params: Optional[tuple] = None, source: Optional[str] = None) -> str:
+        """
+        根据 (Schema, 规范化SQL, 参数) 生成缓存键
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            source: 数据来源(非默认数据库时区分缓存,例如本地数据库目录)
+
+        Returns:
+            str: 缓存键(sha256)
+        """
+        normalized = self.normalize_sql(query)
+        key = {
+            'schemas': self.get_schemas(normalized),
+            'sql': normalized,
+            'params': list(params) if params is not None else None,
+        }
+        if source is not None:
+            key['source'] = source
+        payload = json.dumps(
+            key,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        读取缓存的查询结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[pd.DataFrame]: 缓存的结果,未命中时返回None
+        """
+        path = self._path(key)
+        if self.refresh or not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            df = pd.read_parquet(path)
+            # 更新访问时间,用于LRU淘汰
+            path.touch()
+            self.hits += 1
+            return df
+        except Exception as e:
+            logger.warning(f"读取查询缓存失败,重新查询: {e}")
+            self.misses += 1
+            return None
+
+    def iter_batches(self, key: str, batch_size: int) -> Optional[Iterator[pd.DataFrame]]:
+        """
+        按块读取缓存的查询结果(每次只读取 batch_size 行,不加载整个文件)
+
+        Args:
+            key: 缓存键
+            batch_size: 每块行数
+
+        Returns:
+            Optional[Iterator[pd.DataFrame]]: 结果块迭代器,未命中时返回None
+        """
+        path = self._path(key)
+        if self.refresh or not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            parquet_file = pq.ParquetFile(path)
+            # 更新访问时间,用于LRU淘汰
+            path.touch()
+            self.hits += 1
+        except Exception as e:
+            logger.warning(f"读取查询缓存失败,重新查询: {e}")
+            self.misses += 1
+            return None
+
+        return self._read_batches(parquet_file, batch_size)
+
+    @staticmethod
+    def _read_batches(parquet_file: pq.ParquetFile, batch_size: int) -> Iterator[pd.DataFrame]:
+        """逐块转换为DataFrame,结果为空时返回一个只有列名的空DataFrame"""
+        try:
+            empty = True
+            for batch in parquet_file.iter_batches(batch_size=batch_size):
+                empty = False
+                yield batch.to_pandas()
+            if empty:
+                yield parquet_file.schema_arrow.empty_table().to_pandas()
+        finally:
+            parquet_file.close()
+
+    def put(self, key: str, df: pd.DataFrame):
+        """
+        写入查询结果并按大小淘汰旧缓存
+
+        Args:
+            key: 缓存键
+            df: 查询结果
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            df.to_parquet(tmp_path, index=False)
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"写入查询缓存失败: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self.evict(keep=path)
+
+    def evict(self, keep: Optional[Path] = None):
+        """
+        淘汰最久未使用的缓存,直到总大小不超过上限
+
+        Args:
+            keep: 不淘汰的缓存文件(刚写入的结果)
+        """
+        with self._lock:
+            files = []
+            for path in self.cache_dir.glob('*.parquet'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            total_size = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files, key=lambda item: item[0]):
+                if total_size <= self.max_size_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total_size -= size
+                logger.debug(f"淘汰查询缓存: {path.name}")
@@ -0,0 +1,192 @@
+"""
+查询统计模块
+记录每条SQL的执行耗时、客户端读取耗时、行数和数据量,
+可选采集 EXPLAIN (ANALYZE, BUFFERS) 执行计划,运行结束后输出JSON报告
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+class QueryStats:
+    """查询统计收集器(线程安全)"""
+
+    def __init__(self, explain: bool = False):
+        """
+        初始化查询统计
+
+        Args:
+            explain: 是否为每条查询采集 EXPLAIN (ANALYZE, BUFFERS) 执行计划
+                     (会额外执行一次查询)
+        """
+        self.explain = explain
+        self.queries: List[Dict] = []
+        self.tasks: Dict[str, Dict] = {}
+        self.pipelines: Dict[str, Dict] = {}
+        self.plans: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def current_label(self) -> Optional[str]:
+        """当前线程正在执行的任务名"""
+        return getattr(self._local, 'label', None)
+
+    @contextmanager
+    def label(self, name: str):
+        """
+        标记当前线程中执行的查询属于哪个任务
+
+        Args:
+            name: 任务名
+        """
+        previous = self.current_label
+        self._local.label = name
+        try:
+            yield
+        finally:
+            self._local.label = previous
+
+    def record(self,
+               query: str,
+               mode: str,
+               rows: int,
+               bytes_count: int,
+               server_seconds: float,
+               fetch_seconds: float,
+               plan: Optional[Dict] = None):
+        """
+        记录一条查询
+
+        Args:
+            query: SQL查询语句
+            mode: 读取方式 (pandas/stream/copy/cache)
+            rows: 返回行数
+            bytes_count: 数据量(copy为实际传输字节数,其余为结果集内存估算)
+            server_seconds: 数据库执行及结果传输耗时(秒)
+            fetch_seconds: 客户端解析和构造DataFrame耗时(秒)
+            plan: EXPLAIN (ANALYZE, BUFFERS) 执行计划
+        """
+        total_seconds = server_seconds + fetch_seconds
+        entry = {
+            'task': self.current_label,
+            'mode': mode,
+            'sql': ' '.join(query.split()),
+            'rows': int(rows),
+            'bytes': int(bytes_count),
+            'server_seconds': round(server_seconds, 4),
+            'fetch_seconds': round(fetch_seconds, 4),
+            'total_seconds': round(total_seconds, 4),
+            'rows_per_second': round(rows / total_seconds, 1) if total_seconds > 0 else None,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        if plan is not None:
+            entry['explain_execution_ms'] = plan.get('Execution Time')
+            entry['explain_planning_ms'] = plan.get('Planning Time')
+            entry['plan'] = plan
+
+        with self._lock:
+            self.queries.append(entry)
+
+        logger.debug(
+            f"查询统计[{entry['task']}]: {mode}, {rows} 行, "
+            f"执行 {server_seconds:.3f}s, 读取 {fetch_seconds:.3f}s"
+        )
+
+    def record_task(self, task_key: str, seconds: float, success: bool, **extra):
+        """
+        记录任务耗时
+
+        Args:
+            task_key: 任务键名
+            seconds: 耗时(秒)
+            success: 是否成功
+            **extra: 其他需要写入报告的信息
+        """
+        with self._lock:
+            self.tasks[task_key] = {
+                'seconds': round(seconds, 4),
+                'success': success,
+                **extra,
+            }
+
+    def record_pipeline(self, metrics: Dict):
+        """
+        记录当前任务的读取/写入流水线统计
+
+        Args:
+            metrics: 流水线统计(块数、读取/写入耗时、背压阻塞时间、队列深度等)
+        """
+        with self._lock:
+            self.pipelines[self.current_label or '-'] = dict(metrics)
+
+    def record_plan(self, plan: Dict):
+        """
+        记录抽取规划结果(内存/流式选择及估算依据)
+
+        Args:
+            plan: 规划结果
+        """
+        with self._lock:
+            self.plans.append({'task': self.current_label, **plan})
+
+    def summary(self, queries: Optional[List[Dict]] = None) -> Dict:
+        """
+        按任务汇总查询统计
+
+        Args:
+            queries: 需要汇总的查询(默认所有查询)
+
+        Returns:
+            Dict: 每个任务的查询数、行数、数据量和耗时
+        """
+        by_task: Dict[str, Dict] = {}
+        for entry in self.queries if queries is None else queries:
+            task = by_task.setdefault(entry['task'] or '-', {
+                'queries': 0, 'rows': 0, 'bytes': 0,
+                'server_seconds': 0.0, 'fetch_seconds': 0.0,
+            })
+            task['queries'] += 1
+            task['rows'] += entry['rows']
+            task['bytes'] += entry['bytes']
+            task['server_seconds'] = round(task['server_seconds'] + entry['server_seconds'], 4)
+            task['fetch_seconds'] = round(task['fetch_seconds'] + entry['fetch_seconds'], 4)
+        return by_task
+
+    def write_report(self, path: Path, label_suffix: Optional[str] = None, **run_info) -> Path:
+        """
+        输出JSON格式的运行报告
+
+        Args:
+            path: 报告文件路径
+            label_suffix: 只输出任务名以此结尾的统计(可选,多个Schema共用连接器时区分各自的任务)
+            **run_info: 运行信息(Schema日期、筛选范围、总耗时等)
+
+        Returns:
+            Path: 报告文件路径
+        """
+        def included(label: Optional[str]) -> bool:
+            return label_suffix is None or (label or '').endswith(label_suffix)
+
+        with self._lock:
+            queries = [entry for entry in self.queries if included(entry['task'])]
+            report = {
+                **run_info,
+                'tasks': {label: task for label, task in self.tasks.items() if included(label)},
+                'summary': self.summary(queries),
+                'pipelines': {label: metrics for label, metrics in self.pipelines.items() if included(label)},
+                'plans': [plan for plan in self.plans if included(plan['task'])],
+                'queries': queries,
+            }
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+        logger.info(f"查询统计报告: {path}")
+        return path
@@ -0,0 +1,130 @@
+"""
+运行清单模块
+在输出目录记录每个已完成任务的参数、行数和输出文件校验和,
+--resume 模式下跳过参数和输出文件都未变化的任务
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+# 同一清单文件可能被多个抽取器同时更新(例如按Schema分区布局的历史回填)
+_FILE_LOCKS: Dict[str, threading.Lock] = {}
+_FILE_LOCKS_GUARD = threading.Lock()
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    with _FILE_LOCKS_GUARD:
+        return _FILE_LOCKS.setdefault(str(path.resolve()), threading.Lock())
+
+
+class RunManifest:
+    """任务运行清单"""
+
+    def __init__(self, path: Path):
+        """
+        初始化运行清单
+
+        Args:
+            path: 清单文件路径
+        """
+        self.path = Path(path)
+        self._lock = _file_lock(self.path)
+
+    @staticmethod
+    def file_checksum(path: Path) -> str:
+        """
+        计算文件的sha256校验和
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            str: 校验和
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _read(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('tasks', {})
+        except Exception as e:
+            logger.warning(f"读取运行清单失败,忽略已有记录: {e}")
+            return {}
+
+    def _write(self, tasks: Dict):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().isoformat(timespec='seconds'), 'tasks': tasks},
+                      f, ensure_ascii=False, indent=2, default=str)
+        tmp_path.replace(self.path)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """获取任务的清单记录"""
+        with self._lock:
+            return self._read().get(key)
+
+    def is_complete(self, key: str, params: Dict) -> bool:
+        """
+        任务是否已按相同参数完成,且输出文件未被修改
+
+        Args:
+            key: 任务键(任务@Schema日期)
+            params: 本次运行的任务参数
+
+        Returns:
+            bool: 是否可以跳过
+        """
+        entry = self.get(key)
+        if entry is None:
+            return False
+        if entry.get('params') != json.loads(json.dumps(params, default=str)):
+            logger.info(f"{key}: 参数已变化,重新执行")
+            return False
+
+        for output in entry.get('outputs', []):
+            path = Path(output['path'])
+            if not path.exists() or self.file_checksum(path) != output['sha256']:
+                logger.info(f"{key}: 输出文件缺失或已修改 ({path}),重新执行")
+                return False
+        return True
+
+    def record(self, key: str, params: Dict, files: List[Path], rows: int):
+        """
+        记录已完成的任务
+
+        Args:
+            key: 任务键(任务@Schema日期)
+            params: 任务参数
+            files: 输出文件
+            rows: 输出行数
+        """
+        outputs = [{'path': str(path), 'sha256': self.file_checksum(path)} for path in files]
+        with self._lock:
+            tasks = self._read()
+            tasks[key] = {
+                'params': params,
+                'rows': int(rows),
+                'outputs': outputs,
+                'completed_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._write(tasks)
+
+    def remove(self, key: str):
+        """删除任务的清单记录(任务失败时调用)"""
+        with self._lock:
+            tasks = self._read()
+            if tasks.pop(key, None) is not None:
+                self._write(tasks)
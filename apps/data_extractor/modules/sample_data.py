@@ -0,0 +1,180 @@
+"""
+本地样例数据模块
+从 data/*.xlsx 读取,或按固定随机种子生成任意规模的样例数据,
+用于填充本地数据库(见 sqlite_backend)进行离线运行和基准测试
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+# 各表的列(与生产库一致)
+TABLE_COLUMNS = {
+    '导出原始数据': [
+        '序号', '数据id', '问题提出人', '所属客户项目', '项目类型', '项目阶段', '所涉产品', '产品名称',
+        '软件版本号截图', '软件版本号', '紧急程度', '问题类别', '影响说明', '问题描述', '环境描述',
+        '技术排查记录', '期望解决时间', '附件', '处理方式', '严重程度', '非研发处理问题类别',
+        '非研发问题处理记录', '硬件故障处理记录', '解决方案反馈', '发布附件', '计划完成时间',
+        '是否已提bug', '二线技术处理', '硬件故障处理接口人', '问题筛选人', '抄送人员', '产品经理',
+        '产品线负责人', '研发解决时间', '研发排查过程记录', '流程内容准确性评价', '研发交付日期偏差',
+        '研发负责人', '审批编号', '创建时间', '创建人', '当前负责人', '审批结果', '审批状态',
+        '更新时间', '创建人部门', '审批单标题', '历史审批人', '耗时', '审批记录', '是否剔除',
+    ],
+    '计算解决率过程数据': [
+        '序号', '数据id', '问题提出人', '所属客户项目', '项目类型', '项目阶段', '所涉产品',
+        '软件版本号', '紧急程度', '问题类别', '影响说明', '问题描述', '环境描述', '技术排查记录',
+        '期望解决时间', '附件', '处理方式', '严重程度', '非研发处理问题类别', '非研发问题处理记录',
+        '解决方案反馈', '发布附件', '计划完成时间', '是否已提bug', '二线技术处理', '问题筛选人',
+        '抄送人员', '产品经理', '产品线负责人', '研发解决时间', '研发交付日期偏差', '研发负责人',
+        '审批编号', '创建时间', '创建人', '当前负责人', '审批结果', '审批状态', '更新时间',
+        '创建人部门', '用于交付日期偏差统计', '流程内容准确性评价', '是否剔除', '所属部门',
+    ],
+}
+
+# data 目录中各表对应的Excel文件
+XLSX_SOURCES = {
+    '导出原始数据': '原始.xlsx',
+    '计算解决率过程数据': '计算.xlsx',
+}
+
+# 维表(public Schema)
+DIMENSION_TABLE_NAME = '各产品对应的测试部长'
+
+# 取值集合及比例(None表示空值)
+VOCABULARIES = {
+    '审批状态': (['审批中', '已结束', '终止'], [0.3, 0.65, 0.05]),
+    '审批结果': (['--', '审批通过', '审批未通过'], [0.3, 0.65, 0.05]),
+    '处理方式': ([None, '研发处理', '非研发处理', '硬件故障处理'], [0.2, 0.5, 0.25, 0.05]),
+    '非研发处理问题类别': ([None, '需求', '咨询', '配置问题'], [0.6, 0.15, 0.15, 0.1]),
+    '紧急程度': (['一般', '紧急', '非常紧急'], [0.7, 0.2, 0.1]),
+    '严重程度': (['一般', '严重', '致命'], [0.7, 0.25, 0.05]),
+    '项目类型': (['交付项目', '售前项目', '维保项目'], None),
+    '项目阶段': (['实施', '验收', '运维'], None),
+    '问题类别': (['功能缺陷', '性能问题', '兼容性问题', '使用咨询'], None),
+    '是否已提bug': (['是', '否'], None),
+    '是否剔除': (['NO', 'YES'], [0.95, 0.05]),
+    '流程内容准确性评价': ([None, '准确', '不准确'], [0.5, 0.45, 0.05]),
+}
+
+PERSON_COLUMNS = [
+    '问题提出人', '问题筛选人', '产品经理', '产品线负责人', '研发负责人', '创建人',
+    '当前负责人', '硬件故障处理接口人', '二线技术处理',
+]
+DEPARTMENT_COLUMNS = ['创建人部门', '所属部门']
+EMPTY_COLUMNS = ['产品名称', '硬件故障处理记录']
+
+PRODUCT_COUNT = 22
+PERSON_COUNT = 200
+TEXT_POOL_SIZE = 1000
+
+
+def load_xlsx_dataset(data_dir: Path) -> Dict[str, pd.DataFrame]:
+    """
+    读取 data 目录中的Excel文件
+
+    Args:
+        data_dir: data 目录
+
+    Returns:
+        Dict[str, pd.DataFrame]: 表名 -> 数据
+    """
+    tables = {}
+    for table, filename in XLSX_SOURCES.items():
+        path = Path(data_dir) / filename
+        tables[table] = pd.read_excel(path)
+        logger.info(f"读取样例数据: {path} ({len(tables[table])} 行)")
+    return tables
+
+
+def generate_dataset(rows: int, end_date: str, days: int = 365, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    生成样例数据(相同参数生成的数据完全相同)
+
+    两张表包含同一批问题,创建时间均匀分布在 end_date 之前的 days 天内。
+
+    Args:
+        rows: 行数
+        end_date: 数据截止日期(通常为Schema日期)
+        days: 创建时间覆盖的天数
+        seed: 随机种子
+
+    Returns:
+        Dict[str, pd.DataFrame]: 表名 -> 数据
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end_date)
+
+    def pick(values: List[Optional[str]], p: Optional[List[float]] = None) -> np.ndarray:
+        return np.array(values, dtype=object)[rng.choice(len(values), size=rows, p=p)]
+
+    def seconds(low: int, high: int) -> pd.TimedeltaIndex:
+        return pd.to_timedelta(rng.integers(low, high, rows), unit='s')
+
+    def nullify(values, ratio: float):
+        return values.where(rng.random(rows) >= ratio)
+
+    created = pd.Series(end - seconds(1, days * 86400))
+    updated = pd.Series(created + seconds(0, 30 * 86400)).clip(upper=end)
+    expected = created.dt.normalize() + pd.to_timedelta(rng.integers(0, 30, rows), unit='D')
+    planned = nullify(expected + pd.to_timedelta(rng.integers(-5, 15, rows), unit='D'), 0.4)
+    resolved = created + seconds(3600, 40 * 86400)
+    resolved = nullify(resolved.where(resolved < end), 0.3)
+
+    data = {
+        '序号': np.arange(1, rows + 1),
+        '数据id': [f"sample{seed:04d}{i:012d}" for i in range(rows)],
+        '审批编号': [f"2025{i:010d}" for i in range(rows)],
+        '创建时间': created,
+        '更新时间': updated,
+        '期望解决时间': expected,
+        '计划完成时间': planned,
+        '研发解决时间': resolved,
+        '所涉产品': pick([f"产品{i:02d}" for i in range(1, PRODUCT_COUNT + 1)]),
+        '研发交付日期偏差': (resolved.dt.normalize() - planned).dt.days.astype(float),
+        '用于交付日期偏差统计': nullify(pd.Series(rng.integers(0, 4, rows).astype(float)), 0.3),
+    }
+    for column, (values, p) in VOCABULARIES.items():
+        data[column] = pick(values, p)
+    people = [f"员工{i:03d}" for i in range(PERSON_COUNT)]
+    for column in PERSON_COLUMNS:
+        data[column] = pick(people)
+    for column in DEPARTMENT_COLUMNS:
+        data[column] = pick([f"部门{i:02d}" for i in range(1, 11)])
+    for column in EMPTY_COLUMNS:
+        data[column] = np.full(rows, np.nan)
+
+    # 其余文本列从固定的文本池中取值(长度不一)
+    columns = list(dict.fromkeys(TABLE_COLUMNS['导出原始数据'] + TABLE_COLUMNS['计算解决率过程数据']))
+    for column in columns:
+        if column not in data:
+            pool = [f"{column}{i}" + '说明' * (i % 40) for i in range(TEXT_POOL_SIZE)]
+            data[column] = pick(pool)
+
+    df = pd.DataFrame(data)
+    logger.info(f"生成样例数据: {rows} 行, 创建时间 {created.min()} 至 {created.max()}")
+    return {table: df[table_columns].copy() for table, table_columns in TABLE_COLUMNS.items()}
+
+
+def build_dimension_table(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    根据数据中出现的产品生成"各产品对应的测试部长"维表
+
+    Args:
+        tables: 表名 -> 数据
+
+    Returns:
+        pd.DataFrame: 维表数据
+    """
+    products = sorted({
+        product
+        for df in tables.values() if '所涉产品' in df.columns
+        for product in df['所涉产品'].dropna().astype(str)
+    })
+    return pd.DataFrame({
+        '具体的产品': products,
+        '部门负责人': [f"测试部长{i % 5 + 1}" for i in range(len(products))],
+    })
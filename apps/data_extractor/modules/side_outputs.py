@@ -0,0 +1,160 @@
+"""
+列式输出模块
+把任务结果同时(或代替xlsx)写为 Parquet、Arrow IPC 或 gzip 压缩的CSV,
+写入和下游读取都比xlsx快得多。支持按块追加,流水线导出时与xlsx同步写入
+"""
+
+import gzip
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+from loguru import logger
+
+
+# 输出格式 -> 文件后缀(替换xlsx文件名的后缀)
+FORMAT_SUFFIXES = {
+    'xlsx': '.xlsx',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+    'csv.gz': '.csv.gz',
+}
+
+# 格式别名
+FORMAT_ALIASES = {
+    'feather': 'arrow',
+    'ipc': 'arrow',
+    'csv': 'csv.gz',
+}
+
+
+def normalize_formats(formats: Optional[List[str]]) -> List[str]:
+    """
+    校验并规范化输出格式列表
+
+    Args:
+        formats: 配置中的格式(None表示只输出xlsx)
+
+    Returns:
+        List[str]: 去重后的格式
+    """
+    normalized = []
+    for output_format in formats or ['xlsx']:
+        output_format = FORMAT_ALIASES.get(str(output_format).lower(), str(output_format).lower())
+        if output_format not in FORMAT_SUFFIXES:
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        if output_format not in normalized:
+            normalized.append(output_format)
+    return normalized
+
+
+def output_path(xlsx_path: Path, output_format: str) -> Path:
+    """与xlsx文件同名(含日期前缀)、后缀不同的输出文件路径"""
+    xlsx_path = Path(xlsx_path)
+    return xlsx_path.with_name(xlsx_path.stem + FORMAT_SUFFIXES[output_format])
+
+
+class SideOutputWriter:
+    """列式输出写入器(各格式共用同一个Arrow表)"""
+
+    def __init__(self, xlsx_path: Path, formats: List[str], schema: Optional[pa.Schema] = None):
+        """
+        初始化写入器
+
+        Args:
+            xlsx_path: 任务的xlsx输出路径(决定文件名)
+            formats: 输出格式(xlsx由调用方写入,这里忽略)
+            schema: 表结构(可选,按块写入时应按查询结果的列类型给出;
+                    未给出时由第一块推断,第一块中全部为空的列按文本处理)
+        """
+        self.formats = [output_format for output_format in formats if output_format != 'xlsx']
+        self.paths: Dict[str, Path] = {
+            output_format: output_path(xlsx_path, output_format) for output_format in self.formats
+        }
+        self.schema = schema
+        self.rows_written = 0
+        # 已创建的文件
+        self.written: List[Path] = []
+        self._writers: Dict = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _first_schema(table: pa.Table) -> pa.Schema:
+        """第一块中全部为空的列按文本处理,后续块才能按同一结构写入"""
+        return pa.schema([
+            field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+            for field in table.schema
+        ]).remove_metadata()
+
+    def _to_table(self, df: pd.DataFrame) -> pa.Table:
+        """把数据块转换为表结构一致的Arrow表(块内推断的类型与表结构不同时按列转换)"""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.schema is None:
+            self.schema = self._first_schema(table)
+        columns = []
+        for field in self.schema:
+            column = table.column(field.name)
+            columns.append(column if column.type == field.type else column.cast(field.type))
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def write_chunk(self, df: pd.DataFrame):
+        """
+        追加一块数据(列与第一块一致)
+
+        Args:
+            df: 数据块
+        """
+        if not self.formats:
+            return
+        table = self._to_table(df)
+
+        for output_format in self.formats:
+            writer = self._writers.get(output_format)
+            path = self.paths[output_format]
+            if writer is None:
+                self.written.append(path)
+            if output_format == 'parquet':
+                if writer is None:
+                    writer = self._writers[output_format] = pq.ParquetWriter(str(path), self.schema)
+                writer.write_table(table)
+            elif output_format == 'arrow':
+                if writer is None:
+                    writer = self._writers[output_format] = pa_ipc.new_file(str(path), self.schema)
+                writer.write_table(table)
+            else:
+                header = writer is None
+                if writer is None:
+                    writer = self._writers[output_format] = gzip.open(path, 'wt', encoding='utf-8', newline='')
+                df.to_csv(writer, index=False, header=header)
+
+        self.rows_written += len(df)
+
+    def close(self):
+        """关闭所有文件"""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        for path in self.written:
+            logger.info(f"列式输出: {path} ({self.rows_written} 行)")
+
+    def write_frame(self, df: pd.DataFrame) -> List[Path]:
+        """
+        写入整个DataFrame并关闭
+
+        Args:
+            df: 数据
+
+        Returns:
+            List[Path]: 写入的文件
+        """
+        self.write_chunk(df)
+        self.close()
+        return list(self.written)
@@ -0,0 +1,507 @@
+"""
+SQLite本地数据库后端
+每个Schema对应目录中的一个SQLite文件(<Schema>.db),查询时按需 ATTACH 为同名Schema,
+任务SQL(yxwtzb_<日期>."表名"、public."表名" 和 %s 参数)无需修改即可执行,
+用于无法连接生产库时的离线运行、基准测试和性能分析
+"""
+
+import csv
+import io
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from .db_connector import COPY_NULL_MARKER, DatabaseConnector
+
+
+# 声明为 TIMESTAMP 的列读取为datetime(与PostgreSQL的timestamp列一致)
+def _convert_timestamp(value: bytes):
+    text = value.decode('utf-8')
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+# = ANY(%s) 数组参数展开为 IN (?, ...),其余 %s 替换为 ?
+_PLACEHOLDER_RE = re.compile(r"=\s*ANY\(\s*%s\s*\)|%s")
+# PostgreSQL 类型转换 (::text, ::bigint[] 等)
+_CAST_RE = re.compile(r"::\s*\w+(\[\])?")
+# 带小数秒的时间文本参数
+_TIMESTAMP_TEXT_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}\.\d+$')
+# SQL中 Schema.表名 形式的引用
+_SCHEMA_REF_RE = re.compile(r'(?<![\w"])([A-Za-z_]\w*)\s*\.\s*[\w"]')
+
+# 按样本值推断的类型OID(与 describe_query 的PostgreSQL结果对应)
+_SAMPLE_ROWS = 200
+_TYPE_OIDS = {bool: 16, int: 20, float: 701, datetime: 1114, date: 1082}
+_TEXT_OID = 25
+
+
+def translate_query(query: str, params: Optional[tuple] = None) -> Tuple[str, list]:
+    """
+    把PostgreSQL风格的SQL转换为SQLite可执行的SQL
+
+    - %s 参数替换为 ?
+    - 列 = ANY(%s) 展开为 列 IN (?, ...)
+    - 去掉 ::类型 转换
+
+    Args:
+        query: SQL查询语句
+        params: 查询参数
+
+    Returns:
+        Tuple[str, list]: (SQLite语句, 参数)
+    """
+    params = list(params or ())
+    values = []
+    position = 0
+
+    def replace(match) -> str:
+        nonlocal position
+        value = params[position]
+        position += 1
+        if match.group(0) == '%s':
+            values.append(_adapt(value))
+            return '?'
+        items = [_adapt(item) for item in value]
+        values.extend(items)
+        return f"IN ({', '.join('?' * len(items))})"
+
+    sql = _PLACEHOLDER_RE.sub(replace, _CAST_RE.sub('', query))
+    return sql, values
+
+
+def _adapt(value):
+    """
+    参数值转换为SQLite支持的类型
+
+    时间以文本比较,统一为与存储格式一致的 'YYYY-MM-DD HH:MM:SS'(有毫秒时保留),
+    例如增量水位线 '2025-12-29 10:00:00.000000' 转换为 '2025-12-29 10:00:00'。
+    """
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='microseconds' if value.microsecond else 'seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and _TIMESTAMP_TEXT_RE.match(value):
+        return value.replace('T', ' ').rstrip('0').rstrip('.')
+    return value
+
+
+class SQLiteCursor:
+    """执行PostgreSQL风格SQL的SQLite游标"""
+
+    def __init__(self, connection: 'SQLiteConnection'):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+        # 与psycopg2服务端游标的接口一致(SQLite游标本身按需逐行读取)
+        self.itersize = 2000
+
+    def execute(self, query: str, params: Optional[tuple] = None):
+        self.connection.attach_referenced(query)
+        sql, values = translate_query(query, params)
+        self._cursor.execute(sql, values)
+        return self
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """SQLite连接: Schema文件按需 ATTACH"""
+
+    def __init__(self, directory: Path):
+        """
+        打开连接
+
+        Args:
+            directory: Schema文件目录
+        """
+        self.directory = Path(directory)
+        self.raw = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES,
+                                   check_same_thread=False)
+        self.closed = 0
+        # 已附加的Schema(最近使用的在后)
+        self._attached: List[str] = []
+        self._max_attached = self.raw.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) \
+            if hasattr(self.raw, 'getlimit') else 10
+
+    def schema_path(self, schema: str) -> Path:
+        """Schema对应的数据库文件"""
+        return self.directory / f"{schema}.db"
+
+    def attach(self, schema: str, keep: Tuple[str, ...] = ()) -> bool:
+        """
+        附加Schema文件,超出SQLite的附加数量上限时分离最久未使用的Schema
+
+        Args:
+            schema: Schema名称
+            keep: 本次查询同时使用、不能分离的Schema
+
+        Returns:
+            bool: Schema文件是否存在
+        """
+        if schema in self._attached:
+            self._attached.remove(schema)
+            self._attached.append(schema)
+            return True
+
+        path = self.schema_path(schema)
+        if not path.exists():
+            return False
+
+        while len(self._attached) >= self._max_attached:
+            victim = next(name for name in self._attached if name not in keep)
+            self.raw.execute(f'DETACH DATABASE "{victim}"')
+            self._attached.remove(victim)
+
+        self.raw.execute(f'ATTACH DATABASE ? AS "{schema}"', (str(path),))
+        self._attached.append(schema)
+        return True
+
+    def attach_referenced(self, query: str):
+        """附加SQL中引用的所有Schema"""
+        schemas = tuple(dict.fromkeys(_SCHEMA_REF_RE.findall(query)))
+        for schema in schemas:
+            self.attach(schema, keep=schemas)
+
+    def cursor(self, name: Optional[str] = None) -> SQLiteCursor:
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+        self.closed = 1
+
+
+class SQLiteConnector(DatabaseConnector):
+    """SQLite本地数据库连接器"""
+
+    backend = 'sqlite'
+
+    def __init__(self, config: Dict):
+        """
+        初始化SQLite连接器
+
+        Args:
+            config: 配置字典,database.sqlite.directory 为Schema文件目录
+        """
+        super().__init__(config)
+        sqlite_config = self.config.get('sqlite') or {}
+        self.directory = Path(sqlite_config.get('directory', 'data/sqlite'))
+
+    @property
+    def cache_source(self) -> Optional[str]:
+        return f"sqlite:{self.directory.resolve()}"
+
+    def describe_target(self) -> str:
+        return f"SQLite {self.directory}"
+
+    def _create_connection(self):
+        """打开一个SQLite连接"""
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f"本地数据库目录不存在: {self.directory}")
+        return SQLiteConnection(self.directory)
+
+    def _explain(self, conn, query: str, params: Optional[tuple] = None) -> Optional[Dict]:
+        """采集 EXPLAIN QUERY PLAN (SQLite没有实际执行统计)"""
+        if not self.stats.explain:
+            return None
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN {self._strip_query(query)}", params)
+            steps = [row[-1] for row in cursor.fetchall()]
+            cursor.close()
+            return {'Query Plan': steps}
+        except Exception as e:
+            logger.warning(f"采集执行计划失败: {e}")
+            return None
+
+    def estimate_query(self, query: str, params: Optional[tuple] = None) -> Optional[Dict]:
+        """SQLite没有查询的估算行数"""
+        return None
+
+    def describe_query(self, query: str, params: Optional[tuple] = None) -> List[Tuple[str, int]]:
+        """
+        获取查询结果的列名和类型OID(SQLite的结果列没有类型,按前若干行的值推断)
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+
+        Returns:
+            List[Tuple[str, int]]: (列名, 类型OID) 列表
+        """
+        sample_sql = f"SELECT * FROM ({self._strip_query(query)}) AS _q LIMIT {_SAMPLE_ROWS}"
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sample_sql, params)
+            rows = cursor.fetchall()
+            names = [desc[0] for desc in cursor.description]
+            cursor.close()
+
+        columns = []
+        for index, name in enumerate(names):
+            value = next((row[index] for row in rows if row[index] is not None), None)
+            columns.append((name, _TYPE_OIDS.get(type(value), _TEXT_OID)))
+        return columns
+
+    def _copy_csv(self, conn, query: str, params: Optional[tuple], target):
+        """
+        以与 COPY ... WITH (FORMAT csv, HEADER true, NULL '\\N') 相同的格式写入查询结果
+
+        Args:
+            conn: 数据库连接
+            query: SQL查询语句
+            params: 查询参数
+            target: 可写的二进制文件对象
+
+        Returns:
+            int: 行数
+        """
+        cursor = conn.cursor()
+        cursor.execute(self._strip_query(query), params)
+
+        text = io.TextIOWrapper(target, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow([desc[0] for desc in cursor.description])
+
+        rowcount = 0
+        while True:
+            rows = cursor.fetchmany(cursor.itersize)
+            if not rows:
+                break
+            writer.writerows(
+                [COPY_NULL_MARKER if value is None
+                 else ('t' if value else 'f') if isinstance(value, bool)
+                 else value.isoformat(sep=' ') if isinstance(value, datetime)
+                 else value
+                 for value in row]
+                for row in rows
+            )
+            rowcount += len(rows)
+
+        text.flush()
+        text.detach()
+        cursor.close()
+        return rowcount
+
+    def materialize(self, schema: str, name: str, query: str) -> bool:
+        """
+        创建或重建汇总表(SQLite没有物化视图)
+
+        Args:
+            schema: Schema名称
+            name: 汇总表名称
+            query: 汇总查询
+
+        Returns:
+            bool: 是否新建
+        """
+        # 汇总Schema的文件不存在时新建
+        path = self.directory / f"{schema}.db"
+        if not path.exists():
+            sqlite3.connect(path).close()
+
+        exists = self.table_exists(schema, name)
+        with self.get_connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f'DROP TABLE IF EXISTS {schema}."{name}";')
+                cursor.execute(f'CREATE TABLE {schema}."{name}" AS {self._strip_query(query)};')
+                cursor.close()
+                conn.commit()
+            except Exception as e:
+                logger.error(f"创建汇总表失败 {schema}.{name}: {e}")
+                conn.rollback()
+                raise
+        return not exists
+
+    def check_create_privilege(self, schema: str) -> Optional[str]:
+        """检查能否写入Schema文件(文件不存在时检查能否在目录中新建)"""
+        path = self.directory / f"{schema}.db"
+        target = path if path.exists() else self.directory
+        if not os.access(target, os.W_OK):
+            return f"没有写入权限: {target}"
+        return None
+
+    def list_indexes(self, schema: str, table_name: str) -> Dict[str, List[str]]:
+        """
+        列出表上的索引及其列
+
+        Args:
+            schema: Schema名称
+            table_name: 表名
+
+        Returns:
+            Dict[str, List[str]]: 索引名 -> 列名列表
+        """
+        indexes: Dict[str, List[str]] = {}
+        with self.get_connection() as conn:
+            if not conn.attach(schema):
+                return indexes
+            cursor = conn.cursor()
+            cursor.execute(f'PRAGMA "{schema}".index_list("{table_name}")')
+            names = [row[1] for row in cursor.fetchall()]
+            for name in names:
+                cursor.execute(f'PRAGMA "{schema}".index_info("{name}")')
+                indexes[name] = [row[2] for row in sorted(cursor.fetchall())]
+            cursor.close()
+        return indexes
+
+    def _table_info(self, schema: str, table_name: str) -> List[Tuple[str, str]]:
+        """读取表的 (列名, 声明类型),表不存在时返回空列表"""
+        with self.get_connection() as conn:
+            if not conn.attach(schema):
+                return []
+            cursor = conn.cursor()
+            cursor.execute(f'PRAGMA "{schema}".table_info("{table_name}")')
+            columns = [(row[1], row[2].lower()) for row in cursor.fetchall()]
+            cursor.close()
+        return columns
+
+    def _list_tables(self, schema: str) -> List[str]:
+        """列出Schema中的表和视图"""
+        with self.get_connection() as conn:
+            if not conn.attach(schema):
+                return []
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT name FROM "{schema}".sqlite_master '
+                f"WHERE type IN ('table', 'view') ORDER BY name"
+            )
+            tables = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+        return tables
+
+    def load_catalog(self, schemas: List[str], tables: Optional[List[Tuple[str, str]]] = None):
+        """
+        加载Schema下所有表的列名和类型到缓存
+
+        Args:
+            schemas: 完整加载的Schema列表
+            tables: 额外单独加载的 (schema, table) 列表
+
+        Returns:
+            CatalogCache: 目录元数据缓存
+        """
+        tables = tables or []
+        targets = [(schema, table) for schema in schemas for table in self._list_tables(schema)]
+        targets += [target for target in tables if target not in targets]
+
+        rows = []
+        for schema, table in targets:
+            columns = self._table_info(schema, table)
+            rows.extend((schema, table, column, column_type) for column, column_type in columns)
+
+        self.catalog.load(rows, schemas=schemas, tables=tables)
+        logger.info(f"目录元数据加载完成: {len({(row[0], row[1]) for row in rows})} 张表, {len(rows)} 列")
+        return self.catalog
+
+    def list_schemas(self, prefix: str = 'yxwtzb_') -> List[str]:
+        """
+        列出目录中指定前缀的Schema文件
+
+        Args:
+            prefix: Schema名称前缀
+
+        Returns:
+            List[str]: Schema名称列表(升序)
+        """
+        return sorted(path.stem for path in self.directory.glob('*.db')
+                      if path.stem.startswith(prefix))
+
+    def table_exists(self, schema: str, table_name: str) -> bool:
+        """检查表是否存在"""
+        if self.catalog.knows(schema, table_name):
+            return self.catalog.table_exists(schema, table_name)
+        return bool(self._table_info(schema, table_name))
+
+    def get_table_columns(self, schema: str, table_name: str) -> List[str]:
+        """获取表的列名"""
+        if self.catalog.knows(schema, table_name):
+            return self.catalog.get_columns(schema, table_name)
+        return [column for column, _ in self._table_info(schema, table_name)]
+
+    def get_column_type(self, schema: str, table_name: str, column: str) -> Optional[str]:
+        """获取列的数据类型(SQLite声明类型)"""
+        if self.catalog.knows(schema, table_name):
+            return self.catalog.get_column_type(schema, table_name, column)
+        return dict(self._table_info(schema, table_name)).get(column)
+
+
+def write_schema(directory: Path, schema: str, tables: Dict[str, pd.DataFrame]) -> Path:
+    """
+    把数据写入Schema文件(已存在的同名表会被替换)
+
+    列名以"时间"结尾的列声明为 TIMESTAMP,以 'YYYY-MM-DD HH:MM:SS' 文本保存。
+
+    Args:
+        directory: Schema文件目录
+        schema: Schema名称
+        tables: 表名 -> 数据
+
+    Returns:
+        Path: Schema文件路径
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{schema}.db"
+
+    conn = sqlite3.connect(str(path))
+    try:
+        for table, df in tables.items():
+            df = df.copy()
+            dtype = {}
+            for column in df.columns:
+                if str(column).endswith('时间') or pd.api.types.is_datetime64_any_dtype(df[column]):
+                    values = pd.to_datetime(df[column], errors='coerce')
+                    df[column] = values.dt.strftime('%Y-%m-%d %H:%M:%S').where(values.notna(), None)
+                    dtype[column] = 'TIMESTAMP'
+                elif pd.api.types.is_integer_dtype(df[column]):
+                    dtype[column] = 'INTEGER'
+                elif pd.api.types.is_float_dtype(df[column]):
+                    dtype[column] = 'REAL'
+                else:
+                    df[column] = df[column].astype(object).where(df[column].notna(), None)
+                    df[column] = df[column].map(lambda value: value if value is None else str(value))
+                    dtype[column] = 'TEXT'
+            df.to_sql(table, conn, if_exists='replace', index=False, dtype=dtype)
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info(f"已写入本地数据库: {path} ({', '.join(f'{t} {len(d)} 行' for t, d in tables.items())})")
+    return path
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+本地数据库初始化
+把 data/*.xlsx 或生成的样例数据写入SQLite本地数据库(每个Schema一个文件),
+之后可使用 python main.py --local-db <目录> 离线运行数据抽取
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from loguru import logger
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from modules.date_utils import DateUtils
+from modules.sample_data import DIMENSION_TABLE_NAME, build_dimension_table, generate_dataset, load_xlsx_dataset
+from modules.sqlite_backend import write_schema
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='初始化SQLite本地数据库',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 使用 data 目录中的Excel数据
+  python seed_local_db.py --schema-date 20251229
+
+  # 生成50万行样例数据(用于基准测试)
+  python seed_local_db.py --schema-date 20251229 --rows 500000
+
+  # 使用本地数据库运行抽取
+  python main.py --local-db local_db --schema-date 20251229
+        """
+    )
+
+    parser.add_argument(
+        '--output',
+        default='local_db',
+        help='本地数据库目录 (默认: local_db)'
+    )
+
+    parser.add_argument(
+        '--schema-date',
+        help='Schema日期 (YYYYMMDD格式),默认为本周周一'
+    )
+
+    parser.add_argument(
+        '--data-dir',
+        default=str(Path(__file__).parent.parent.parent / 'data'),
+        help='Excel样例数据目录 (默认: 项目 data 目录)'
+    )
+
+    parser.add_argument(
+        '--rows',
+        type=int,
+        help='生成指定行数的样例数据(不读取Excel)'
+    )
+
+    parser.add_argument(
+        '--days',
+        type=int,
+        default=365,
+        help='生成数据的创建时间覆盖天数 (默认: 365)'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='随机种子 (默认: 0)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    schema_date = (DateUtils.parse_schema_date(args.schema_date)
+                   if args.schema_date else DateUtils.get_this_week_monday())
+
+    try:
+        if args.rows:
+            tables = generate_dataset(args.rows, schema_date, days=args.days, seed=args.seed)
+        else:
+            tables = load_xlsx_dataset(Path(args.data_dir))
+
+        write_schema(Path(args.output), f"yxwtzb_{schema_date}", tables)
+        write_schema(Path(args.output), 'public', {DIMENSION_TABLE_NAME: build_dimension_table(tables)})
+    except Exception as e:
+        logger.error(f"初始化本地数据库失败: {e}", exc_info=True)
+        return 1
+
+    logger.info(f"本地数据库初始化完成: {args.output} (Schema yxwtzb_{schema_date})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
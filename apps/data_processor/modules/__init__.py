@@ -1,3 +1,11 @@
 """
 数据处理模块
 """
+
+import sys
+from pathlib import Path
+
+# 两个应用共用的模块(xlsx_engine)位于仓库的 src/ 目录
+_SRC_DIR = str(Path(__file__).resolve().parents[3] / 'src')
+if _SRC_DIR not in sys.path:
+    sys.path.append(_SRC_DIR)
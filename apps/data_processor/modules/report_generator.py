@@ -4,13 +4,28 @@
 """
 
 import pandas as pd
+import xlsxwriter
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
 from loguru import logger
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 import re
 
+from xlsx_engine import ParallelXlsxWriter, BLOCK_ROWS, EXCEL_MAX_ROWS, EXCEL_MAX_COLUMNS
+
+
+# 流式写入: 与 DataFrame.to_excel 一致的表头和日期格式
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+# 流式写入时每次转换为Python对象的行数
+STREAMING_CHUNK_ROWS = 50000
+
+# 从Excel读入的文本中保留着转义的控制字符(例如换行前的 _x000D_),
+# openpyxl原样写出后Excel显示为控制字符,xlsxwriter会再次转义,流式写入前先还原
+EXCEL_ESCAPE_PATTERN = r'_x([0-9A-Fa-f]{4})_'
+
 
 class ReportGenerator:
     """报表生成器"""
@@ -25,6 +40,10 @@ class ReportGenerator:
         self.config = config
         self.output_dir = Path(config['output']['directory'])
         self.output_filename = config['output']['filename']
+        # 流式写入: 逐行写入磁盘,内存占用与行数无关
+        self.streaming = config['output'].get('streaming', False)
+        # 并行写入: 工作进程并行生成各Sheet的XML(优先于流式写入)
+        self.parallel = config['output'].get('parallel_xlsx') or {}
 
         # 创建输出目录
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -53,19 +72,19 @@ class ReportGenerator:
 
         logger.info(f"开始生成报表: {output_path}")
 
-        # 使用ExcelWriter写入多个Sheet
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Sheet1: 原始数据
-            df2.to_excel(writer, sheet_name='2025122911704000480', index=False)
-            logger.info(f"写入Sheet1 '2025122911704000480': {len(df2)}行")
-
-            # Sheet2: 处理后数据
-            df1_processed.to_excel(writer, sheet_name='计算解决率过程数据（调整后）', index=False)
-            logger.info(f"写入Sheet2 '计算解决率过程数据（调整后）': {len(df1_processed)}行")
-
-            # Sheet3: 透视表
-            pivot_df.to_excel(writer, sheet_name='计算解决率')
-            logger.info(f"写入Sheet3 '计算解决率': {len(pivot_df)}行")
+        sheets = [
+            ('2025122911704000480', df2),
+            ('计算解决率过程数据（调整后）', df1_processed),
+            ('计算解决率', pivot_df.reset_index()),
+        ]
+        if self.parallel.get('enabled', False):
+            writer = ParallelXlsxWriter(self.parallel.get('workers'), self.parallel.get('block_rows', BLOCK_ROWS))
+            metrics = writer.write(output_path, [(sheet_name, df, None) for sheet_name, df in sheets])
+            logger.info(f"并行写入 {len(sheets)} 个Sheet: {metrics['rows']}行, 耗时 {metrics['seconds']}秒")
+        elif self.streaming:
+            self._write_streaming(output_path, sheets)
+        else:
+            self._write_workbook(output_path, df2, df1_processed, pivot_df)
 
         # 注意: 不再添加Excel公式,保持pandas计算的结果值
         # 原因: Excel公式需要Excel打开才能计算,openpyxl无法计算公式
@@ -83,6 +102,90 @@ class ReportGenerator:
 
         return output_path
 
+    def _write_workbook(self,
+                        output_path: Path,
+                        df2: pd.DataFrame,
+                        df1_processed: pd.DataFrame,
+                        pivot_df: pd.DataFrame):
+        """
+        使用openpyxl写入多个Sheet(在内存中构造整个工作簿)
+
+        Args:
+            output_path: 输出文件路径
+            df2: 表格2原始数据
+            df1_processed: 表格1处理后数据
+            pivot_df: 透视表结果
+        """
+        # 使用ExcelWriter写入多个Sheet
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            # Sheet1: 原始数据
+            df2.to_excel(writer, sheet_name='2025122911704000480', index=False)
+            logger.info(f"写入Sheet1 '2025122911704000480': {len(df2)}行")
+
+            # Sheet2: 处理后数据
+            df1_processed.to_excel(writer, sheet_name='计算解决率过程数据（调整后）', index=False)
+            logger.info(f"写入Sheet2 '计算解决率过程数据（调整后）': {len(df1_processed)}行")
+
+            # Sheet3: 透视表
+            pivot_df.to_excel(writer, sheet_name='计算解决率')
+            logger.info(f"写入Sheet3 '计算解决率': {len(pivot_df)}行")
+
+    def _write_streaming(self, output_path: Path, sheets: List[Tuple[str, pd.DataFrame]]):
+        """
+        流式写入多个Sheet(xlsxwriter constant_memory 模式)
+
+        每个Sheet按块转换为Python对象后逐行写入磁盘,不在内存中构造整个工作簿
+
+        Args:
+            output_path: 输出文件路径
+            sheets: (Sheet名称, 数据) 列表,按顺序写入
+        """
+        workbook = xlsxwriter.Workbook(str(output_path), {
+            'constant_memory': True,
+            'strings_to_numbers': False,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+            'default_date_format': DATETIME_FORMAT,
+        })
+        try:
+            header_format = workbook.add_format(HEADER_FORMAT)
+            for sheet_name, df in sheets:
+                # xlsxwriter会静默丢弃超出上限的单元格
+                if len(df) + 1 > EXCEL_MAX_ROWS or df.shape[1] > EXCEL_MAX_COLUMNS:
+                    raise ValueError(f"Sheet '{sheet_name}' 过大: {len(df) + 1} 行(含表头), {df.shape[1]} 列, "
+                                     f"Excel最多 {EXCEL_MAX_ROWS} 行, {EXCEL_MAX_COLUMNS} 列")
+                worksheet = workbook.add_worksheet(sheet_name)
+                for col_idx, column in enumerate(df.columns):
+                    worksheet.write_string(0, col_idx, str(column), header_format)
+
+                row = 1
+                for start in range(0, len(df), STREAMING_CHUNK_ROWS):
+                    chunk = df.iloc[start:start + STREAMING_CHUNK_ROWS]
+                    values = [self._column_values(chunk.iloc[:, col_idx]) for col_idx in range(chunk.shape[1])]
+                    for record in zip(*values):
+                        for col_idx, value in enumerate(record):
+                            if value is not None:
+                                worksheet.write(row, col_idx, value)
+                        row += 1
+
+                logger.info(f"写入Sheet '{sheet_name}': {len(df)}行")
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _column_values(series: pd.Series) -> list:
+        """列数据转换为Python对象,空值转换为None,文本中转义的控制字符还原"""
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_localize(None)
+        if not pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_datetime64_any_dtype(series.dtype):
+            escaped = series.map(lambda value: isinstance(value, str) and '_x' in value)
+            if escaped.any():
+                series = series.copy()
+                series[escaped] = series[escaped].str.replace(
+                    EXCEL_ESCAPE_PATTERN, lambda match: chr(int(match.group(1), 16)), regex=True
+                )
+        return series.astype(object).where(series.notna(), None).tolist()
+
     def _add_formulas_to_sheet2(self, file_path: Path, df: pd.DataFrame):
         """
         为Sheet2(计算解决率过程数据（调整后）)添加Excel公式
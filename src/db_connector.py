@@ -3,12 +3,208 @@
 负责PostgreSQL数据库连接和查询
 """
 
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
 import psycopg2
 import pandas as pd
-from typing import Dict, List, Optional
 from loguru import logger
 
 
+class ConnectionPool:
+    """
+    线程安全的数据库连接池
+
+    - 启动时预建 min_connections 个连接
+    - 最多同时打开 max_connections 个连接,取不到时阻塞等待
+    - 空闲超过 idle_timeout 秒的连接会被关闭(保留 min_connections 个)
+    - 取出连接时可做健康检查(SELECT 1),失效连接自动重建
+    """
+
+    def __init__(self,
+                 connect_func: Callable,
+                 min_connections: int = 1,
+                 max_connections: int = 4,
+                 idle_timeout: float = 300,
+                 health_check: bool = True,
+                 checkout_timeout: float = 30):
+        """
+        初始化连接池
+
+        Args:
+            connect_func: 创建新连接的函数
+            min_connections: 最小连接数
+            max_connections: 最大连接数
+            idle_timeout: 空闲连接超时时间(秒), 0表示不超时
+            health_check: 取出连接时是否做健康检查
+            checkout_timeout: 等待可用连接的最长时间(秒)
+        """
+        if max_connections < 1 or min_connections > max_connections:
+            raise ValueError(f"连接池大小配置无效: min={min_connections}, max={max_connections}")
+
+        self._connect_func = connect_func
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []  # [(connection, 归还时间)]
+        self._size = 0   # 已打开的连接总数(空闲 + 使用中)
+        self._closed = False
+
+        for _ in range(min_connections):
+            self._idle.append((self._connect_func(), time.monotonic()))
+            self._size += 1
+
+    @property
+    def size(self) -> int:
+        """已打开的连接总数"""
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        """空闲连接数"""
+        return len(self._idle)
+
+    def getconn(self):
+        """
+        从连接池取出一个连接
+
+        Returns:
+            数据库连接
+
+        Raises:
+            ConnectionError: 连接池已关闭或等待超时
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+
+        while True:
+            conn = None
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("连接池已关闭")
+
+                self._close_expired_locked()
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                elif self._size < self.max_connections:
+                    # 预占一个名额,在锁外建立连接
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ConnectionError(
+                            f"等待数据库连接超时({self.checkout_timeout}秒), "
+                            f"连接池已满: {self.max_connections}"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    return self._connect_func()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if not self.health_check or self._is_healthy(conn):
+                return conn
+
+            logger.warning("连接池中的连接已失效,重新建立连接")
+            self._discard(conn)
+
+    def putconn(self, conn, close: bool = False):
+        """
+        归还连接到连接池
+
+        Args:
+            conn: 数据库连接
+            close: 是否直接关闭该连接
+        """
+        if not close and not getattr(conn, 'closed', 0):
+            try:
+                # 结束未提交的事务,保证下一个使用者拿到干净的连接
+                conn.rollback()
+            except Exception:
+                close = True
+        else:
+            close = True
+
+        with self._cond:
+            if close or self._closed:
+                self._size -= 1
+                self._safe_close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """关闭连接池中的所有空闲连接,使用中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._safe_close(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def _close_expired_locked(self):
+        """关闭空闲超时的连接(需持有锁)"""
+        if not self.idle_timeout:
+            return
+
+        now = time.monotonic()
+        kept = []
+        # 列表尾部是最近归还的连接,优先保留
+        for conn, last_used in reversed(self._idle):
+            expired = now - last_used > self.idle_timeout
+            if expired and self._size > self.min_connections:
+                self._safe_close(conn)
+                self._size -= 1
+            else:
+                kept.append((conn, last_used))
+        kept.reverse()
+        self._idle = kept
+
+    def _discard(self, conn):
+        """丢弃失效连接"""
+        self._safe_close(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        """检查连接是否可用"""
+        if getattr(conn, 'closed', 0):
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.debug(f"连接健康检查失败: {e}")
+            return False
+
+    @staticmethod
+    def _safe_close(conn):
+        """关闭连接并忽略异常"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
 class DatabaseConnector:
     """数据库连接器"""
 
@@ -20,30 +216,116 @@ class DatabaseConnector:
             config: 配置字典,包含数据库连接信息
         """
         self.config = config['database']
+        self.pool_config = self.config.get('pool') or {}
         self.connection = None
+        self.pool = None
+        self._local = threading.local()
+
+    @property
+    def pooled(self) -> bool:
+        """是否启用连接池模式"""
+        return bool(self.pool_config.get('enabled', False))
+
+    @property
+    def is_connected(self) -> bool:
+        """是否已连接"""
+        if self.pooled:
+            return self.pool is not None
+        return self.connection is not None and not self.connection.closed
+
+    def _create_connection(self):
+        """创建一个新的数据库连接"""
+        return psycopg2.connect(
+            host=self.config['host'],
+            port=self.config['port'],
+            database=self.config['database'],
+            user=self.config['user'],
+            password=self.config['password']
+        )
 
     def connect(self):
-        """建立数据库连接"""
+        """建立数据库连接(连接池模式下创建连接池)"""
+        if self.is_connected:
+            return
+
         try:
             logger.info(f"连接数据库: {self.config['host']}:{self.config['port']}")
-            self.connection = psycopg2.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                database=self.config['database'],
-                user=self.config['user'],
-                password=self.config['password']
-            )
-            logger.info("数据库连接成功 ✓")
+            if self.pooled:
+                self.pool = ConnectionPool(
+                    self._create_connection,
+                    min_connections=self.pool_config.get('min_connections', 1),
+                    max_connections=self.pool_config.get('max_connections', 4),
+                    idle_timeout=self.pool_config.get('idle_timeout', 300),
+                    health_check=self.pool_config.get('health_check', True),
+                    checkout_timeout=self.pool_config.get('checkout_timeout', 30)
+                )
+                logger.info(
+                    f"数据库连接池创建成功 ✓ "
+                    f"(min={self.pool.min_connections}, max={self.pool.max_connections})"
+                )
+            else:
+                self.connection = self._create_connection()
+                logger.info("数据库连接成功 ✓")
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             raise
 
     def disconnect(self):
         """断开数据库连接"""
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+            logger.info("数据库连接池已关闭")
         if self.connection:
             self.connection.close()
+            self.connection = None
             logger.info("数据库连接已关闭")
 
+    @contextmanager
+    def get_connection(self):
+        """
+        获取当前可用的数据库连接
+
+        - 当前线程已通过 acquire() 占用连接时,返回该连接
+        - 连接池模式下,每次调用取出一个连接,用完归还
+        - 单连接模式下,返回 self.connection
+        """
+        pinned = getattr(self._local, 'connection', None)
+        if pinned is not None:
+            yield pinned
+            return
+
+        if self.pool is not None:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+            finally:
+                self.pool.putconn(conn)
+            return
+
+        if not self.connection:
+            raise ConnectionError("数据库未连接")
+        yield self.connection
+
+    @contextmanager
+    def acquire(self):
+        """
+        为当前线程占用一个连接,直到退出上下文
+
+        用于让一个任务内的所有查询使用同一个连接。单连接模式下不做任何处理。
+        """
+        if self.pool is None or getattr(self._local, 'connection', None) is not None:
+            yield
+            return
+
+        conn = self.pool.getconn()
+        self._local.connection = conn
+        try:
+            yield
+        finally:
+            self._local.connection = None
+            self.pool.putconn(conn)
+
     def execute_query(self, query: str, params: Optional[tuple] = None) -> pd.DataFrame:
         """
         执行SQL查询并返回DataFrame
@@ -55,14 +337,12 @@ class DatabaseConnector:
         Returns:
             pd.DataFrame: 查询结果
         """
-        if not self.connection:
-            raise ConnectionError("数据库未连接")
-
         try:
-            logger.info(f"执行SQL查询...")
-            logger.debug(f"SQL: {query}")
+            with self.get_connection() as conn:
+                logger.info(f"执行SQL查询...")
+                logger.debug(f"SQL: {query}")
 
-            df = pd.read_sql_query(query, self.connection, params=params)
+                df = pd.read_sql_query(query, conn, params=params)
 
             logger.info(f"查询完成: 返回 {len(df)} 行数据")
             return df
@@ -91,10 +371,11 @@ class DatabaseConnector:
         """
 
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, (schema, table_name))
-            exists = cursor.fetchone()[0]
-            cursor.close()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (schema, table_name))
+                exists = cursor.fetchone()[0]
+                cursor.close()
             return exists
         except Exception as e:
             logger.error(f"检查表是否存在失败: {e}")
@@ -120,10 +401,11 @@ class DatabaseConnector:
         """
 
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, (schema, table_name))
-            columns = [row[0] for row in cursor.fetchall()]
-            cursor.close()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (schema, table_name))
+                columns = [row[0] for row in cursor.fetchall()]
+                cursor.close()
             return columns
         except Exception as e:
             logger.error(f"获取表列名失败: {e}")
@@ -0,0 +1,505 @@
+"""
+并行xlsx写入模块
+只支持普通表格工作表(表头、日期格式、整行背景色)。主进程把每列编码为
+(类型, 数值, 共享字符串编号) 三个数组,工作进程按行块生成工作表XML和共享字符串表,
+主进程按顺序写入zip容器。多工作表或大工作表的序列化耗时随CPU核数下降
+
+apps/data_extractor 和 apps/data_processor 共用本模块
+"""
+
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from xlsxwriter.utility import xl_col_to_name
+
+
+# Excel工作表的大小上限(行数含表头)和工作表名称的限制
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+SHEET_NAME_MAX_LENGTH = 31
+SHEET_NAME_INVALID_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+# 与 DataFrame.to_excel 一致的日期格式,背景色与 data_extractor 的标记一致
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+HIGHLIGHT_COLOR = 'FFE6F2FF'
+
+# 每个工作进程任务的行数
+BLOCK_ROWS = 20000
+
+# zip压缩级别(1最快,文件比默认级别略大)
+COMPRESS_LEVEL = 1
+
+# Excel日期序列号的起点
+EXCEL_EPOCH = np.datetime64('1899-12-30', 'ns')
+NS_PER_DAY = 86400 * 10 ** 9
+
+# 单元格类型
+NULL, NUMBER, STRING, DATETIME, BOOLEAN = range(5)
+
+# 单元格格式编号(styles.xml 中 cellXfs 的顺序)
+STYLE_DEFAULT, STYLE_HEADER, STYLE_DATETIME, STYLE_FILL, STYLE_DATETIME_FILL = range(5)
+
+# XML不允许的控制字符按 _xHHHH_ 转义(与xlsxwriter一致),文本中已有的 _xHHHH_ 原样写出(与openpyxl一致)
+_CONTROL_RE = re.compile('[\x00-\x08\x0b-\x1f]')
+_INVALID_RE = re.compile('[\\ufffe\\uffff\\ud800-\\udfff]')
+
+_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+STYLES_XML = (
+    _XML_DECL
+    + f'<styleSheet xmlns="{_NS}">'
+    + f'<numFmts count="1"><numFmt numFmtId="164" formatCode="{DATETIME_FORMAT}"/></numFmts>'
+    '<fonts count="2">'
+    '<font><sz val="11"/><color theme="1"/><name val="Calibri"/><family val="2"/><scheme val="minor"/></font>'
+    '<font><b/><sz val="11"/><color theme="1"/><name val="Calibri"/><family val="2"/><scheme val="minor"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    + f'<fill><patternFill patternType="solid"><fgColor rgb="{HIGHLIGHT_COLOR}"/><bgColor indexed="64"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"><color auto="1"/></left><right style="thin"><color auto="1"/></right>'
+    '<top style="thin"><color auto="1"/></top><bottom style="thin"><color auto="1"/></bottom><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="top"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="0" fillId="2" borderId="0" xfId="0" applyFill="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="2" borderId="0" xfId="0" applyNumberFormat="1" applyFill="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _escape_text(text: str) -> str:
+    """转义单元格文本"""
+    text = escape(text)
+    if _CONTROL_RE.search(text):
+        text = _CONTROL_RE.sub(lambda match: f"_x{ord(match.group()):04X}_", text)
+    if _INVALID_RE.search(text):
+        text = _INVALID_RE.sub('', text)
+    return text
+
+
+def _number_text(value: float) -> str:
+    """数值的文本表示(整数不带小数点)"""
+    if value.is_integer() and abs(value) < 1e16:
+        return str(int(value))
+    return repr(value)
+
+
+def validate_sheets(sheets: List[Tuple[str, pd.DataFrame, Optional[pd.Series]]]):
+    """
+    检查工作表名称和大小是否符合Excel的限制(超出时Excel会认为文件已损坏)
+
+    Args:
+        sheets: (工作表名称, 数据, 需要添加背景色的行) 列表
+
+    Raises:
+        ValueError: 没有工作表、名称不合法或重复、行数/列数超出上限
+    """
+    if not sheets:
+        raise ValueError("工作簿中至少需要一个工作表")
+
+    seen = set()
+    for sheet_name, df, _ in sheets:
+        if not sheet_name or len(sheet_name) > SHEET_NAME_MAX_LENGTH:
+            raise ValueError(f"工作表名称长度必须为1到{SHEET_NAME_MAX_LENGTH}个字符: '{sheet_name}'")
+        if SHEET_NAME_INVALID_CHARS.search(sheet_name) or sheet_name.startswith("'") or sheet_name.endswith("'"):
+            raise ValueError(f"工作表名称包含不允许的字符: '{sheet_name}'")
+        if sheet_name.lower() in seen:
+            raise ValueError(f"工作表名称重复: '{sheet_name}'")
+        seen.add(sheet_name.lower())
+
+        if len(df) + 1 > EXCEL_MAX_ROWS or df.shape[1] > EXCEL_MAX_COLUMNS:
+            raise ValueError(f"工作表'{sheet_name}'过大: {len(df) + 1} 行(含表头), {df.shape[1]} 列, "
+                             f"Excel最多 {EXCEL_MAX_ROWS} 行, {EXCEL_MAX_COLUMNS} 列")
+
+
+class SharedStrings:
+    """共享字符串表(按首次出现的顺序编号)"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+        self.count = 0
+
+    def add(self, values: Sequence[str]) -> np.ndarray:
+        """
+        登记字符串
+
+        Args:
+            values: 字符串(通常是一列中不重复的值)
+
+        Returns:
+            np.ndarray: 每个字符串的编号
+        """
+        ids = np.empty(len(values), dtype=np.int64)
+        for position, value in enumerate(values):
+            string_id = self.index.get(value)
+            if string_id is None:
+                string_id = self.index[value] = len(self.strings)
+                self.strings.append(value)
+            ids[position] = string_id
+        return ids
+
+
+def encode_column(series: pd.Series, strings: SharedStrings) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    把一列编码为 (类型, 数值, 共享字符串编号) 三个数组
+
+    数值列和日期列直接向量化转换;其余列先按不同值分解,只对不同值判断类型和登记字符串
+
+    Args:
+        series: 列数据
+        strings: 共享字符串表
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: 类型(uint8)、数值(float64)、字符串编号(int64)
+    """
+    size = len(series)
+    kinds = np.full(size, NULL, dtype=np.uint8)
+    numbers = np.zeros(size, dtype=np.float64)
+    codes = np.zeros(size, dtype=np.int64)
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        mask = series.notna().to_numpy()
+        kinds[mask] = BOOLEAN
+        numbers[mask] = series[mask].astype(bool).to_numpy(dtype=np.float64)
+        return kinds, numbers, codes
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        mask = np.isfinite(values)
+        kinds[mask] = NUMBER
+        numbers[mask] = values[mask]
+        return kinds, numbers, codes
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_localize(None)
+        values = series.to_numpy(dtype='datetime64[ns]')
+        mask = ~np.isnat(values)
+        kinds[mask] = DATETIME
+        numbers[mask] = (values[mask] - EXCEL_EPOCH).astype(np.int64) / NS_PER_DAY
+        return kinds, numbers, codes
+
+    # 文本、类别和混合类型列: 只对不同值判断类型
+    unique_codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    unique_kinds = np.full(len(uniques), NULL, dtype=np.uint8)
+    unique_numbers = np.zeros(len(uniques), dtype=np.float64)
+    unique_text = {}
+    for position, value in enumerate(uniques):
+        if isinstance(value, str):
+            unique_kinds[position] = STRING
+            unique_text[position] = value
+        elif isinstance(value, (bool, np.bool_)):
+            unique_kinds[position] = BOOLEAN
+            unique_numbers[position] = float(value)
+        elif isinstance(value, (int, float, np.integer, np.floating)):
+            if np.isfinite(value):
+                unique_kinds[position] = NUMBER
+                unique_numbers[position] = float(value)
+        elif isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'toordinal'):
+            timestamp = pd.Timestamp(value)
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.tz_localize(None)
+            unique_kinds[position] = DATETIME
+            unique_numbers[position] = (timestamp.to_datetime64() - EXCEL_EPOCH).astype(np.int64) / NS_PER_DAY
+        elif not pd.isna(value):
+            unique_kinds[position] = STRING
+            unique_text[position] = str(value)
+
+    unique_ids = np.zeros(len(uniques), dtype=np.int64)
+    if unique_text:
+        unique_ids[list(unique_text)] = strings.add(list(unique_text.values()))
+
+    mask = unique_codes >= 0
+    selected = unique_codes[mask]
+    kinds[mask] = unique_kinds[selected]
+    numbers[mask] = unique_numbers[selected]
+    codes[mask] = unique_ids[selected]
+    strings.count += int((kinds == STRING).sum())
+    return kinds, numbers, codes
+
+
+def render_rows(columns: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                first_row: int,
+                fills: Optional[np.ndarray] = None) -> bytes:
+    """
+    生成一块数据行的XML(在工作进程中执行)
+
+    Args:
+        columns: 每列的 (类型, 数值, 共享字符串编号)
+        first_row: 第一行的Excel行号(从1开始)
+        fills: 需要添加背景色的行(布尔数组,可选)
+
+    Returns:
+        bytes: <row> 元素(UTF-8)
+    """
+    size = len(columns[0][0]) if columns else 0
+    fill_list = fills.tolist() if fills is not None else [False] * size
+    letters = [xl_col_to_name(col_idx) for col_idx in range(len(columns))]
+
+    # 每列每行的单元格内容(不含单元格引用),None表示空单元格
+    cells = []
+    for kinds, numbers, codes in columns:
+        column_cells = []
+        for kind, number, code in zip(kinds.tolist(), numbers.tolist(), codes.tolist()):
+            if kind == STRING:
+                column_cells.append((' t="s"', f'<v>{code}</v>', False))
+            elif kind == NUMBER:
+                column_cells.append(('', f'<v>{_number_text(number)}</v>', False))
+            elif kind == DATETIME:
+                column_cells.append(('', f'<v>{repr(number)}</v>', True))
+            elif kind == BOOLEAN:
+                column_cells.append((' t="b"', f'<v>{int(number)}</v>', False))
+            else:
+                column_cells.append(None)
+        cells.append(column_cells)
+
+    parts = []
+    for offset in range(size):
+        row = first_row + offset
+        filled = fill_list[offset]
+        parts.append(f'<row r="{row}">')
+        for letter, column_cells in zip(letters, cells):
+            cell = column_cells[offset]
+            if cell is None:
+                if filled:
+                    parts.append(f'<c r="{letter}{row}" s="{STYLE_FILL}"/>')
+                continue
+            cell_type, value, is_datetime = cell
+            if is_datetime:
+                style = f' s="{STYLE_DATETIME_FILL if filled else STYLE_DATETIME}"'
+            else:
+                style = f' s="{STYLE_FILL}"' if filled else ''
+            parts.append(f'<c r="{letter}{row}"{style}{cell_type}>{value}</c>')
+        parts.append('</row>')
+    return ''.join(parts).encode('utf-8')
+
+
+def render_shared_strings(strings: List[str], count: int) -> bytes:
+    """
+    生成共享字符串表XML(在工作进程中执行)
+
+    Args:
+        strings: 字符串(按编号顺序)
+        count: 引用共享字符串的单元格数
+
+    Returns:
+        bytes: sharedStrings.xml(UTF-8)
+    """
+    parts = [_XML_DECL, f'<sst xmlns="{_NS}" count="{count}" uniqueCount="{len(strings)}">']
+    for text in strings:
+        preserve = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ''
+        parts.append(f'<si><t{preserve}>{_escape_text(text)}</t></si>')
+    parts.append('</sst>')
+    return ''.join(parts).encode('utf-8')
+
+
+class _InlineExecutor(Executor):
+    """单进程时在当前进程中直接执行"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ParallelXlsxWriter:
+    """并行xlsx写入器"""
+
+    def __init__(self, workers: Optional[int] = None, block_rows: int = BLOCK_ROWS,
+                 compress_level: int = COMPRESS_LEVEL):
+        """
+        初始化写入器
+
+        Args:
+            workers: 工作进程数(默认CPU核数,1表示在当前进程中生成)
+            block_rows: 每个任务的行数
+            compress_level: zip压缩级别
+        """
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.block_rows = max(1, int(block_rows))
+        self.compress_level = compress_level
+
+    def write(self, path, sheets: List[Tuple[str, pd.DataFrame, Optional[pd.Series]]]) -> Dict:
+        """
+        写入工作簿
+
+        Args:
+            path: 输出文件路径
+            sheets: (工作表名称, 数据, 需要添加背景色的行) 列表,按顺序写入
+
+        Returns:
+            Dict: 写入统计(行数、标记行数、共享字符串数、耗时)
+
+        Raises:
+            ValueError: 工作表名称或大小超出Excel的限制(见 validate_sheets)
+        """
+        validate_sheets(sheets)
+        started = time.perf_counter()
+        strings = SharedStrings()
+
+        # 主进程: 按列编码(向量化),表头也放入共享字符串表
+        encoded = []
+        highlighted = 0
+        for sheet_name, df, highlight in sheets:
+            header_ids = strings.add([str(column) for column in df.columns]).tolist()
+            strings.count += len(header_ids)
+            columns = [encode_column(df.iloc[:, col_idx], strings) for col_idx in range(df.shape[1])]
+            fills = None
+            if highlight is not None:
+                fills = highlight.fillna(False).astype(bool).to_numpy()
+                highlighted += int(fills.sum())
+            encoded.append((sheet_name, header_ids, columns, fills, len(df)))
+        encode_seconds = time.perf_counter() - started
+
+        # 只有一个行块时不启动工作进程
+        # 使用 spawn 启动工作进程: 抽取任务可能在多个线程中并行执行,fork 多线程进程不安全
+        blocks = sum(-(-sheet[4] // self.block_rows) for sheet in encoded)
+        workers = min(self.workers, blocks)
+        executor = (ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+                    if workers > 1 else _InlineExecutor())
+        try:
+            shared_strings = executor.submit(render_shared_strings, strings.strings, strings.count)
+            with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                 compresslevel=self.compress_level) as archive:
+                archive.writestr('[Content_Types].xml', self._content_types(len(encoded)))
+                archive.writestr('_rels/.rels', self._root_rels())
+                archive.writestr('xl/workbook.xml', self._workbook([name for name, *_ in encoded]))
+                archive.writestr('xl/_rels/workbook.xml.rels', self._workbook_rels(len(encoded)))
+                archive.writestr('xl/styles.xml', STYLES_XML)
+                for sheet_idx, sheet in enumerate(encoded, start=1):
+                    self._write_sheet(archive, executor, workers, f'xl/worksheets/sheet{sheet_idx}.xml', *sheet[1:])
+                archive.writestr('xl/sharedStrings.xml', shared_strings.result())
+        finally:
+            executor.shutdown()
+
+        metrics = {
+            'rows': sum(sheet[4] for sheet in encoded),
+            'highlighted': highlighted,
+            'strings': len(strings.strings),
+            'encode_seconds': round(encode_seconds, 3),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.debug(f"并行写入完成: {path} ({len(encoded)} 个工作表, {workers} 个进程, {metrics})")
+        return metrics
+
+    def _write_sheet(self, archive: zipfile.ZipFile, executor: Executor, workers: int, name: str,
+                     header_ids: List[int], columns, fills: Optional[np.ndarray], rows: int):
+        """按行块提交任务并按顺序写入工作表(同时进行中的任务数有上限,控制内存)"""
+        last_cell = f"{xl_col_to_name(max(len(columns), 1) - 1)}{rows + 1}"
+        header = ''.join(
+            f'<c r="{xl_col_to_name(col_idx)}1" s="{STYLE_HEADER}" t="s"><v>{string_id}</v></c>'
+            for col_idx, string_id in enumerate(header_ids)
+        )
+
+        with archive.open(name, 'w', force_zip64=True) as stream:
+            stream.write((
+                _XML_DECL
+                + f'<worksheet xmlns="{_NS}" xmlns:r="{_REL_NS}">'
+                + f'<dimension ref="A1:{last_cell}"/>'
+                + '<sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+                + '<sheetFormatPr defaultRowHeight="15"/><sheetData>'
+                + f'<row r="1">{header}</row>'
+            ).encode('utf-8'))
+
+            pending = deque()
+            for start in range(0, rows, self.block_rows):
+                stop = min(start + self.block_rows, rows)
+                block = [(kinds[start:stop], numbers[start:stop], codes[start:stop])
+                         for kinds, numbers, codes in columns]
+                block_fills = fills[start:stop] if fills is not None else None
+                pending.append(executor.submit(render_rows, block, start + 2, block_fills))
+                if len(pending) >= workers * 2:
+                    stream.write(pending.popleft().result())
+            while pending:
+                stream.write(pending.popleft().result())
+
+            stream.write(b'</sheetData><pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" '
+                         b'header="0.3" footer="0.3"/></worksheet>')
+
+    @staticmethod
+    def _content_types(sheet_count: int) -> str:
+        sheets = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for index in range(1, sheet_count + 1)
+        )
+        return (
+            _XML_DECL
+            + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + sheets
+            + '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            '</Types>'
+        )
+
+    @staticmethod
+    def _root_rels() -> str:
+        return (
+            _XML_DECL
+            + f'<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        )
+
+    @staticmethod
+    def _workbook(sheet_names: List[str]) -> str:
+        sheets = ''.join(
+            f'<sheet name={quoteattr(sheet_name)} sheetId="{index}" r:id="rId{index}"/>'
+            for index, sheet_name in enumerate(sheet_names, start=1)
+        )
+        return (
+            _XML_DECL
+            + f'<workbook xmlns="{_NS}" xmlns:r="{_REL_NS}">'
+            '<bookViews><workbookView/></bookViews>'
+            + f'<sheets>{sheets}</sheets>'
+            '</workbook>'
+        )
+
+    @staticmethod
+    def _workbook_rels(sheet_count: int) -> str:
+        sheets = ''.join(
+            f'<Relationship Id="rId{index}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, sheet_count + 1)
+        )
+        return (
+            _XML_DECL
+            + f'<Relationships xmlns="{_PKG_REL_NS}">'
+            + sheets
+            + f'<Relationship Id="rId{sheet_count + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            f'<Relationship Id="rId{sheet_count + 2}" Type="{_REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'
+        )
@@ -2,8 +2,14 @@
 数据抽取应用测试
 """
 
+import io
+import json
 import pytest
 import sys
+import pandas as pd
+import time
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -11,6 +17,22 @@ from datetime import datetime, timedelta
 sys.path.insert(0, str(Path(__file__).parent.parent / 'apps' / 'data_extractor'))
 
 from modules.date_utils import DateUtils
+from modules.db_connector import ConnectionPool, DatabaseConnector
+from modules.extractor import DataExtractor, TASK_DEPENDENCIES
+from modules.incremental import IncrementalStore
+from modules.query_cache import QueryCache, resolve_cache_dir
+from modules.backfill import BackfillRunner
+from modules.query_stats import QueryStats
+from modules.dimension_cache import DimensionCache
+from modules.pipeline import ExportPipeline
+from modules.excel_writer import ChunkedExcelWriter
+from xlsx_engine import ParallelXlsxWriter, validate_sheets
+from modules.side_outputs import normalize_formats
+from modules.partitioning import RangePartitioner
+from modules.planner import ExtractPlanner
+from modules.sample_data import DIMENSION_TABLE_NAME, build_dimension_table, generate_dataset
+from modules.sqlite_backend import SQLiteConnector, translate_query, write_schema
+from modules.aggregates import WeeklyAggregate
 
 
 class TestDateUtils:
@@ -41,6 +63,11 @@ class TestDateUtils:
         result2 = DateUtils.parse_schema_date("20251229")
         assert result2 == "20251229"
 
+    def test_get_previous_week_range(self):
+        """测试获取Schema日期的上一周范围"""
+        assert DateUtils.get_previous_week_range("20251229") == ("2025-12-22", "2025-12-28")
+        assert DateUtils.get_previous_week_range("20260101") == ("2025-12-22", "2025-12-28")
+
     def test_validate_date_range(self):
         """测试日期范围验证"""
         # 有效范围
@@ -50,5 +77,1319 @@ class TestDateUtils:
         assert DateUtils.validate_date_range("2025-12-28", "2025-12-22") == False
 
 
+class FakeConnection:
+    """模拟数据库连接"""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+
+    def cursor(self):
+        if self.broken:
+            raise RuntimeError("connection lost")
+        return FakeCursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeCursor:
+    """模拟数据库游标"""
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class TestConnectionPool:
+    """连接池测试类"""
+
+    def test_prefill_and_reuse(self):
+        """测试预建连接和连接复用"""
+        created = []
+
+        def connect():
+            created.append(FakeConnection())
+            return created[-1]
+
+        pool = ConnectionPool(connect, min_connections=2, max_connections=3)
+        assert pool.size == 2
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+        assert pool.getconn() is conn
+        assert len(created) == 2
+
+    def test_checkout_timeout_when_full(self):
+        """测试连接池满时等待超时"""
+        pool = ConnectionPool(FakeConnection, min_connections=0, max_connections=1,
+                              checkout_timeout=0.05)
+        pool.getconn()
+        with pytest.raises(ConnectionError):
+            pool.getconn()
+
+    def test_health_check_replaces_broken_connection(self):
+        """测试健康检查替换失效连接"""
+        pool = ConnectionPool(FakeConnection, min_connections=1, max_connections=1)
+        conn = pool.getconn()
+        conn.broken = True
+        pool.putconn(conn)
+
+        new_conn = pool.getconn()
+        assert new_conn is not conn
+        assert conn.closed
+        assert pool.size == 1
+
+    def test_idle_timeout(self):
+        """测试空闲连接超时关闭"""
+        pool = ConnectionPool(FakeConnection, min_connections=0, max_connections=2,
+                              idle_timeout=0.01)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        time.sleep(0.02)
+
+        assert pool.getconn() is not conn
+        assert conn.closed
+
+
+class FakeNamedCursor:
+    """模拟服务端游标"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.description = None
+        self.itersize = None
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        self.description = [('数据id',), ('创建时间',)]
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class TestStreamingQuery:
+    """服务端游标流式查询测试类"""
+
+    def make_connector(self, rows):
+        connector = DatabaseConnector({'database': {'stream': {'itersize': 2}}})
+        connector.connection = FakeConnection()
+        connector.connection.cursor = lambda name=None: FakeNamedCursor(rows)
+        return connector
+
+    def test_yields_chunks_of_itersize(self):
+        """测试按块返回结果"""
+        rows = [(str(i), f'2025-12-{i + 10}') for i in range(5)]
+        chunks = list(self.make_connector(rows).execute_query_iter("SELECT 1"))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert list(chunks[0].columns) == ['数据id', '创建时间']
+
+    def test_empty_result_keeps_columns(self):
+        """测试空结果返回带列名的空DataFrame"""
+        chunks = list(self.make_connector([]).execute_query_iter("SELECT 1"))
+
+        assert len(chunks) == 1
+        assert chunks[0].empty
+        assert list(chunks[0].columns) == ['数据id', '创建时间']
+
+    def test_cache_hit_read_in_batches(self, tmp_path, monkeypatch):
+        """测试缓存命中时按块读取缓存文件,不一次加载整个结果"""
+        connector = DatabaseConnector({'database': {'stream': {'itersize': 2}},
+                                       'cache': {'enabled': True, 'directory': str(tmp_path)}})
+        query = 'SELECT * FROM yxwtzb_20251229."导出原始数据"'
+        cached = pd.DataFrame({'数据id': [str(i) for i in range(5)]})
+        connector.query_cache.put(connector._get_cache_key(query, None), cached)
+
+        def read_whole_file(*args, **kwargs):
+            raise AssertionError('缓存文件被整体读取')
+        monkeypatch.setattr(pd, 'read_parquet', read_whole_file)
+
+        chunks = list(connector.execute_query_iter(query))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert pd.concat(chunks)['数据id'].tolist() == cached['数据id'].tolist()
+        assert connector.stats.queries[0]['mode'] == 'cache'
+        assert connector.stats.queries[0]['rows'] == 5
+
+
+class TestCopyExport:
+    """COPY批量导出测试类"""
+
+    def test_parse_copy_csv_typed_columns(self):
+        """测试按列类型解析COPY导出数据"""
+        data = (
+            '数据id,创建时间,数量,备注\n'
+            '1,2025-12-29 10:00:00,3,""\n'
+            '2,\\N,\\N,\\N\n'
+        ).encode('utf-8')
+        column_types = [('数据id', 25), ('创建时间', 1114), ('数量', 20), ('备注', 25)]
+
+        df = DatabaseConnector._parse_copy_csv(io.BytesIO(data), column_types)
+
+        assert str(df['创建时间'].dtype).startswith('datetime64')
+        assert str(df['数量'].dtype) == 'Int64'
+        assert df.loc[0, '数据id'] == '1'
+        assert df.loc[0, '备注'] == ''
+        assert pd.isna(df.loc[1, '备注'])
+        assert pd.isna(df.loc[1, '创建时间'])
+
+    def test_parse_arrow_csv_typed_columns(self):
+        """测试按列类型构造Arrow列: 时间为datetime64,低基数文本为category"""
+        data = (
+            '数据id,创建时间,更新时间,数量,所涉产品,问题描述\n'
+            '1,2025-12-29 10:00:00,2025-12-29 10:00:00+08,3,产品A,"描述,1"\n'
+            '2,\\N,\\N,\\N,产品A,"\\N"\n'
+            '3,2025-12-28 09:00:00,2025-12-28 09:00:00+00,5,产品A,\\N\n'
+        ).encode('utf-8')
+        column_types = [('数据id', 25), ('创建时间', 1114), ('更新时间', 1184),
+                        ('数量', 20), ('所涉产品', 25), ('问题描述', 25)]
+
+        table = DatabaseConnector._parse_arrow_csv(io.BytesIO(data), column_types, ['数据id'])
+        df = table.to_pandas()
+
+        assert str(df['创建时间'].dtype).startswith('datetime64')
+        assert df.loc[0, '更新时间'] == pd.Timestamp('2025-12-29 02:00:00', tz='UTC')
+        assert pd.isna(df.loc[1, '创建时间'])
+        assert df['所涉产品'].dtype == 'category'
+        assert df['数据id'].dtype == 'category'
+        assert df['问题描述'].dtype != 'category'
+        # NULL与内容为 \N 的文本可以区分
+        assert df.loc[1, '问题描述'] == '\\N'
+        assert pd.isna(df.loc[2, '问题描述'])
+
+    def test_engine_per_task(self, tmp_path):
+        """测试按任务设置抽取方式"""
+        config = make_extractor_config(tmp_path, engine='copy', engines={'task3': 'arrow'})
+        extractor = DataExtractor(config, db=FakePooledDB())
+
+        assert extractor._engine_for('task1') == 'copy'
+        assert extractor._engine_for('task3') == 'arrow'
+        assert extractor._engine_for('task4') == 'pandas'
+
+
+def make_extractor_config(output_dir, **tasks) -> dict:
+    """构造测试用的抽取器配置"""
+    return {
+        'database': {'host': 'localhost', 'port': 5432, 'database': 'postgres',
+                     'user': 'test', 'password': 'test'},
+        'schema': {'date': '20251229'},
+        'date_range': {'start_date': '2025-12-22', 'end_date': '2025-12-28'},
+        'output': {
+            'directory': str(output_dir),
+            'date_prefix': False,
+            'files': {
+                'task1': '原始数据.xlsx',
+                'task2': '计算数据.xlsx',
+                'task3': '新增问题.xlsx',
+                'task4': 'RDPM数据.xlsx',
+                'task5': '解决率周汇总.xlsx',
+            },
+        },
+        'tasks': tasks,
+    }
+
+
+class FakePooledDB:
+    """模拟启用连接池的数据库连接器"""
+
+    backend = 'postgres'
+    pooled = True
+    query_cache = None
+
+    def __init__(self):
+        self.acquired = []
+        self.stats = QueryStats()
+
+    @contextmanager
+    def acquire(self):
+        self.acquired.append(threading.current_thread().name)
+        yield
+
+
+class TestParallelTasks:
+    """任务并行执行测试类"""
+
+    def test_parallel_results_keep_task_order(self, tmp_path):
+        """测试并行执行的结果与顺序执行一致"""
+        config = make_extractor_config(tmp_path, parallelism=4)
+        db = FakePooledDB()
+        extractor = DataExtractor(config, db=db)
+
+        def slow_task(result, delay):
+            def run():
+                time.sleep(delay)
+                return result
+            return run
+
+        extractor.task1_extract_original_data = slow_task(True, 0.05)
+        extractor.task2_extract_calculated_data = slow_task(False, 0.01)
+        extractor.task3_extract_new_issues = slow_task(True, 0.03)
+        extractor.task4_extract_rdpm_data = slow_task(True, 0.0)
+
+        results = extractor.run_all_tasks()
+
+        assert list(results.items()) == [
+            ('task1', True), ('task2', False), ('task3', True), ('task4', True)
+        ]
+        assert len(db.acquired) == 4
+        assert db.stats.tasks['task2@20251229']['success'] is False
+
+
+class TestSharedScan:
+    """共享扫描测试类"""
+
+    @pytest.fixture
+    def process_data(self):
+        """计算解决率过程数据fixture(按创建时间降序)"""
+        return pd.DataFrame({
+            '序号': [11, 12, 13, 14, 15],
+            '创建时间': pd.to_datetime(['2025-12-29 09:00:00', '2025-12-27 10:00:00',
+                                      '2025-12-25 11:00:00', '2025-12-23 12:00:00',
+                                      '2025-12-22 00:00:00']),
+            '审批编号': ['A5', 'A4', 'A3', 'A2', 'A1'],
+            '所属客户项目': ['项目'] * 5,
+            '项目类型': ['类型'] * 5,
+            '所涉产品': ['产品A', '产品B', '产品A', None, '产品A'],
+            '软件版本号': ['V1'] * 5,
+            '紧急程度': ['高'] * 5,
+            '问题描述': ['描述'] * 5,
+            '处理方式': ['研发处理', '研发处理', '非研发处理', '研发处理', '研发处理'],
+            '期望解决时间': pd.to_datetime(['2026-01-10'] * 5),
+            '计划完成时间': pd.to_datetime(['2026-01-12'] * 5),
+            '当前负责人': ['张三'] * 5,
+            '研发负责人': ['李四'] * 5,
+            '用于交付日期偏差统计': ['处理中暂未超时'] * 5,
+            '审批状态': ['审批中', '审批中', '审批中', '审批中', '审批中'],
+            '审批结果': ['审批通过', None, '审批通过', '审批通过', '审批通过'],
+            '非研发处理问题类别': ['Bug', 'Bug', '需求', 'Bug', 'Bug'],
+        })
+
+    @pytest.fixture
+    def extractor(self, tmp_path):
+        return DataExtractor(make_extractor_config(tmp_path, shared_scan=True), db=FakePooledDB())
+
+    def test_derive_new_issues(self, extractor, process_data):
+        """测试任务3内存筛选与SQL条件一致"""
+        df = extractor._derive_new_issues(process_data)
+
+        # 12月29日超出范围, 审批结果为NULL被排除, 非研发处理被排除, 00:00:00早于起始时间
+        assert df['序号'].tolist() == [14]
+        assert df.loc[0, '问题处理类别'] == '研发处理'
+        assert df.loc[0, '原因分析及解决方案'] == '问题原因：xxx 解决方案：xxx (自行修改)'
+        assert df.loc[0, '计划解决时间（最新计划）'] == ''
+
+    def test_derive_rdpm_data(self, extractor, process_data):
+        """测试任务4内存筛选并关联维表"""
+        dimension = pd.DataFrame({'具体的产品': ['产品A', '产品B'], '部门负责人': ['王五', '赵六']})
+        df = extractor._derive_rdpm_data(process_data, dimension)
+
+        # 需求类别被排除, 所涉产品为NULL不参与关联
+        assert df.empty
+        assert list(df.columns) == ['创建时间', '审批编号', '所涉产品', '软件版本号',
+                                    '所属客户项目', '问题描述', '测试负责人']
+
+        process_data.loc[2, '非研发处理问题类别'] = 'Bug'
+        df = extractor._derive_rdpm_data(process_data, dimension)
+        assert df['审批编号'].tolist() == ['A3']
+        assert df.loc[0, '测试负责人'] == '王五'
+
+
+class TestMultiWindow:
+    """多窗口抽取测试类"""
+
+    class WindowDB(FakePooledDB):
+        """记录查询并返回已按周分桶结果的假连接器"""
+
+        def __init__(self, result):
+            super().__init__()
+            self.result = result
+            self.queries = []
+
+        def table_exists(self, schema, table):
+            return True
+
+        def execute_query(self, query, params=None):
+            self.queries.append((query, params))
+            return self.result.copy()
+
+    def test_week_windows(self):
+        """测试向前生成连续N周"""
+        assert DateUtils.get_week_windows('2025-12-22', '2025-12-28', 3) == [
+            ('2025-12-22', '2025-12-28'), ('2025-12-15', '2025-12-21'), ('2025-12-08', '2025-12-14')
+        ]
+
+    def test_one_query_split_into_sheets(self, tmp_path):
+        """测试一次查询按周拆分工作表并分别编号"""
+        result = pd.DataFrame({
+            '序号': [7, 8, 9, None],
+            '问题描述': ['a', 'b', 'c', 'd'],
+            '统计窗口': ['2025-12-22~2025-12-28', '2025-12-15~2025-12-21',
+                         '2025-12-15~2025-12-21', None],
+        })
+        config = make_extractor_config(tmp_path)
+        config['date_range']['weeks'] = 3
+        db = self.WindowDB(result)
+        extractor = DataExtractor(config, db=db)
+
+        assert extractor.task3_extract_new_issues()
+
+        query, params = db.queries[0]
+        assert len(db.queries) == 1
+        assert 'CASE WHEN' in query
+        assert params[-6:-4] == ('2025-12-08 00:00:01', '2025-12-28 23:59:59')
+
+        sheets = pd.read_excel(tmp_path / '新增问题.xlsx', sheet_name=None)
+        assert list(sheets) == ['2025-12-22~2025-12-28', '2025-12-15~2025-12-21',
+                                '2025-12-08~2025-12-14']
+        assert sheets['2025-12-15~2025-12-21']['序号'].tolist() == [1, 2]
+        assert sheets['2025-12-08~2025-12-14'].empty
+        assert '统计窗口' not in sheets['2025-12-22~2025-12-28'].columns
+
+    def test_shared_scan_assigns_windows(self, tmp_path):
+        """测试共享扫描在内存中按周分桶"""
+        config = make_extractor_config(tmp_path)
+        config['date_range']['weeks'] = 2
+        extractor = DataExtractor(config, db=FakePooledDB())
+
+        created = pd.Series(pd.to_datetime(['2025-12-23 08:00:00', '2025-12-16 08:00:00', '2025-12-22 00:00:00']))
+        assert extractor._assign_windows(created).tolist()[:2] == \
+            ['2025-12-22~2025-12-28', '2025-12-15~2025-12-21']
+        assert pd.isna(extractor._assign_windows(created)[2])
+
+
+class TestPipeline:
+    """读取/写入流水线测试类"""
+
+    def test_backpressure_and_metrics(self):
+        """测试写入较慢时读取端被阻塞,且所有块按顺序写入"""
+        chunks = [pd.DataFrame({'id': range(i * 10, i * 10 + 10)}) for i in range(5)]
+        written = []
+
+        def slow_write(chunk):
+            time.sleep(0.02)
+            written.append(chunk)
+
+        metrics = ExportPipeline(queue_size=1).run(iter(chunks), slow_write)
+
+        assert pd.concat(written)['id'].tolist() == list(range(50))
+        assert metrics['chunks'] == 5 and metrics['rows'] == 50
+        assert metrics['max_queue_depth'] == 1
+        assert metrics['producer_blocked_seconds'] > 0
+
+    def test_writer_error_stops_reader(self):
+        """测试写入失败时停止读取并抛出异常"""
+        closed = []
+
+        def chunks():
+            try:
+                for i in range(100):
+                    yield pd.DataFrame({'id': [i]})
+            finally:
+                closed.append(True)
+
+        def failing_write(chunk):
+            raise ValueError('磁盘已满')
+
+        with pytest.raises(ValueError):
+            ExportPipeline(queue_size=2).run(chunks(), failing_write)
+        assert closed == [True]
+
+    def test_task2_pipelined_with_highlight(self, tmp_path):
+        """测试任务2流水线写入并在写入时标记上周数据"""
+        from openpyxl import load_workbook
+
+        class StreamDB(FakePooledDB):
+            def table_exists(self, schema, table):
+                return True
+
+            def execute_query_iter(self, query, params=None, itersize=None):
+                yield pd.DataFrame({'创建时间': pd.to_datetime(['2025-12-29 08:00:00', '2025-12-28 23:59:59']),
+                                    '问题描述': ['a', None]})
+                yield pd.DataFrame({'创建时间': pd.to_datetime(['2025-12-22 00:00:00']),
+                                    '问题描述': ['c']})
+
+        config = make_extractor_config(tmp_path, pipeline={'enabled': True, 'queue_size': 1})
+        db = StreamDB()
+        assert DataExtractor(config, db=db).task2_extract_calculated_data()
+
+        df = pd.read_excel(tmp_path / '计算数据.xlsx')
+        assert df['问题描述'].tolist()[::2] == ['a', 'c']
+        assert pd.isna(df.loc[1, '问题描述'])
+
+        ws = load_workbook(tmp_path / '计算数据.xlsx')['计算解决率过程数据']
+        fills = [ws.cell(row=row, column=2).fill.fgColor.rgb for row in range(2, 5)]
+        assert fills[0] != 'FFE6F2FF'
+        assert fills[1:] == ['FFE6F2FF', 'FFE6F2FF']
+        assert db.stats.pipelines['-']['highlighted'] == 2
+
+    def test_chunked_writer_rows_and_sheets(self, tmp_path):
+        """测试逐行写入记录和按顺序写入多个工作表"""
+        with ChunkedExcelWriter(tmp_path / 'out.xlsx', '记录') as writer:
+            writer.write_rows(iter([(1, datetime(2025, 12, 22, 8, 0), 'a'), (2, None, float('nan'))]),
+                              columns=['序号', '创建时间', '问题描述'])
+            writer.add_sheet('数据')
+            writer.write_frame(pd.DataFrame({'问题描述': ['b', 'c']}), chunk_rows=1)
+
+        sheets = pd.read_excel(tmp_path / 'out.xlsx', sheet_name=None)
+        assert list(sheets) == ['记录', '数据']
+        assert sheets['记录']['创建时间'].tolist()[0] == pd.Timestamp('2025-12-22 08:00:00')
+        assert sheets['记录'].iloc[1].isna().tolist() == [False, True, True]
+        assert sheets['数据']['问题描述'].tolist() == ['b', 'c']
+        assert writer.rows_written == 4
+
+    def test_chunked_writer_rejects_rows_past_sheet_limit(self, tmp_path, monkeypatch):
+        """测试超出Excel行数上限时报错,而不是静默丢弃超出的行"""
+        import modules.excel_writer as excel_writer
+        monkeypatch.setattr(excel_writer, 'EXCEL_MAX_ROWS', 4)
+
+        with ChunkedExcelWriter(tmp_path / 'out.xlsx', '数据') as writer:
+            writer.write_chunk(pd.DataFrame({'id': [1, 2]}))
+            with pytest.raises(ValueError, match='行数过多'):
+                writer.write_chunk(pd.DataFrame({'id': [3, 4]}))
+            writer.write_chunk(pd.DataFrame({'id': [3]}))
+
+            writer.add_sheet('记录')
+            with pytest.raises(ValueError, match='行数过多'):
+                writer.write_rows(iter([(1,), (2,), (3,), (4,)]), columns=['id'])
+        assert writer.rows_written == 6
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_parallel_writer_matches_streaming(self, tmp_path, workers):
+        """测试并行写入与流式写入的内容和背景色一致"""
+        from openpyxl import load_workbook
+
+        df = pd.DataFrame({
+            '序号': [1, 2, 3, 4],
+            '创建时间': pd.to_datetime(['2025-12-22 08:00:00', None, '2025-12-29 00:00:00', '2025-12-28 23:59:59']),
+            '问题描述': ['a<&>', None, '换行\r\n', ' 前后空格 '],
+            '偏差': [1.5, '非研发处理', None, 3],
+            '已提bug': [True, False, True, False],
+        })
+        mask = pd.Series([True, True, False, False])
+        sheets = [('数据', df, mask), ('第二页', df.head(1), None)]
+
+        metrics = ParallelXlsxWriter(workers=workers, block_rows=1).write(tmp_path / 'parallel.xlsx', sheets)
+        with ChunkedExcelWriter(tmp_path / 'streaming.xlsx', '数据') as writer:
+            writer.write_frame(df, mask)
+            writer.add_sheet('第二页')
+            writer.write_frame(df.head(1))
+        assert (metrics['rows'], metrics['highlighted']) == (5, writer.highlighted)
+
+        parallel = pd.read_excel(tmp_path / 'parallel.xlsx', sheet_name=None)
+        streaming = pd.read_excel(tmp_path / 'streaming.xlsx', sheet_name=None)
+        assert list(parallel) == ['数据', '第二页']
+        for sheet_name in parallel:
+            pd.testing.assert_frame_equal(parallel[sheet_name], streaming[sheet_name])
+
+        ws = load_workbook(tmp_path / 'parallel.xlsx')['数据']
+        assert ws['A1'].font.b
+        assert [ws.cell(row=row, column=3).fill.fgColor.rgb == 'FFE6F2FF' for row in range(2, 6)] == [
+            True, True, False, False]
+        assert ws['B2'].number_format == 'yyyy-mm-dd hh:mm:ss'
+
+    def test_parallel_writer_validates_sheets(self, tmp_path, monkeypatch):
+        """测试并行写入前检查工作表名称和大小,不生成Excel无法打开的文件"""
+        import xlsx_engine
+        df = pd.DataFrame({'id': [1, 2, 3]})
+        for name in ('a' * 32, '数据/汇总', "'数据'", ''):
+            with pytest.raises(ValueError, match='工作表名称'):
+                validate_sheets([(name, df, None)])
+        with pytest.raises(ValueError, match='重复'):
+            validate_sheets([('数据', df, None), ('数据', df, None)])
+
+        monkeypatch.setattr(xlsx_engine, 'EXCEL_MAX_ROWS', 3)
+        with pytest.raises(ValueError, match='过大'):
+            ParallelXlsxWriter(workers=1).write(tmp_path / 'out.xlsx', [('数据', df, None)])
+        assert not (tmp_path / 'out.xlsx').exists()
+
+    def test_task2_highlight_written_in_single_pass(self, tmp_path):
+        """测试任务2非流水线写入时直接标记上周数据(创建时间为文本时按日期比较)"""
+        from openpyxl import load_workbook
+
+        class FrameDB(FakePooledDB):
+            def table_exists(self, schema, table):
+                return True
+
+            def execute_query(self, query, params=None):
+                return pd.DataFrame({
+                    '创建时间': ['2025-12-29 08:00:00', '2025-12-28 23:59:59', '2025-12-22', None],
+                    '问题描述': ['a', 'b', None, 'd'],
+                })
+
+        config = make_extractor_config(tmp_path)
+        assert DataExtractor(config, db=FrameDB()).task2_extract_calculated_data()
+
+        ws = load_workbook(tmp_path / '计算数据.xlsx')['计算解决率过程数据']
+        fills = [ws.cell(row=row, column=1).fill.fgColor.rgb for row in range(2, 6)]
+        assert fills[1:3] == ['FFE6F2FF', 'FFE6F2FF']
+        assert 'FFE6F2FF' not in (fills[0], fills[3])
+        assert ws.cell(row=4, column=2).fill.fgColor.rgb == 'FFE6F2FF'
+        assert ws.max_row == 5
+
+    def test_task2_conditional_highlight(self, tmp_path):
+        """测试条件格式标记: 一条规则覆盖数据区域,日期范围可在单独工作表中修改"""
+        from openpyxl import load_workbook
+
+        class StreamDB(FakePooledDB):
+            def table_exists(self, schema, table):
+                return True
+
+            def execute_query_iter(self, query, params=None, itersize=None):
+                yield pd.DataFrame({'问题描述': ['a', 'b', 'c'],
+                                    '创建时间': pd.to_datetime(['2025-12-29 08:00:00', '2025-12-28 23:59:59',
+                                                            '2025-12-22 00:00:00'])})
+
+        config = make_extractor_config(tmp_path, highlight_mode='conditional',
+                                       pipeline={'enabled': True, 'queue_size': 1})
+        db = StreamDB()
+        assert DataExtractor(config, db=db).task2_extract_calculated_data()
+        assert db.stats.pipelines['-']['highlighted'] == 2
+
+        workbook = load_workbook(tmp_path / '计算数据.xlsx')
+        ws = workbook['计算解决率过程数据']
+        assert ws.cell(row=3, column=1).fill.fgColor.rgb != 'FFE6F2FF'
+        rules = [(str(cf.sqref), rule.formula[0]) for cf in ws.conditional_formatting for rule in cf.rules]
+        assert len(rules) == 1
+        assert rules[0][0] == 'A2:B4'
+        assert '$B2' in rules[0][1] and '标记开始日期' in rules[0][1]
+
+        window = workbook['标记范围']
+        assert (window['A2'].value.date(), window['B2'].value.date()) == (
+            datetime(2025, 12, 22).date(), datetime(2025, 12, 28).date())
+        assert workbook.defined_names['标记结束日期'].attr_text == "'标记范围'!$B$2"
+
+        # 数据工作表保持不变
+        assert pd.read_excel(tmp_path / '计算数据.xlsx').columns.tolist() == ['问题描述', '创建时间']
+
+
+class TestPartitionedFetch:
+    """分区抽取测试类"""
+
+    class RangeDB(FakePooledDB):
+        """按查询中的范围条件筛选数据的假连接器"""
+
+        def __init__(self, table, histogram):
+            super().__init__()
+            self.table = table
+            self.histogram = histogram
+
+        def execute_query(self, query, params=None):
+            if 'pg_stats' in query:
+                return pd.DataFrame({'bounds': [self.histogram]})
+            created = self.table['创建时间']
+            if 'IS NULL' in query:
+                mask = created.isna()
+            else:
+                mask = created.notna()
+                if '>= %s' in query:
+                    mask &= created >= pd.Timestamp(params[0])
+                if '< %s' in query:
+                    mask &= created < pd.Timestamp(params[-1])
+            return self.table[mask].sort_values('创建时间', ascending=False).reset_index(drop=True)
+
+    def test_pick_bounds(self):
+        """测试从直方图中等频选取边界"""
+        values = [f'2025-01-{day:02d}' for day in range(1, 11)]
+        assert RangePartitioner.pick_bounds(values, 3) == ['2025-01-04', '2025-01-07']
+        assert RangePartitioner.pick_bounds(values[:2], 3) == []
+        assert RangePartitioner.split_range('2025-01-01', '2025-01-05', 2) == ['2025-01-03 00:00:00']
+
+    def test_merged_result_keeps_desc_order(self, tmp_path):
+        """测试分区并行抽取结果与整表降序查询一致(NULL在前)"""
+        table = pd.DataFrame({
+            '数据id': range(8),
+            '创建时间': pd.to_datetime(['2025-01-02', None, '2025-01-09', '2025-01-05',
+                                      '2025-01-07', '2025-01-01', None, '2025-01-04']),
+        })
+        histogram = [f'2025-01-{day:02d}' for day in range(1, 11)]
+        db = self.RangeDB(table, histogram)
+        extractor = DataExtractor(make_extractor_config(tmp_path, partitions={'count': 3}), db=db)
+
+        df = extractor._fetch_full_table('导出原始数据')
+
+        assert df['创建时间'].isna().tolist()[:2] == [True, True]
+        assert df['数据id'].tolist()[2:] == [2, 4, 3, 7, 0, 5]
+
+
+class TestColumnProjection:
+    """列投影测试类"""
+
+    class ColumnsDB(FakePooledDB):
+        """返回固定列信息并记录查询的假连接器"""
+
+        columns = ['数据id', '创建时间', '问题描述', '处理方式', '审批状态', '附件说明']
+
+        def __init__(self):
+            super().__init__()
+            self.queries = []
+
+        def get_table_columns(self, schema, table):
+            return list(self.columns)
+
+        def execute_query(self, query, params=None):
+            self.queries.append(query)
+            return pd.DataFrame()
+
+    def extractor(self, tmp_path, **columns):
+        config = make_extractor_config(tmp_path, columns=columns)
+        return DataExtractor(config, db=self.ColumnsDB())
+
+    def test_include_exclude_and_preset(self, tmp_path):
+        """测试 include/exclude/preset 并保持表中的列顺序"""
+        extractor = self.extractor(tmp_path,
+                                   task1={'include': ['审批状态', '数据id']},
+                                   task2={'preset': 'processor-minimal'})
+        assert extractor.get_projection('task1') == ['数据id', '审批状态']
+        assert extractor.get_projection('task2') == ['数据id', '创建时间', '处理方式', '审批状态']
+
+        extractor = self.extractor(tmp_path, task1={'exclude': ['问题描述', '附件说明']})
+        assert extractor.get_projection('task1') == ['数据id', '创建时间', '处理方式', '审批状态']
+        assert extractor.get_projection('task2') is None
+
+        extractor._fetch_full_table('导出原始数据', extractor.get_projection('task1'))
+        assert 'SELECT "数据id", "创建时间", "处理方式", "审批状态"' in extractor.db.queries[0]
+
+    def test_unknown_column_fails_preflight(self, tmp_path):
+        """测试列投影中不存在的列在预检时报告"""
+        extractor = self.extractor(tmp_path, task1={'include': ['不存在的列']})
+        extractor.db.load_catalog = lambda schemas, tables=None: None
+        extractor.db.table_exists = lambda schema, table: True
+
+        problems = extractor.preflight_check(['task1'])
+        assert any('不存在的列' in problem for problem in problems['task1'])
+
+
+class TestResume:
+    """运行清单和续跑测试类"""
+
+    def make_extractor(self, tmp_path, calls, failing=(), parallelism=1):
+        config = make_extractor_config(tmp_path, resume=True, parallelism=parallelism)
+        extractor = DataExtractor(config, db=FakePooledDB())
+
+        def fake_task(task_key):
+            def run():
+                calls.append(task_key)
+                if task_key in failing:
+                    return False
+                output_file = extractor._get_output_filename(task_key)
+                output_file.write_text(task_key, encoding='utf-8')
+                extractor._record_output(task_key, [output_file], 1)
+                return True
+            return run
+
+        for number, name in enumerate(['original_data', 'calculated_data', 'new_issues', 'rdpm_data'], 1):
+            setattr(extractor, f'task{number}_extract_{name}', fake_task(f'task{number}'))
+        return extractor
+
+    def test_resume_runs_only_failed_task(self, tmp_path):
+        """测试续跑只执行失败的任务"""
+        calls = []
+        results = self.make_extractor(tmp_path, calls, failing=('task4',)).run_all_tasks()
+        assert results['task4'] is False
+
+        calls.clear()
+        results = self.make_extractor(tmp_path, calls).run_all_tasks()
+        assert calls == ['task4']
+        assert all(results.values())
+
+        manifest = json.loads((tmp_path / 'run_manifest.json').read_text(encoding='utf-8'))
+        assert sorted(manifest['tasks']) == ['task1@20251229', 'task2@20251229',
+                                             'task3@20251229', 'task4@20251229']
+        assert manifest['tasks']['task1@20251229']['rows'] == 1
+
+    def test_parallel_resume_keeps_skipped_results(self, tmp_path):
+        """测试并行续跑时已完成而跳过的任务仍记为成功"""
+        calls = []
+        results = self.make_extractor(tmp_path, calls, failing=('task3', 'task4'), parallelism=2).run_all_tasks()
+        assert results == {'task1': True, 'task2': True, 'task3': False, 'task4': False}
+
+        calls.clear()
+        results = self.make_extractor(tmp_path, calls, parallelism=2).run_all_tasks()
+        assert sorted(calls) == ['task3', 'task4']
+        assert results == {'task1': True, 'task2': True, 'task3': True, 'task4': True}
+
+    def test_changed_output_or_params_rerun(self, tmp_path):
+        """测试输出文件被修改或参数变化时重新执行"""
+        calls = []
+        self.make_extractor(tmp_path, calls).run_all_tasks()
+
+        (tmp_path / '原始数据.xlsx').write_text('modified', encoding='utf-8')
+        calls.clear()
+        self.make_extractor(tmp_path, calls).run_all_tasks()
+        assert calls == ['task1']
+
+        calls.clear()
+        extractor = self.make_extractor(tmp_path, calls)
+        extractor.end_date = '2025-12-27'
+        extractor.run_all_tasks()
+        assert calls == ['task1', 'task2', 'task3', 'task4']
+
+
+class TestExtractPlanner:
+    """抽取规划测试类"""
+
+    class StatsDB(FakePooledDB):
+        """返回表统计信息的假连接器"""
+
+        def __init__(self, reltuples, widths, relation_bytes=8192):
+            super().__init__()
+            self.reltuples = reltuples
+            self.widths = widths
+            self.relation_bytes = relation_bytes
+
+        def execute_query(self, query, params=None):
+            # 没有列统计时 LEFT JOIN 返回一行空的列信息
+            return pd.DataFrame({
+                'reltuples': self.reltuples,
+                'relation_bytes': self.relation_bytes,
+                'column_name': list(self.widths) or [None],
+                'avg_width': list(self.widths.values()) or [None],
+            })
+
+    def test_budget_decides_mode(self):
+        """测试按内存预算选择内存抽取或流式抽取"""
+        widths = {'数据id': 20, '创建时间': 8, '问题描述': 400}
+        small = ExtractPlanner(self.StatsDB(1000, widths), memory_budget_mb=100)
+        large = ExtractPlanner(self.StatsDB(2_000_000, widths), memory_budget_mb=100)
+
+        assert small.plan_table('yxwtzb_20251229', '导出原始数据')['mode'] == 'memory'
+        plan = large.plan_table('yxwtzb_20251229', '导出原始数据')
+        assert plan['mode'] == 'stream'
+        assert plan['row_width'] == 428
+
+        # 列投影只计算抽取的列
+        plan = large.plan_table('yxwtzb_20251229', '导出原始数据', columns=['数据id', '创建时间'])
+        assert plan['row_width'] == 28 and plan['columns'] == 2
+
+    def test_never_analyzed_table_uses_relation_size(self):
+        """测试从未ANALYZE的表按数据文件大小估算"""
+        planner = ExtractPlanner(self.StatsDB(-1, {}, relation_bytes=3 * 1024 * 1024),
+                                 memory_budget_mb=4)
+        plan = planner.plan_table('yxwtzb_20251229', '导出原始数据')
+        assert plan['mode'] == 'stream' and plan['rows'] is None
+
+    def test_extractor_streams_large_table(self, tmp_path):
+        """测试超出预算的整表改为流式抽取并关闭共享扫描"""
+        config = make_extractor_config(tmp_path, shared_scan=True)
+        config['planner'] = {'enabled': True, 'memory_budget_mb': 100}
+        db = self.StatsDB(2_000_000, {'数据id': 20, '问题描述': 400})
+        extractor = DataExtractor(config, db=db)
+
+        assert extractor._use_pipeline('导出原始数据')
+        assert not extractor._use_shared_scan()
+        assert db.stats.plans[0]['mode'] == 'stream'
+
+
+class TestCatalogCache:
+    """目录元数据缓存测试类"""
+
+    @pytest.fixture
+    def connector(self):
+        """只使用缓存、未连接数据库的连接器"""
+        connector = DatabaseConnector({'database': {}})
+        rows = [
+            ('yxwtzb_20251229', '导出原始数据', '数据id', 'text'),
+            ('yxwtzb_20251229', '导出原始数据', '创建时间', 'timestamp without time zone'),
+            ('yxwtzb_20251229', '计算解决率过程数据', '创建时间', 'timestamp without time zone'),
+        ]
+        connector.load_catalog = lambda schemas, tables=None: connector.catalog.load(
+            rows, schemas=schemas, tables=tables or [])
+        connector.load_catalog(['yxwtzb_20251229'], tables=[('public', '各产品对应的测试部长')])
+        return connector
+
+    def test_answers_from_cache(self, connector):
+        """测试表和列的查询由缓存回答"""
+        assert connector.table_exists('yxwtzb_20251229', '导出原始数据')
+        assert not connector.table_exists('yxwtzb_20251229', '不存在的表')
+        assert not connector.table_exists('public', '各产品对应的测试部长')
+        assert connector.get_table_columns('yxwtzb_20251229', '导出原始数据') == ['数据id', '创建时间']
+        assert connector.get_column_type('yxwtzb_20251229', '导出原始数据', '创建时间') \
+            == 'timestamp without time zone'
+
+    def test_preflight_reports_missing_dependencies(self, tmp_path, connector):
+        """测试预检发现缺失的表和列"""
+        extractor = DataExtractor(make_extractor_config(tmp_path), db=connector)
+        problems = extractor.preflight_check(['task1', 'task2', 'task3', 'task4'])
+
+        assert 'task1' not in problems
+        assert 'task2' not in problems
+        assert any('缺少列' in problem for problem in problems['task3'])
+        assert any('各产品对应的测试部长' in problem for problem in problems['task4'])
+
+
+class TestIncrementalStore:
+    """增量抽取测试类"""
+
+    @pytest.fixture
+    def snapshot(self):
+        return pd.DataFrame({
+            '数据id': ['1', '2', '3'],
+            '创建时间': pd.to_datetime(['2025-12-20', '2025-12-10', '2025-12-01']),
+            '更新时间': pd.to_datetime(['2025-12-21', '2025-12-11', '2025-12-02']),
+            '审批状态': ['审批中', '审批中', '已结束'],
+        })
+
+    def test_merge_changed_and_deleted_rows(self, snapshot):
+        """测试合并更新、新增和删除的行"""
+        changed = pd.DataFrame({
+            '数据id': ['2', '4'],
+            '创建时间': pd.to_datetime(['2025-12-10', '2025-12-28']),
+            '更新时间': pd.to_datetime(['2025-12-29', '2025-12-28']),
+            '审批状态': ['已结束', '审批中'],
+        })
+
+        merged = IncrementalStore.merge(snapshot, changed, deleted_ids={'3'})
+
+        assert merged['数据id'].tolist() == ['4', '1', '2']
+        assert merged.loc[merged['数据id'] == '2', '审批状态'].item() == '已结束'
+
+    def test_save_and_load_roundtrip(self, tmp_path, snapshot):
+        """测试快照和水位线的保存与读取"""
+        store = IncrementalStore(tmp_path)
+        watermark = IncrementalStore.build_watermark(snapshot, '20251229')
+        store.save('计算解决率过程数据', snapshot, watermark)
+
+        loaded, loaded_watermark = store.load('计算解决率过程数据')
+
+        assert len(loaded) == 3
+        assert loaded_watermark['max_updated'].startswith('2025-12-21 00:00:00')
+        assert loaded_watermark['seen_ids'] == ['1', '2', '3']
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            '计算解决率过程数据.parquet', '计算解决率过程数据.watermark.json'
+        ]
+
+    def test_mismatched_snapshot_and_watermark_ignored(self, tmp_path, snapshot):
+        """测试快照与水位线不是同一次保存时不使用快照"""
+        store = IncrementalStore(tmp_path)
+        store.save('计算解决率过程数据', snapshot, IncrementalStore.build_watermark(snapshot, '20251229'))
+        other = IncrementalStore(tmp_path / 'other')
+        older = snapshot.iloc[:2]
+        other.save('计算解决率过程数据', older, IncrementalStore.build_watermark(older, '20251222'))
+        (tmp_path / 'other' / '计算解决率过程数据.watermark.json').replace(
+            tmp_path / '计算解决率过程数据.watermark.json')
+
+        assert store.load('计算解决率过程数据') == (None, None)
+
+
+class TestQueryCache:
+    """查询结果缓存测试类"""
+
+    def test_cacheable_queries(self, tmp_path):
+        """测试只缓存周快照Schema的查询"""
+        cache = QueryCache(tmp_path)
+
+        assert cache.is_cacheable('SELECT * FROM yxwtzb_20251229."导出原始数据";')
+        assert not cache.is_cacheable(
+            'SELECT * FROM yxwtzb_20251229.计算解决率过程数据 A, public."各产品对应的测试部长" B')
+        assert not cache.is_cacheable('SELECT 1')
+
+    def test_key_normalizes_whitespace(self, tmp_path):
+        """测试缓存键忽略空白差异但区分参数"""
+        cache = QueryCache(tmp_path)
+        key1 = cache.make_key('SELECT *\n  FROM yxwtzb_20251229."t";', ('2025-12-22',))
+        key2 = cache.make_key('SELECT * FROM yxwtzb_20251229."t"', ('2025-12-22',))
+        key3 = cache.make_key('SELECT * FROM yxwtzb_20251229."t"', ('2025-12-23',))
+
+        assert key1 == key2
+        assert key1 != key3
+
+    def test_put_get_and_refresh(self, tmp_path):
+        """测试缓存读写和强制刷新"""
+        df = pd.DataFrame({'数据id': ['1', '2'], '数量': [1, 2]})
+        QueryCache(tmp_path).put('k', df)
+
+        assert QueryCache(tmp_path).get('k')['数据id'].tolist() == ['1', '2']
+        assert QueryCache(tmp_path, refresh=True).get('k') is None
+
+    def test_lru_eviction(self, tmp_path):
+        """测试超出大小上限时淘汰最久未使用的缓存"""
+        cache = QueryCache(tmp_path, max_size_mb=0.001)
+        df = pd.DataFrame({'备注': [str(i) * 40 for i in range(100)]})
+        cache.put('old', df)
+        time.sleep(0.01)
+        cache.put('new', df)
+
+        assert cache.get('old') is None
+        assert cache.get('new') is not None
+
+
+    def test_cache_dirs_resolved_under_output_directory(self, tmp_path):
+        """测试相对的缓存目录位于输出目录下,回填各周共用维表缓存目录"""
+        config = make_extractor_config(tmp_path / 'out')
+        assert resolve_cache_dir(config, '.query_cache') == tmp_path / 'out' / '.query_cache'
+        assert resolve_cache_dir(config, str(tmp_path / 'cache')) == tmp_path / 'cache'
+
+        week_config = BackfillRunner(config)._build_week_config('20251229')
+        assert week_config['dimension_cache']['directory'] == str(tmp_path / 'out' / '.dimension_cache')
+
+
+class TestBackfill:
+    """历史回填测试类"""
+
+    def test_find_schema_dates(self, tmp_path):
+        """测试按范围筛选可用的Schema"""
+        runner = BackfillRunner(make_extractor_config(tmp_path))
+        runner.db.list_schemas = lambda prefix: [
+            'yxwtzb_20251215', 'yxwtzb_20251222', 'yxwtzb_20251229', 'yxwtzb_backup', 'yxwtzb_20260105'
+        ]
+
+        assert runner.find_schema_dates('20251222', '20251229') == ['20251222', '20251229']
+
+    def test_week_config_layouts(self, tmp_path):
+        """测试单周配置的日期范围和输出目录"""
+        config = make_extractor_config(tmp_path)
+        week_config = BackfillRunner(config)._build_week_config('20251229')
+
+        assert week_config['schema']['date'] == '20251229'
+        assert week_config['date_range'] == {'start_date': '2025-12-22', 'end_date': '2025-12-28'}
+        assert week_config['output']['directory'] == str(tmp_path / '20251229')
+        assert config['output']['directory'] == str(tmp_path)
+        assert week_config['incremental']['enabled'] is False
+
+        config['backfill'] = {'layout': 'partitioned'}
+        extractor = DataExtractor(BackfillRunner(config)._build_week_config('20251222'),
+                                  db=FakePooledDB())
+        assert extractor._get_output_filename('task1') == \
+            tmp_path / 'task1' / 'schema_date=20251222' / '原始数据.xlsx'
+
+
+    def test_partitioned_backfill_writes_one_report_per_week(self, tmp_path):
+        """测试按Schema分区的回填布局下每周输出各自的查询统计报告"""
+        for schema_date in ('20251222', '20251229'):
+            tables = generate_dataset(50, schema_date, days=14, seed=5)
+            write_schema(tmp_path / 'db', f'yxwtzb_{schema_date}', tables)
+
+        config = make_extractor_config(tmp_path / 'out', task2_enabled=False, task3_enabled=False,
+                                       task4_enabled=False)
+        config['database'] = {'backend': 'sqlite', 'sqlite': {'directory': str(tmp_path / 'db')}}
+        config['backfill'] = {'layout': 'partitioned', 'concurrency': 2}
+        config['instrumentation'] = {'enabled': True}
+
+        results = BackfillRunner(config).run('20251222', '20251229')
+        assert results == {'20251222': {'task1': True}, '20251229': {'task1': True}}
+
+        for schema_date in ('20251222', '20251229'):
+            report_file = tmp_path / 'out' / 'query_report' / f'schema_date={schema_date}' / 'query_report.json'
+            report = json.loads(report_file.read_text(encoding='utf-8'))
+            assert report['schema_date'] == schema_date
+            assert list(report['tasks']) == [f'task1@{schema_date}']
+        assert not (tmp_path / 'out' / 'query_report.json').exists()
+
+
+class TestQueryStats:
+    """查询统计测试类"""
+
+    def test_records_by_task_and_writes_report(self, tmp_path):
+        """测试按任务记录查询并输出JSON报告"""
+        stats = QueryStats()
+        with stats.label('task1'):
+            stats.record('SELECT *\n FROM t', 'pandas', 1000, 2048, 0.5, 1.5)
+        stats.record_task('task1', 2.1, True)
+
+        entry = stats.queries[0]
+        assert entry['task'] == 'task1'
+        assert entry['sql'] == 'SELECT * FROM t'
+        assert entry['rows_per_second'] == 500.0
+        assert stats.current_label is None
+
+        report_file = stats.write_report(tmp_path / 'query_report.json', schema_date='20251229')
+        report = json.loads(report_file.read_text(encoding='utf-8'))
+        assert report['schema_date'] == '20251229'
+        assert report['summary']['task1']['rows'] == 1000
+        assert report['tasks']['task1']['success'] is True
+
+    def test_shared_connector_report_per_schema(self, tmp_path):
+        """测试多个Schema共用连接器(回填)时,每周的报告只包含本周的任务"""
+        db = FakePooledDB()
+        reports = {}
+        for schema_date in ('20251222', '20251229'):
+            config = make_extractor_config(tmp_path / schema_date, task3_enabled=False, task4_enabled=False)
+            config['schema']['date'] = schema_date
+            config['instrumentation'] = {'enabled': True}
+            extractor = DataExtractor(config, db=db)
+            for method in ('task1_extract_original_data', 'task2_extract_calculated_data'):
+                def run(method=method):
+                    db.stats.record(f'SELECT {method}', 'pandas', 10, 100, 0.1, 0.1)
+                    return True
+                setattr(extractor, method, run)
+            extractor.run_all_tasks()
+            reports[schema_date] = json.loads(
+                (tmp_path / schema_date / 'query_report.json').read_text(encoding='utf-8'))
+
+        report = reports['20251229']
+        assert len(db.stats.queries) == 4
+        assert [entry['task'] for entry in report['queries']] == ['task1@20251229', 'task2@20251229']
+        assert sorted(report['tasks']) == ['task1@20251229', 'task2@20251229']
+        assert sum(task['queries'] for task in report['summary'].values()) == 2
+
+
+class TestDimensionCache:
+    """维表缓存测试类"""
+
+    class FingerprintDB:
+        """按SQL返回指纹或维表数据的假连接器"""
+
+        def __init__(self):
+            self.fingerprint = 'a1'
+            self.data_queries = 0
+
+        def execute_query(self, query, params=None):
+            if 'fingerprint' in query:
+                return pd.DataFrame({'row_count': [1], 'fingerprint': [self.fingerprint]})
+            self.data_queries += 1
+            return pd.DataFrame({'具体的产品': ['产品A'], '部门负责人': ['张三']})
+
+    def test_reuses_local_copy_until_fingerprint_changes(self, tmp_path):
+        """测试指纹不变时使用本地副本,变化后重新查询"""
+        db = self.FingerprintDB()
+        cache = DimensionCache(tmp_path)
+        columns = ['具体的产品', '部门负责人']
+
+        first = cache.load(db, 'public."各产品对应的测试部长"', '测试部长', columns)
+        second = cache.load(db, 'public."各产品对应的测试部长"', '测试部长', columns)
+        assert db.data_queries == 1
+        pd.testing.assert_frame_equal(first, second)
+
+        db.fingerprint = 'b2'
+        cache.load(db, 'public."各产品对应的测试部长"', '测试部长', columns)
+        assert db.data_queries == 2
+
+    def test_client_join_matches_inner_join(self):
+        """测试内存关联与SQL内连接一致(NULL产品不参与关联)"""
+        df = pd.DataFrame({
+            '创建时间': pd.to_datetime(['2025-12-24', '2025-12-23', '2025-12-22']),
+            '审批编号': ['3', '2', '1'],
+            '所涉产品': ['产品A', None, '产品B'],
+            '软件版本号': ['v1', 'v2', 'v3'],
+            '所属客户项目': ['p', 'p', 'p'],
+            '问题描述': ['x', 'y', 'z'],
+        })
+        dimension = pd.DataFrame({'具体的产品': ['产品A', None], '部门负责人': ['张三', '李四']})
+
+        result = DataExtractor._join_test_owner(df, dimension)
+        assert result['审批编号'].tolist() == ['3']
+        assert result['测试负责人'].tolist() == ['张三']
+        assert '具体的产品' not in result.columns
+
+
+
+class TestSQLiteBackend:
+    """SQLite本地数据库后端测试类"""
+
+    def test_translate_query(self):
+        """测试PostgreSQL风格的参数和类型转换"""
+        sql, values = translate_query(
+            'SELECT * FROM t WHERE "数据id"::text = ANY(%s) AND "更新时间" >= %s',
+            (['a', 'b'], '2025-12-29 10:00:00.000000')
+        )
+        assert sql == 'SELECT * FROM t WHERE "数据id" IN (?, ?) AND "更新时间" >= ?'
+        assert values == ['a', 'b', '2025-12-29 10:00:00']
+
+    def test_tasks_run_against_local_database(self, tmp_path):
+        """测试任务SQL在本地数据库上执行,结果与在内存中筛选一致"""
+        tables = generate_dataset(300, '20251229', days=28, seed=1)
+        write_schema(tmp_path / 'db', 'yxwtzb_20251229', tables)
+        write_schema(tmp_path / 'db', 'public', {DIMENSION_TABLE_NAME: build_dimension_table(tables)})
+
+        config = make_extractor_config(tmp_path / 'out', engine='arrow')
+        config['database'] = {'backend': 'sqlite', 'sqlite': {'directory': str(tmp_path / 'db')}}
+        config['output']['parallel_xlsx'] = {'enabled': True, 'workers': 1}
+        extractor = DataExtractor(config)
+
+        assert extractor.run_all_tasks() == {'task1': True, 'task2': True, 'task3': True, 'task4': True}
+
+        source = tables['计算解决率过程数据']
+        expected = source[
+            (source['创建时间'] >= '2025-12-22 00:00:01')
+            & (source['创建时间'] <= '2025-12-28 23:59:59')
+            & (source['审批状态'] != '终止')
+            & ~source['处理方式'].isin(['非研发处理', '硬件故障处理'])
+            & source['处理方式'].notna()
+            & (source['审批结果'] != '审批未通过')
+        ]
+        assert len(pd.read_excel(tmp_path / 'out' / '新增问题.xlsx')) == len(expected) > 0
+        assert len(pd.read_excel(tmp_path / 'out' / '原始数据.xlsx')) == 300
+
+
+class TestWeeklyAggregate:
+    """周解决率汇总测试类"""
+
+    def test_summarize_rates(self):
+        """测试解决率和及时解决率的计算"""
+        aggregate = pd.DataFrame({
+            '统计周': ['2025-12-22'] * 4 + ['2025-12-15'],
+            '所涉产品': ['A', 'A', 'A', 'B', 'A'],
+            '用于交付日期偏差统计': ['及时解决', '未及时解决', '超时未解决', '非研发处理', '非研发处理'],
+            '问题数': [2, 1, 1, 3, 1],
+        })
+
+        summary = WeeklyAggregate.summarize(aggregate)
+
+        assert list(summary[['统计周', '所涉产品']].itertuples(index=False, name=None)) == [
+            ('2025-12-22', 'A'), ('2025-12-22', 'B'), ('2025-12-15', 'A')
+        ]
+        assert summary.loc[0, '总计'] == 4
+        assert summary.loc[0, '解决率'] == 75.0
+        assert summary.loc[0, '及时解决率'] == 50.0
+        assert summary.loc[1, '解决率'] == '不涉及研发处理'
+
+    def test_refresh_against_local_database(self, tmp_path):
+        """测试在本地数据库上创建汇总,计数与在内存中清洗后的明细一致"""
+        tables = generate_dataset(500, '20251229', days=60, seed=2)
+        write_schema(tmp_path, 'yxwtzb_20251229', tables)
+        db = SQLiteConnector({'database': {'backend': 'sqlite', 'sqlite': {'directory': str(tmp_path)}}})
+        db.connect()
+        try:
+            assert db.check_create_privilege('report') is None
+            aggregate = WeeklyAggregate(db, 'yxwtzb_20251229', 'report')
+            summary = aggregate.summarize(aggregate.refresh())
+            # 再次刷新时重建汇总
+            assert len(aggregate.refresh()) > 0
+            # 汇总写入汇总Schema,周快照中不新建表
+            assert db.table_exists('report', '周解决率汇总_yxwtzb_20251229')
+            assert not db.table_exists('yxwtzb_20251229', '周解决率汇总_yxwtzb_20251229')
+
+            source = tables['计算解决率过程数据']
+            removed = ((source['审批结果'] == '审批未通过') | (source['审批状态'] == '终止')
+                       | source['非研发处理问题类别'].fillna('').str.contains('需求')
+                       | (source['是否剔除'] == 'YES'))
+            kept = source[~removed & source['处理方式'].isin(['研发处理', '非研发处理'])]
+            assert summary['总计'].sum() == len(kept)
+            assert summary['非研发处理'].sum() == (kept['处理方式'] == '非研发处理').sum()
+
+            advice = aggregate.advise_indexes()
+            assert [item['状态'] for item in advice] == ['建议创建', '建议创建']
+            with db.get_connection() as conn:
+                conn.cursor().execute(advice[0]['建表语句'])
+                conn.commit()
+            assert aggregate.advise_indexes()[0]['状态'].startswith('已存在')
+        finally:
+            db.disconnect()
+
+
+class TestSideOutputs:
+    """列式输出测试类"""
+
+    def test_normalize_formats(self):
+        """测试格式别名、去重和默认值"""
+        assert normalize_formats(None) == ['xlsx']
+        assert normalize_formats(['Parquet', 'feather', 'csv', 'arrow']) == ['parquet', 'arrow', 'csv.gz']
+        with pytest.raises(ValueError):
+            normalize_formats(['xls'])
+
+    def test_columnar_only_outputs_with_date_prefix(self, tmp_path):
+        """测试只输出列式文件时与xlsx同名,且三种格式内容一致"""
+        tables = generate_dataset(200, '20251229', days=28, seed=3)
+        write_schema(tmp_path / 'db', 'yxwtzb_20251229', tables)
+
+        config = make_extractor_config(tmp_path / 'out', task2_enabled=False, task3_enabled=False,
+                                       task4_enabled=False)
+        config['database'] = {'backend': 'sqlite', 'sqlite': {'directory': str(tmp_path / 'db')}}
+        config['output']['date_prefix'] = True
+        config['output']['formats'] = {'task1': ['parquet', 'arrow', 'csv.gz']}
+        extractor = DataExtractor(config)
+        extractor.db.connect()
+        try:
+            assert extractor.task1_extract_original_data()
+        finally:
+            extractor.db.disconnect()
+
+        prefix = extractor._get_date_prefix()
+        names = sorted(path.name for path in (tmp_path / 'out').iterdir())
+        assert names == sorted(f"{prefix}原始数据{suffix}" for suffix in ('.arrow', '.csv.gz', '.parquet'))
+
+        parquet = pd.read_parquet(tmp_path / 'out' / f"{prefix}原始数据.parquet")
+        arrow = pd.read_feather(tmp_path / 'out' / f"{prefix}原始数据.arrow")
+        csv = pd.read_csv(tmp_path / 'out' / f"{prefix}原始数据.csv.gz")
+        assert len(parquet) == len(arrow) == len(csv) == 200
+        assert parquet['数据id'].astype(str).tolist() == csv['数据id'].astype(str).tolist()
+        assert extractor._task_outputs['task1']['files'] == [
+            tmp_path / 'out' / f"{prefix}原始数据{suffix}" for suffix in ('.parquet', '.arrow', '.csv.gz')
+        ]
+
+    def test_pipelined_chunks_also_written_to_parquet(self, tmp_path):
+        """测试流水线导出时每块同时写入xlsx和Parquet,首块全空的列按文本处理"""
+
+        class StreamDB(FakePooledDB):
+            def table_exists(self, schema, table):
+                return True
+
+            arrow_schema = staticmethod(DatabaseConnector.arrow_schema)
+
+            def describe_query(self, query, params=None):
+                return [('创建时间', 1114), ('问题描述', 25)]
+
+            def execute_query_iter(self, query, params=None, itersize=None):
+                yield pd.DataFrame({'创建时间': pd.to_datetime(['2025-12-29 08:00:00', '2025-12-28 23:59:59']),
+                                    '问题描述': [None, None]})
+                yield pd.DataFrame({'创建时间': pd.to_datetime(['2025-12-22 00:00:00']),
+                                    '问题描述': ['c']})
+
+        config = make_extractor_config(tmp_path, pipeline={'enabled': True, 'queue_size': 1})
+        config['output']['formats'] = {'task2': ['xlsx', 'parquet']}
+        extractor = DataExtractor(config, db=StreamDB())
+        assert extractor.task2_extract_calculated_data()
+
+        parquet = pd.read_parquet(tmp_path / '计算数据.parquet')
+        assert parquet['问题描述'].tolist()[2] == 'c'
+        assert parquet['问题描述'].isna().tolist() == [True, True, False]
+        assert len(pd.read_excel(tmp_path / '计算数据.xlsx')) == 3
+        assert extractor._task_outputs['task2']['files'] == [tmp_path / '计算数据.xlsx',
+                                                             tmp_path / '计算数据.parquet']
+
+    def test_pipelined_schema_from_query_types(self, tmp_path):
+        """测试第一块中全部为空的时间列按查询结果的列类型写入,后续块的时间值不会转换失败"""
+        tables = generate_dataset(20, '20251229', days=28, seed=4)
+        source = tables['导出原始数据']
+        newest = source['创建时间'].sort_values(ascending=False).index[:3]
+        source.loc[newest, '研发解决时间'] = None
+        assert source['研发解决时间'].notna().any()
+        write_schema(tmp_path / 'db', 'yxwtzb_20251229', tables)
+
+        config = make_extractor_config(tmp_path / 'out', pipeline={'enabled': True, 'chunk_rows': 3})
+        config['database'] = {'backend': 'sqlite', 'sqlite': {'directory': str(tmp_path / 'db')}}
+        config['output']['formats'] = {'task1': ['xlsx', 'parquet']}
+        extractor = DataExtractor(config)
+        extractor.db.connect()
+        try:
+            assert extractor._use_pipeline('导出原始数据')
+            assert extractor.task1_extract_original_data()
+        finally:
+            extractor.db.disconnect()
+
+        parquet = pd.read_parquet(tmp_path / 'out' / '原始数据.parquet')
+        assert len(parquet) == 20
+        assert pd.api.types.is_datetime64_any_dtype(parquet['研发解决时间'])
+        assert parquet['研发解决时间'].head(3).isna().all()
+        assert parquet['研发解决时间'].notna().sum() == source['研发解决时间'].notna().sum()
+
+
+    def test_preflight_reports_missing_create_privilege(self, tmp_path):
+        """测试预检检查汇总Schema的建表权限"""
+        config = make_extractor_config(tmp_path, task5_enabled=True)
+        config['aggregate'] = {'schema': 'report'}
+        extractor = DataExtractor(config, db=FakePooledDB())
+        extractor.db.load_catalog = lambda schemas, tables=None: None
+        extractor.db.table_exists = lambda schema, table: True
+        extractor.db.get_table_columns = lambda schema, table: TASK_DEPENDENCIES['task5']['计算解决率过程数据']
+        extractor.db.check_create_privilege = lambda schema: f"没有在 {schema} 中建表的权限"
+
+        assert extractor.preflight_check(['task5']) == {'task5': ['没有在 report 中建表的权限']}
+        assert not extractor.task5_refresh_weekly_aggregate()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
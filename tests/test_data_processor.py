@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'apps' / 'data_processor'))
 
 from modules.calculator import Calculator
+from modules.report_generator import ReportGenerator
 
 
 class TestCalculator:
@@ -93,5 +94,48 @@ class TestCalculator:
         ).all()
 
 
+class TestReportGenerator:
+    """报表生成测试类"""
+
+    def test_streaming_matches_openpyxl(self, tmp_path):
+        """测试流式写入和并行写入的报表与openpyxl写入的内容一致"""
+        import pandas as pd
+        df2 = pd.DataFrame({'数据id': ['1', '2'], '审批记录': ['提交;_x000D_\n抄送', None]})
+        df1 = pd.DataFrame({
+            '数据id': ['1', '2'],
+            '研发解决时间': [pd.Timestamp('2026-01-03 10:00:00'), None],
+            '研发交付日期偏差': [2.0, '非研发处理'],
+        })
+        pivot = pd.DataFrame({'及时解决': [1, 0], '及时解决率': [100.0, '不涉及研发处理']},
+                             index=pd.Index(['产品A', '产品B'], name='所涉产品'))
+
+        modes = {
+            'openpyxl': {},
+            'streaming': {'streaming': True},
+            'parallel': {'parallel_xlsx': {'enabled': True, 'workers': 1, 'block_rows': 1}},
+        }
+        reports = {}
+        for mode, options in modes.items():
+            config = {'output': {'directory': str(tmp_path / mode), 'filename': '报表.xlsx', **options}}
+            path = ReportGenerator(config).generate_report(df2, df1, pivot)
+            reports[mode] = pd.read_excel(path, sheet_name=None)
+
+        for mode in ('streaming', 'parallel'):
+            assert list(reports[mode]) == list(reports['openpyxl'])
+            for sheet_name, expected in reports['openpyxl'].items():
+                pd.testing.assert_frame_equal(reports[mode][sheet_name], expected)
+
+    def test_streaming_rejects_oversized_sheet(self, tmp_path, monkeypatch):
+        """测试流式写入超出Excel行数上限时报错"""
+        import pandas as pd
+        import modules.report_generator as report_generator
+        monkeypatch.setattr(report_generator, 'EXCEL_MAX_ROWS', 2)
+
+        config = {'output': {'directory': str(tmp_path), 'filename': '报表.xlsx', 'streaming': True}}
+        with pytest.raises(ValueError, match='过大'):
+            ReportGenerator(config)._write_streaming(tmp_path / '报表.xlsx',
+                                                     [('数据', pd.DataFrame({'id': [1, 2]}))])
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])